@@ -133,3 +133,26 @@ AUTHENTICATION_BACKENDS = [
     'user.backends.WalletAddressBackend',
     'django.contrib.auth.backends.ModelBackend',
 ]
+
+# Connect to the Ethereum node in a background thread at startup instead of on first use
+WEB3_WARM_UP = False
+
+# Binary OHLCV files used by the market-history endpoint
+CANDLE_STORE_DIR = BASE_DIR / 'data' / 'candles'
+
+# One cache file shared by every worker process on the host (see dashboard/utils/sqlite_cache.py).
+# Keys are namespaced by the prefix before their first ':'; each namespace can override TIMEOUT and MAX_ENTRIES.
+CACHES = {
+    'default': {
+        'BACKEND': 'dashboard.utils.sqlite_cache.SQLiteCache',
+        'LOCATION': BASE_DIR / 'data' / 'cache.sqlite3',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+            'NAMESPACES': {
+                'live_price': {'TIMEOUT': 15, 'MAX_ENTRIES': 5000},
+                'single_flight': {'TIMEOUT': 30, 'MAX_ENTRIES': 1000},
+            },
+        },
+    },
+}
@@ -1,6 +1,15 @@
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard'
+
+    def ready(self):
+        # Connect to the node in the background so startup never waits on RPC
+        if getattr(settings, 'WEB3_WARM_UP', False):
+            from dashboard.web3 import client
+            threading.Thread(target=client.warm_up, name='web3-warm-up', daemon=True).start()
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.utils.coin_catalog import backfill_coin_images
+
+
+class Command(BaseCommand):
+    help = "Fetch images for coins that pages showed without one, in rate-limited batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep running and pick up newly flagged coins.")
+        parser.add_argument('--interval', type=float, default=60.0, help="Seconds between passes with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                stored = backfill_coin_images()
+                if stored or not options['loop']:
+                    self.stdout.write(f"Stored {stored} coin images.")
+            except Exception as e:
+                # Coins stay flagged until their image is stored, so the next pass retries them
+                if not options['loop']:
+                    raise
+                self.stderr.write(f"Image backfill failed: {e}")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
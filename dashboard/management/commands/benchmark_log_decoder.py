@@ -0,0 +1,64 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from web3 import Web3
+
+from dashboard.utils.events import EVENT_TOPICS, build_raw_log, decode_logs
+from dashboard.web3 import contract
+
+
+class Command(BaseCommand):
+    help = "Compare the bulk raw-log decoder with web3's per-event processing on synthetic CoinBought/CoinSold logs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logs', type=int, default=10000, help="Number of synthetic logs.")
+        parser.add_argument('--users', type=int, default=100, help="Number of distinct wallets in the logs.")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per decoder; the best time is reported.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        wallets = [Web3.to_checksum_address(rng.randbytes(20).hex()) for _ in range(options['users'])]
+        raw_logs = []
+        for i in range(options['logs']):
+            event_name = rng.choice(('CoinBought', 'CoinSold'))
+            log_args = {
+                'user': rng.choice(wallets),
+                'symbol': rng.choice(('BTC', 'ETH', 'SOL', 'DOGE')),
+                'quantity': rng.randint(1, 1000),
+                'totalCost': rng.randint(1, 10 ** 9),
+            }
+            raw_logs.append(build_raw_log(event_name, log_args, 1000 + i // 4, i % 4))
+        user = wallets[0]
+        events = {name: getattr(contract.events, name)() for name in ('CoinBought', 'CoinSold')}
+        topics = {bytes(EVENT_TOPICS[name]): name for name in events}
+
+        def web3_path():
+            # What contract.events.X().get_logs does: full processing of every log, then filter
+            decoded = [events[topics[bytes(log['topics'][0])]].process_log(log) for log in raw_logs]
+            return [log for log in decoded if log['args']['user'] == user]
+
+        def bulk_path():
+            return decode_logs(raw_logs, user=user)
+
+        def bulk_unfiltered_path():
+            return [log for log in decode_logs(raw_logs) if log['args']['user'] == user]
+
+        results = {}
+        runs = (
+            ('web3 process_log', web3_path),
+            ('bulk, no prefilter', bulk_unfiltered_path),
+            ('bulk decode_logs', bulk_path),
+        )
+        for label, func in runs:
+            best = None
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                matched = func()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            results[label] = (best, len(matched))
+            self.stdout.write(f"{label:<20} {best * 1000:9.1f} ms  ({len(matched)} logs for {user})")
+
+        baseline, bulk = results['web3 process_log'][0], results['bulk decode_logs'][0]
+        self.stdout.write(f"Speed-up: {baseline / bulk:.1f}x over {len(raw_logs)} logs")
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.utils.indexer import get_checkpoint, sync_events
+
+
+class Command(BaseCommand):
+    help = "Ingest CryptoPlatform contract events into the local index, starting from the last checkpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--to-block', type=int, default=None, help="Stop at this block instead of the latest one.")
+        parser.add_argument('--loop', action='store_true', help="Keep running and poll for new blocks.")
+        parser.add_argument('--interval', type=float, default=12.0, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                stored = sync_events(to_block=options['to_block'])
+                checkpoint = get_checkpoint()
+                self.stdout.write(f"Indexed {stored} events, checkpoint at block {checkpoint.last_block}.")
+            except Exception as e:
+                # LogScanError etc.: the window is retried from the checkpoint on the next poll
+                if not options['loop']:
+                    raise
+                self.stderr.write(f"Indexing failed: {e}")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
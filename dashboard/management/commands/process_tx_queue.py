@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.utils.tx_queue import recover_stuck, sync_receipts, send_queued
+
+
+class Command(BaseCommand):
+    help = "Sign and send queued contract transactions, then track their receipts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep running and poll the queue.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds between polls with --loop.")
+        parser.add_argument('--batch-size', type=int, default=20, help="Transactions sent per poll.")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                recovered = recover_stuck()
+                sent = send_queued(options['batch_size'])
+                mined = sync_receipts()
+                if recovered:
+                    self.stdout.write(f"Settled {recovered} transactions left in 'sending'.")
+                if sent or mined or not options['loop']:
+                    self.stdout.write(f"Sent {sent} transactions, {mined} receipts recorded.")
+            except Exception as e:
+                # A rejected RPC batch or a node outage must not stop the worker
+                if not options['loop']:
+                    raise
+                self.stderr.write(f"Queue poll failed: {e}")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
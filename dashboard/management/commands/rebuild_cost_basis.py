@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.models import CostBasis
+from dashboard.utils.cost_basis import rebuild_cost_basis
+
+
+class Command(BaseCommand):
+    help = "Recompute every CostBasis aggregate from the indexed buy events."
+
+    def handle(self, *args, **options):
+        rebuild_cost_basis()
+        self.stdout.write(f"Rebuilt cost basis for {CostBasis.objects.count()} wallet/symbol pairs.")
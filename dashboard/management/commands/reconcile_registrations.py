@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.utils.utils import get_all_registered_users, get_registered_wallets, reconcile_registered_users
+
+
+class Command(BaseCommand):
+    help = "Fill the local registry from getRegisteredUsers() and optionally audit it against the contract."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help="Check registered(addr) for every wallet in the registry.")
+
+    def handle(self, *args, **options):
+        added = reconcile_registered_users()
+        self.stdout.write(f"Added {added} wallets from getRegisteredUsers().")
+        if options['verify']:
+            wallets = get_registered_wallets()
+            confirmed = set(get_all_registered_users(verify=True))
+            unconfirmed = [wallet for wallet in wallets if wallet not in confirmed]
+            self.stdout.write(f"Verified {len(confirmed)} of {len(wallets)} wallets.")
+            for wallet in unconfirmed:
+                self.stdout.write(f"  not confirmed: {wallet}")
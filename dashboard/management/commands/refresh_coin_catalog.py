@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.utils import single_flight
+from dashboard.utils.coin_catalog import refresh_coin_catalog
+
+# The /coins/list download and upsert can take minutes on a slow link
+REFRESH_LOCK_TTL = 600
+
+
+class Command(BaseCommand):
+    help = "Load the CoinGecko coin list, ranks and images into the Coin table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--market-pages', type=int, default=1, help="Pages of 250 top coins to take rank, image and price from.")
+
+    def handle(self, *args, **options):
+        # Overlapping runs (cron on several hosts) would each download the multi-MB list
+        result = single_flight.run(
+            'coin_catalog_refresh',
+            lambda: refresh_coin_catalog(options['market_pages']),
+            wait=0,
+            lock_ttl=REFRESH_LOCK_TTL,
+        )
+        if result is None:
+            self.stdout.write("Another catalog refresh is already running; skipped.")
+            return
+        listed, ranked = result
+        self.stdout.write(f"Catalog refreshed: {listed} coins listed, {ranked} ranked.")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.utils.nonces import resync_nonce
+from dashboard.web3 import WALLET_ADDRESS
+
+
+class Command(BaseCommand):
+    help = "Realign the backend wallet's local nonce counter with the chain's pending transaction count."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--address', default=WALLET_ADDRESS, help="Signer address (default: backend wallet).")
+
+    def handle(self, *args, **options):
+        next_nonce = resync_nonce(options['address'])
+        self.stdout.write(f"Next nonce for {options['address']}: {next_nonce}")
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.utils.receipts import poll_receipts
+
+
+class Command(BaseCommand):
+    help = "Record receipts of pending backend transactions, batching all lookups into one JSON-RPC call per poll."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep running and poll for receipts.")
+        parser.add_argument('--interval', type=float, default=4.0, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                mined = poll_receipts()
+                if mined or not options['loop']:
+                    self.stdout.write(f"Recorded {mined} receipts.")
+            except Exception as e:
+                # A rejected batch leaves the receipts pending; they are asked for again next poll
+                if not options['loop']:
+                    raise
+                self.stderr.write(f"Receipt poll failed: {e}")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
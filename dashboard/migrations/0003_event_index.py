@@ -0,0 +1,58 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_borrowrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexerCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_block', models.PositiveBigIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TradeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wallet', models.CharField(max_length=42)),
+                ('kind', models.CharField(choices=[('buy', 'Buy'), ('sell', 'Sell')], max_length=4)),
+                ('symbol', models.CharField(max_length=20)),
+                ('quantity', models.DecimalField(decimal_places=0, max_digits=78)),
+                ('total_cost', models.DecimalField(blank=True, decimal_places=0, max_digits=78, null=True)),
+                ('block_number', models.PositiveBigIntegerField()),
+                ('log_index', models.PositiveIntegerField()),
+                ('tx_hash', models.CharField(max_length=66)),
+                ('timestamp', models.PositiveBigIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['wallet', 'kind', 'block_number'], name='dashboard_t_wallet_a187ba_idx')],
+                'unique_together': {('tx_hash', 'log_index')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AccountEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(max_length=20)),
+                ('wallet', models.CharField(max_length=42)),
+                ('amount', models.DecimalField(blank=True, decimal_places=0, max_digits=78, null=True)),
+                ('block_number', models.PositiveBigIntegerField()),
+                ('log_index', models.PositiveIntegerField()),
+                ('tx_hash', models.CharField(max_length=66)),
+                ('timestamp', models.PositiveBigIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['wallet', 'event', 'block_number'], name='dashboard_a_wallet_a0cd34_idx')],
+                'unique_together': {('tx_hash', 'log_index')},
+            },
+        ),
+    ]
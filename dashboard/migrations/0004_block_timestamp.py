@@ -0,0 +1,20 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_event_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlockTimestamp',
+            fields=[
+                ('block_number', models.PositiveBigIntegerField(primary_key=True, serialize=False)),
+                ('timestamp', models.PositiveBigIntegerField()),
+            ],
+        ),
+    ]
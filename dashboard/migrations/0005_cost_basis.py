@@ -0,0 +1,50 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+def backfill_cost_basis(apps, schema_editor):
+    TradeEvent = apps.get_model('dashboard', 'TradeEvent')
+    CostBasis = apps.get_model('dashboard', 'CostBasis')
+    totals = {}
+    for trade in TradeEvent.objects.filter(kind='buy').iterator():
+        key = (trade.wallet, trade.symbol)
+        spent = trade.total_cost if trade.total_cost is not None else trade.quantity * 100
+        quantity, total, first_block, last_block = totals.get(key, (0, 0, trade.block_number, trade.block_number))
+        totals[key] = (
+            quantity + trade.quantity,
+            total + spent,
+            min(first_block, trade.block_number),
+            max(last_block, trade.block_number),
+        )
+    CostBasis.objects.bulk_create([
+        CostBasis(wallet=wallet, symbol=symbol, total_quantity=quantity, total_spent=spent,
+                  first_block=first_block, last_block=last_block)
+        for (wallet, symbol), (quantity, spent, first_block, last_block) in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0004_block_timestamp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostBasis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wallet', models.CharField(max_length=42)),
+                ('symbol', models.CharField(max_length=20)),
+                ('total_quantity', models.DecimalField(decimal_places=0, default=0, max_digits=78)),
+                ('total_spent', models.DecimalField(decimal_places=0, default=0, max_digits=78)),
+                ('first_block', models.PositiveBigIntegerField()),
+                ('last_block', models.PositiveBigIntegerField()),
+            ],
+            options={
+                'unique_together': {('wallet', 'symbol')},
+            },
+        ),
+        migrations.RunPython(backfill_cost_basis, migrations.RunPython.noop),
+    ]
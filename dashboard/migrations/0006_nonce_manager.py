@@ -0,0 +1,38 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0005_cost_basis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SignerNonce',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=42, unique=True)),
+                ('next_nonce', models.PositiveBigIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NonceReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=42)),
+                ('nonce', models.PositiveBigIntegerField()),
+                ('status', models.CharField(choices=[('reserved', 'Reserved'), ('sent', 'Sent'), ('failed', 'Failed')], default='reserved', max_length=10)),
+                ('tx_hash', models.CharField(blank=True, max_length=66)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['address', 'status', 'nonce'], name='dashboard_n_address_89ce43_idx')],
+                'unique_together': {('address', 'nonce')},
+            },
+        ),
+    ]
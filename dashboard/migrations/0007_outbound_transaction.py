@@ -0,0 +1,32 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_nonce_manager'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(max_length=50)),
+                ('args', models.JSONField(default=list)),
+                ('wallet', models.CharField(blank=True, db_index=True, max_length=42)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('confirmed', 'Confirmed'), ('reverted', 'Reverted'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('tx_hash', models.CharField(blank=True, max_length=66)),
+                ('block_number', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('gas_used', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='dashboard_o_status_bf522d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.3 on 2026-10-18 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0007_outbound_transaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tx_hash', models.CharField(max_length=66, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('success', 'Success'), ('reverted', 'Reverted')], default='pending', max_length=10)),
+                ('block_number', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('gas_used', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='dashboard_t_status_db1949_idx')],
+            },
+        ),
+    ]
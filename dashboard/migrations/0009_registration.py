@@ -0,0 +1,39 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_registrations(apps, schema_editor):
+    AccountEvent = apps.get_model('dashboard', 'AccountEvent')
+    Registration = apps.get_model('dashboard', 'Registration')
+    first_blocks = {}
+    for wallet, block in AccountEvent.objects.filter(event='Registered').values_list('wallet', 'block_number'):
+        first_blocks[wallet] = min(block, first_blocks.get(wallet, block))
+    Registration.objects.bulk_create([
+        Registration(wallet=wallet, status='registered', block_number=block)
+        for wallet, block in first_blocks.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0008_transaction_receipt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Registration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wallet', models.CharField(max_length=42, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('registered', 'Registered')], default='pending', max_length=10)),
+                ('block_number', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='dashboard.outboundtransaction')),
+            ],
+        ),
+        migrations.RunPython(backfill_registrations, migrations.RunPython.noop),
+    ]
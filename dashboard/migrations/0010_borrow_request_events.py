@@ -0,0 +1,66 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:08
+
+from django.db import migrations, models
+
+
+def backfill_borrow_requests(apps, schema_editor):
+    AccountEvent = apps.get_model('dashboard', 'AccountEvent')
+    BorrowRequest = apps.get_model('dashboard', 'BorrowRequest')
+    closing = {'FundsApproved': 'approved', 'FundsRejected': 'rejected'}
+    events = AccountEvent.objects.filter(
+        event__in=['RequestFunds', 'FundsApproved', 'FundsRejected'],
+    ).order_by('block_number', 'log_index')
+    for event in events.iterator():
+        status = 'replaced' if event.event == 'RequestFunds' else closing[event.event]
+        BorrowRequest.objects.filter(wallet=event.wallet, status='pending').update(
+            status=status, resolved_block=event.block_number,
+        )
+        if event.event == 'RequestFunds':
+            BorrowRequest.objects.create(
+                wallet=event.wallet, amount=event.amount, tx_hash=event.tx_hash,
+                log_index=event.log_index, block_number=event.block_number,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0009_registration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='borrowrequest',
+            name='block_number',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='borrowrequest',
+            name='log_index',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='borrowrequest',
+            name='resolved_block',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='borrowrequest',
+            name='tx_hash',
+            field=models.CharField(blank=True, max_length=66),
+        ),
+        migrations.AddField(
+            model_name='borrowrequest',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='borrowrequest',
+            index=models.Index(fields=['status', 'block_number'], name='dashboard_b_status_30ca66_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowrequest',
+            index=models.Index(fields=['wallet', 'status'], name='dashboard_b_wallet_15885a_idx'),
+        ),
+        migrations.RunPython(backfill_borrow_requests, migrations.RunPython.noop),
+    ]
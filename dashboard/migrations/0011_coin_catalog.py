@@ -0,0 +1,39 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:09
+
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+
+def uppercase_symbols(apps, schema_editor):
+    Coin = apps.get_model('dashboard', 'Coin')
+    Coin.objects.update(symbol=Upper('symbol'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_borrow_request_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coin',
+            name='market_cap_rank',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='name',
+            field=models.CharField(max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='coin',
+            name='symbol',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(fields=['symbol', 'market_cap_rank'], name='dashboard_c_symbol_e115a9_idx'),
+        ),
+        migrations.RunPython(uppercase_symbols, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0011_coin_catalog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coin',
+            name='image_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='coin',
+            name='needs_image',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='coin',
+            index=models.Index(fields=['needs_image', 'id'], name='dashboard_c_needs_i_4b8f2e_idx'),
+        ),
+    ]
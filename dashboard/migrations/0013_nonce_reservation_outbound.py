@@ -0,0 +1,19 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0012_coin_image_backfill'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='noncereservation',
+            name='outbound',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='nonce_reservations', to='dashboard.outboundtransaction'),
+        ),
+    ]
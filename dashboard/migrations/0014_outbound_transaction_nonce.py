@@ -0,0 +1,23 @@
+# Generated by Django 4.2.3 on 2026-10-18 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0013_nonce_reservation_outbound'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundtransaction',
+            name='nonce',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='outboundtransaction',
+            name='signer',
+            field=models.CharField(blank=True, max_length=42),
+        ),
+    ]
@@ -2,11 +2,21 @@ from django.db import models
 from django.conf import settings  # This allows use of custom user model
 
 class Coin(models.Model):
-    name = models.CharField(max_length=50)
-    symbol = models.CharField(max_length=20)
+    name = models.CharField(max_length=200)
+    symbol = models.CharField(max_length=50)  # stored upper-case
     coingecko_id = models.CharField(max_length=100, unique=True)
     current_price = models.FloatField(default=0.0)
     image = models.URLField(blank=True)
+    market_cap_rank = models.PositiveIntegerField(null=True, blank=True)
+    # Set when a page showed the coin without an image; cleared by backfill_coin_images
+    needs_image = models.BooleanField(default=False)
+    image_checked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['symbol', 'market_cap_rank']),
+            models.Index(fields=['needs_image', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.symbol.upper()})"
@@ -34,7 +44,165 @@ class Watchlist(models.Model):
         unique_together = ('user', 'coin')
 
 class BorrowRequest(models.Model):
+    PENDING = 'pending'
+    APPROVED = 'approved'
+    REJECTED = 'rejected'
+    REPLACED = 'replaced'  # a newer RequestFunds overwrote it on the contract
+
     wallet = models.CharField(max_length=100)
     amount = models.DecimalField(max_digits=20, decimal_places=2)
     status = models.CharField(max_length=20, default='pending')
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+    # RequestFunds log that opened the request, and the block of the event that closed it
+    tx_hash = models.CharField(max_length=66, blank=True)
+    log_index = models.PositiveIntegerField(null=True, blank=True)
+    block_number = models.PositiveBigIntegerField(null=True, blank=True)
+    resolved_block = models.PositiveBigIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'block_number']),
+            models.Index(fields=['wallet', 'status']),
+        ]
+
+class IndexerCheckpoint(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    last_block = models.PositiveBigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_block}"
+
+class TradeEvent(models.Model):
+    BUY = 'buy'
+    SELL = 'sell'
+    KIND_CHOICES = [(BUY, 'Buy'), (SELL, 'Sell')]
+
+    wallet = models.CharField(max_length=42)
+    kind = models.CharField(max_length=4, choices=KIND_CHOICES)
+    symbol = models.CharField(max_length=20)
+    quantity = models.DecimalField(max_digits=78, decimal_places=0)
+    total_cost = models.DecimalField(max_digits=78, decimal_places=0, null=True, blank=True)  # in cents, CoinBought only
+    block_number = models.PositiveBigIntegerField()
+    log_index = models.PositiveIntegerField()
+    tx_hash = models.CharField(max_length=66)
+    timestamp = models.PositiveBigIntegerField()
+
+    class Meta:
+        unique_together = ('tx_hash', 'log_index')
+        indexes = [models.Index(fields=['wallet', 'kind', 'block_number'])]
+
+class AccountEvent(models.Model):
+    event = models.CharField(max_length=20)  # Registered, RequestFunds, FundsApproved, FundsRejected, Repaid, AdminUpdated (wallet = new admin)
+    wallet = models.CharField(max_length=42)
+    amount = models.DecimalField(max_digits=78, decimal_places=0, null=True, blank=True)
+    block_number = models.PositiveBigIntegerField()
+    log_index = models.PositiveIntegerField()
+    tx_hash = models.CharField(max_length=66)
+    timestamp = models.PositiveBigIntegerField()
+
+    class Meta:
+        unique_together = ('tx_hash', 'log_index')
+        indexes = [models.Index(fields=['wallet', 'event', 'block_number'])]
+
+class BlockTimestamp(models.Model):
+    block_number = models.PositiveBigIntegerField(primary_key=True)
+    timestamp = models.PositiveBigIntegerField()
+
+class CostBasis(models.Model):
+    wallet = models.CharField(max_length=42)
+    symbol = models.CharField(max_length=20)
+    total_quantity = models.DecimalField(max_digits=78, decimal_places=0, default=0)
+    total_spent = models.DecimalField(max_digits=78, decimal_places=0, default=0)  # in cents
+    first_block = models.PositiveBigIntegerField()
+    last_block = models.PositiveBigIntegerField()
+
+    class Meta:
+        unique_together = ('wallet', 'symbol')
+
+class SignerNonce(models.Model):
+    address = models.CharField(max_length=42, unique=True)
+    next_nonce = models.PositiveBigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+class NonceReservation(models.Model):
+    RESERVED = 'reserved'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(RESERVED, 'Reserved'), (SENT, 'Sent'), (FAILED, 'Failed')]
+
+    address = models.CharField(max_length=42)
+    nonce = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RESERVED)
+    tx_hash = models.CharField(max_length=66, blank=True)
+    # Queue row the nonce was reserved for, so a send interrupted by a crash can be traced
+    outbound = models.ForeignKey('OutboundTransaction', null=True, blank=True, on_delete=models.SET_NULL, related_name='nonce_reservations')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('address', 'nonce')
+        indexes = [models.Index(fields=['address', 'status', 'nonce'])]
+
+class OutboundTransaction(models.Model):
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    SENT = 'sent'
+    CONFIRMED = 'confirmed'
+    REVERTED = 'reverted'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (CONFIRMED, 'Confirmed'),
+        (REVERTED, 'Reverted'),
+        (FAILED, 'Failed'),
+    ]
+
+    action = models.CharField(max_length=50)
+    args = models.JSONField(default=list)
+    wallet = models.CharField(max_length=42, blank=True, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    tx_hash = models.CharField(max_length=66, blank=True)
+    # Last nonce reserved for this row, kept even if the reservation is later reclaimed or deleted
+    signer = models.CharField(max_length=42, blank=True)
+    nonce = models.PositiveBigIntegerField(null=True, blank=True)
+    block_number = models.PositiveBigIntegerField(null=True, blank=True)
+    gas_used = models.PositiveBigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'id'])]
+
+class TransactionReceipt(models.Model):
+    PENDING = 'pending'
+    SUCCESS = 'success'
+    REVERTED = 'reverted'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (SUCCESS, 'Success'), (REVERTED, 'Reverted')]
+
+    tx_hash = models.CharField(max_length=66, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    block_number = models.PositiveBigIntegerField(null=True, blank=True)
+    gas_used = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+class Registration(models.Model):
+    PENDING = 'pending'
+    REGISTERED = 'registered'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (REGISTERED, 'Registered')]
+
+    wallet = models.CharField(max_length=42, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    # adminRegister transaction queued for a pending registration
+    transaction = models.ForeignKey(OutboundTransaction, null=True, blank=True, on_delete=models.SET_NULL)
+    block_number = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
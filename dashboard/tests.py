@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from unittest.mock import patch
 from django.contrib.auth import get_user_model
@@ -7,8 +7,12 @@ from dashboard.utils.utils import (
 )
 from web3 import Web3
 
+# Tests never touch the shared cache file that running workers use
+ISOLATED_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'dashboard-tests'}}
+
 User = get_user_model()
 
+@override_settings(CACHES=ISOLATED_CACHES)
 class DashboardTests(TestCase):
 
     def test_get_live_price(self):
@@ -77,3 +81,1128 @@ class DashboardTests(TestCase):
         print(f"[DEBUG] test_dashboard_view: response.status_code = {response.status_code}")
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "dashboard.html")
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class EventIndexTests(TestCase):
+    wallet = Web3.to_checksum_address("0x16d3ACbD38aa841DB2Da166041e99C9d3cb98750")
+
+    def make_log(self, event, block, log_index, **args):
+        from hexbytes import HexBytes
+        return {
+            'event': event,
+            'args': {'user': self.wallet, **args},
+            'blockNumber': block,
+            'logIndex': log_index,
+            'transactionHash': HexBytes(bytes([log_index + 1]) * 32),
+        }
+
+    @patch("dashboard.utils.block_times.batch_request")
+    def test_store_events_and_avg_buy_price(self, mock_batch_request):
+        from dashboard.models import AccountEvent, TradeEvent
+        from dashboard.utils.indexer import store_events
+        from dashboard.utils.utils import get_avg_buy_price
+        mock_batch_request.side_effect = lambda calls: [{'timestamp': hex(1700000000)} for _ in calls]
+        logs = [
+            self.make_log('CoinBought', 10, 0, symbol='eth', quantity=2, totalCost=400000),
+            self.make_log('CoinBought', 11, 1, symbol='ETH', quantity=1, totalCost=500000),
+            self.make_log('CoinSold', 12, 2, symbol='ETH', quantity=1),
+            self.make_log('FundsApproved', 12, 3, amount=1000),
+        ]
+        self.assertEqual(store_events(logs), 4)
+        # Re-ingesting the same logs must not duplicate rows
+        store_events(logs)
+        self.assertEqual(TradeEvent.objects.count(), 3)
+        self.assertEqual(AccountEvent.objects.get().event, 'FundsApproved')
+        self.assertAlmostEqual(get_avg_buy_price(self.wallet, 'eth'), 3000.0)
+        self.assertEqual(get_avg_buy_price(self.wallet, 'BTC'), 0.0)
+
+    @patch("dashboard.utils.block_times.batch_request")
+    def test_cost_basis_is_incremental(self, mock_batch_request):
+        from decimal import Decimal
+        from dashboard.models import CostBasis
+        from io import StringIO
+        from django.core.management import call_command
+        from dashboard.utils.indexer import store_events
+        from dashboard.utils.utils import get_avg_buy_price
+        mock_batch_request.side_effect = lambda calls: [{'timestamp': hex(1700000000)} for _ in calls]
+        store_events([self.make_log('CoinBought', 20, 0, symbol='BTC', quantity=3, totalCost=100)])
+        store_events([self.make_log('CoinBought', 25, 1, symbol='BTC', quantity=4, totalCost=250)])
+        basis = CostBasis.objects.get(wallet=self.wallet, symbol='BTC')
+        self.assertEqual((basis.total_quantity, basis.total_spent), (7, 350))
+        self.assertEqual((basis.first_block, basis.last_block), (20, 25))
+        self.assertEqual(get_avg_buy_price(self.wallet, 'btc'), float(Decimal('3.5') / Decimal('7')))
+        CostBasis.objects.update(total_spent=0)
+        call_command('rebuild_cost_basis', stdout=StringIO())
+        self.assertEqual(CostBasis.objects.get(wallet=self.wallet, symbol='BTC').total_spent, 350)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class BlockTimestampTests(TestCase):
+
+    @patch("dashboard.utils.block_times.batch_request")
+    def test_timestamps_fetched_once_in_one_batch(self, mock_batch_request):
+        from dashboard.models import BlockTimestamp
+        from dashboard.utils import block_times
+        block_times._timestamps.clear()
+        BlockTimestamp.objects.create(block_number=100, timestamp=1000)
+        mock_batch_request.side_effect = lambda calls: [
+            {'timestamp': hex(int(params[0], 16) * 10)} for _, params in calls
+        ]
+        result = block_times.get_block_timestamps([100, 101, 102, 101])
+        self.assertEqual(result, {100: 1000, 101: 1010, 102: 1020})
+        mock_batch_request.assert_called_once()
+        self.assertEqual(len(mock_batch_request.call_args[0][0]), 2)
+        # Served from memory afterwards
+        self.assertEqual(block_times.get_block_timestamp(102), 1020)
+        mock_batch_request.assert_called_once()
+        self.assertEqual(BlockTimestamp.objects.count(), 3)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class LogScannerTests(TestCase):
+
+    def test_scan_splits_large_ranges_and_retries_failures(self):
+        from dashboard.utils.log_scanner import LogScanner
+        failed_once = set()
+
+        def fetch(start, end):
+            if end - start + 1 > 64:
+                raise ValueError({'code': -32602, 'message': 'query exceeds max block range 64'})
+            if start not in failed_once:
+                failed_once.add(start)
+                raise ConnectionError("connection reset")
+            return [{'blockNumber': block, 'logIndex': 0} for block in range(start, end + 1) if block % 3 == 0]
+
+        scanner = LogScanner(fetch, chunk_size=500, max_workers=3, retry_delay=0)
+        logs = scanner.scan(0, 999)
+        self.assertEqual([log['blockNumber'] for log in logs], list(range(0, 1000, 3)))
+        self.assertLessEqual(scanner.chunk_size, 64)
+
+    def test_rate_limits_are_retried_not_split(self):
+        from dashboard.utils.log_scanner import LogScanner, is_range_error
+
+        self.assertFalse(is_range_error(ValueError({'code': 429, 'message': 'rate limit exceeded'})))
+        self.assertTrue(is_range_error(ValueError({'code': -32005, 'message': 'query returned more than 10000 results'})))
+        throttled = []
+
+        def fetch(start, end):
+            if not throttled:
+                throttled.append(start)
+                raise ValueError({'code': 429, 'message': 'rate limit exceeded'})
+            return [{'blockNumber': start, 'logIndex': 0}]
+
+        scanner = LogScanner(fetch, chunk_size=100, max_workers=1, retry_delay=0)
+        self.assertEqual(len(scanner.scan(0, 99)), 1)
+        self.assertEqual(scanner.ceiling, scanner.max_chunk)
+
+    def test_ceiling_recovers_after_transient_range_errors(self):
+        from dashboard.utils.log_scanner import LogScanner
+        timeouts = []
+
+        def fetch(start, end):
+            if len(timeouts) < 3:
+                timeouts.append(start)
+                raise ValueError("query timeout exceeded")
+            return []
+
+        scanner = LogScanner(fetch, chunk_size=8000, max_workers=1, retry_delay=0, recover_after=5)
+        scanner.scan(0, 7999)
+        self.assertLess(scanner.ceiling, scanner.max_chunk)
+        # Quiet ranges afterwards let the chunk size climb back to the maximum
+        scanner.scan(8000, 500000)
+        self.assertEqual(scanner.ceiling, scanner.max_chunk)
+        self.assertEqual(scanner.chunk_size, scanner.max_chunk)
+
+    def test_scan_raises_when_range_keeps_failing(self):
+        from dashboard.utils.log_scanner import LogScanError, LogScanner
+
+        def fetch(start, end):
+            raise ConnectionError("node down")
+
+        scanner = LogScanner(fetch, max_retries=2, retry_delay=0)
+        with self.assertRaises(LogScanError):
+            scanner.scan(0, 10)
+
+
+def make_raw_log(event_name, wallet, block, log_index, symbol='ETH', quantity=1, total_cost=0, amount=0):
+    """Build a raw eth_getLogs entry for a CryptoPlatform event."""
+    from dashboard.utils.events import build_raw_log
+    args = {'user': wallet, 'symbol': symbol, 'quantity': quantity, 'totalCost': total_cost, 'amount': amount}
+    return build_raw_log(event_name, args, block, log_index)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class EventDecodingTests(TestCase):
+    wallet = Web3.to_checksum_address("0x16d3ACbD38aa841DB2Da166041e99C9d3cb98750")
+    other = Web3.to_checksum_address("0x000000000000000000000000000000000000dEaD")
+
+    def test_decode_mixed_logs_routes_by_topic(self):
+        from dashboard.utils.events import decode_logs
+        raw_logs = [
+            make_raw_log('CoinBought', self.wallet, 1, 0, symbol='BTC', quantity=2, total_cost=500),
+            make_raw_log('CoinSold', self.other, 1, 1, symbol='ETH', quantity=3),
+            make_raw_log('RequestFunds', self.wallet, 2, 0, amount=70),
+        ]
+        decoded = decode_logs(raw_logs)
+        self.assertEqual([log['event'] for log in decoded], ['CoinBought', 'CoinSold', 'RequestFunds'])
+        self.assertEqual(decoded[0]['args']['totalCost'], 500)
+        self.assertEqual(decoded[1]['args']['user'], self.other)
+        self.assertEqual(decoded[2]['args']['amount'], 70)
+
+    def test_decode_filters_user_before_decoding_and_matches_web3(self):
+        from dashboard.utils.events import decode_logs
+        from dashboard.web3 import contract
+        raw_logs = [
+            make_raw_log('CoinSold', self.other, 1, 0),
+            make_raw_log('CoinSold', self.wallet, 1, 1, symbol='SOL', quantity=4),
+            make_raw_log('CoinBought', self.other, 2, 0),
+            make_raw_log('CoinBought', self.wallet, 2, 1, quantity=5, total_cost=900),
+        ]
+        decoded = decode_logs(raw_logs, user=self.wallet.lower())
+        self.assertEqual([log['logIndex'] for log in decoded], [1, 1])
+        for log, raw in zip(decoded, [raw_logs[1], raw_logs[3]]):
+            expected = getattr(contract.events, log['event'])().process_log(raw)
+            self.assertEqual(dict(expected['args']), log['args'])
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class BatchViewCallTests(TestCase):
+    wallet = Web3.to_checksum_address("0x16d3ACbD38aa841DB2Da166041e99C9d3cb98750")
+
+    @patch("dashboard.utils.utils._multicall_available", return_value=False)
+    @patch("dashboard.utils.utils.batch_request")
+    def test_json_rpc_batch_is_pinned_and_decoded_in_order(self, mock_batch_request, _):
+        from eth_abi import encode
+        from dashboard.utils.utils import batch_view_calls
+        mock_batch_request.return_value = [
+            Web3.to_hex(encode(['uint256'], [1234])),
+            Web3.to_hex(encode(['string[]', 'uint256[]'], [['BTC', 'ETH'], [1, 2]])),
+            Web3.to_hex(encode(['(string,string,uint256,uint256)[]'], [[('Approved', 'USD', 500, 99)]])),
+        ]
+        balance, holdings, history = batch_view_calls([
+            ('getUSDBalance', [self.wallet]),
+            ('getUserHoldings', [self.wallet]),
+            ('getTransactionHistory', [], self.wallet),
+        ], block_identifier=123)
+        self.assertEqual(balance, 1234)
+        self.assertEqual([list(part) for part in holdings], [['BTC', 'ETH'], [1, 2]])
+        self.assertEqual(history, (('Approved', 'USD', 500, 99),))
+        rpc_calls = mock_batch_request.call_args[0][0]
+        self.assertEqual(len(rpc_calls), 3)
+        self.assertTrue(all(params[1] == '0x7b' for _, params in rpc_calls))
+        self.assertEqual(rpc_calls[2][1][0]['from'], self.wallet)
+
+    @patch("dashboard.utils.utils._multicall_available", return_value=True)
+    @patch("dashboard.utils.utils.web3.eth.call")
+    def test_multicall_aggregate(self, mock_call, _):
+        from eth_abi import encode
+        from dashboard.utils.utils import batch_view_calls
+        mock_call.return_value = encode(['(bool,bytes)[]'], [[
+            (True, encode(['uint256'], [7])),
+            (False, b''),
+        ]])
+        results = batch_view_calls([
+            ('getBorrowedAmount', [self.wallet]),
+            ('getCoinBalance', [self.wallet, 'BTC']),
+        ], block_identifier=5, raise_errors=False)
+        self.assertEqual(results, [7, None])
+        mock_call.assert_called_once()
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class LivePriceTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    @patch("dashboard.utils.upstream.get")
+    def test_prices_batched_and_cached(self, mock_get):
+        import json
+        from unittest.mock import MagicMock
+        from dashboard.models import Coin
+        from dashboard.utils.utils import get_live_price, get_live_prices
+
+        Coin.objects.create(coingecko_id='ethena', symbol='ENA', name='Ethena')
+        ticker = [
+            {'symbol': 'BTCUSDT', 'price': '65000.5'},
+            {'symbol': 'ETHUSDT', 'price': '3000'},
+            {'symbol': 'ARBUSDT', 'price': '0.8'},
+            {'symbol': 'SOLUSDT', 'price': '150'},
+        ]
+        listed = {item['symbol'] for item in ticker}
+
+        def fake_get(url, params=None, **kwargs):
+            resp = MagicMock(status_code=200)
+            if 'binance' in url and params is None:
+                resp.json.return_value = ticker
+            elif 'binance' in url:
+                requested = json.loads(params['symbols'])
+                if not listed.issuperset(requested):
+                    # Binance rejects the whole batch when any pair is unknown
+                    resp.status_code = 400
+                    resp.json.return_value = {'code': -1121, 'msg': 'Invalid symbol.'}
+                else:
+                    resp.json.return_value = [item for item in ticker if item['symbol'] in requested]
+            else:
+                resp.json.return_value = {'tether': {'usd': 1.0}, 'ethena': {'usd': 0.5}}
+            return resp
+
+        mock_get.side_effect = fake_get
+        prices = get_live_prices(['btc', 'ETH', 'ARB', 'USDT', 'ENA', 'NOPE'])
+        self.assertEqual(prices, {'BTC': 65000.5, 'ETH': 3000.0, 'ARB': 0.8, 'USDT': 1.0, 'ENA': 0.5, 'NOPE': 0.0})
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(set(mock_get.call_args_list[2].kwargs['params']['ids'].split(',')), {'tether', 'ethena', 'nope'})
+        # Served from the shared cache afterwards
+        self.assertEqual(get_live_price('eth'), 3000.0)
+        get_live_prices(['BTC', 'NOPE'])
+        self.assertEqual(mock_get.call_count, 3)
+        # Later batches leave out pairs Binance does not list, so they are not rejected
+        self.assertEqual(get_live_prices(['SOL'])['SOL'], 150.0)
+        self.assertEqual(json.loads(mock_get.call_args.kwargs['params']['symbols']), ['SOLUSDT'])
+
+
+    @patch("dashboard.utils.upstream.get")
+    def test_follower_fetches_what_the_leader_left_uncached(self, mock_get):
+        import json
+        from unittest.mock import MagicMock
+        from django.core.cache import cache
+        from dashboard.utils.utils import get_live_prices
+
+        def other_worker_times_out(key, fetch, recheck=None, **kwargs):
+            # The leader elsewhere priced BTC, but CoinGecko failed for ENA so nothing was cached for it
+            cache.set('live_price:BTC', 65000.0, 15)
+            return None
+
+        def fake_get(url, params=None, **kwargs):
+            resp = MagicMock(status_code=200)
+            if 'binance' in url:
+                self.assertEqual(json.loads(params['symbols']), ['ENAUSDT'])
+                resp.json.return_value = [{'symbol': 'ENAUSDT', 'price': '0.5'}]
+            return resp
+
+        mock_get.side_effect = fake_get
+        with patch("dashboard.utils.single_flight.run", side_effect=other_worker_times_out):
+            self.assertEqual(get_live_prices(['BTC', 'ENA']), {'BTC': 65000.0, 'ENA': 0.5})
+        self.assertEqual(mock_get.call_count, 1)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class UpstreamClientTests(TestCase):
+
+    @patch("dashboard.utils.upstream.time.sleep")
+    def test_get_reuses_host_session_and_retries(self, mock_sleep):
+        import requests
+        from unittest.mock import MagicMock
+        from dashboard.utils import upstream
+        session = upstream.get_session("https://api.example.test/a")
+        self.assertIs(session, upstream.get_session("https://api.example.test/b"))
+        ok, throttled = MagicMock(status_code=200), MagicMock(status_code=429, headers={'Retry-After': '1'})
+        with patch.object(session, 'get', side_effect=[requests.ConnectionError(), throttled, ok]) as mock_get:
+            self.assertIs(upstream.get("https://api.example.test/a", params={'x': 1}), ok)
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(mock_get.call_args.kwargs['timeout'], upstream.DEFAULT_TIMEOUT)
+        self.assertEqual(mock_sleep.call_args_list[-1].args[0], 1.0)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class NonceManagerTests(TestCase):
+    signer = "0x16d3ACbD38aa841DB2Da166041e99C9d3cb98750"
+
+    @patch("dashboard.utils.nonces.web3.eth.get_transaction_count", return_value=7)
+    def test_reserve_reuses_released_nonces(self, mock_count):
+        from dashboard.utils.nonces import release_nonce, reserve_nonce
+
+        self.assertEqual([reserve_nonce(self.signer) for _ in range(3)], [7, 8, 9])
+        release_nonce(self.signer, 8)
+        self.assertEqual(reserve_nonce(self.signer), 8)
+        self.assertEqual(reserve_nonce(self.signer), 10)
+        mock_count.assert_called_once()
+
+    @patch("dashboard.utils.nonces.web3.eth.get_transaction_count", return_value=7)
+    def test_reserve_reclaims_abandoned_reservations(self, mock_count):
+        from datetime import timedelta
+        from django.utils import timezone
+        from dashboard.models import NonceReservation
+        from dashboard.utils.nonces import STALE_AFTER, mark_sent, reserve_nonce
+
+        self.assertEqual([reserve_nonce(self.signer) for _ in range(3)], [7, 8, 9])
+        mark_sent(self.signer, 7, "0x01")
+        mark_sent(self.signer, 9, "0x02")
+        # The sender of nonce 8 died before sending or releasing it
+        NonceReservation.objects.filter(nonce=8).update(updated_at=timezone.now() - STALE_AFTER - timedelta(seconds=1))
+        self.assertEqual(reserve_nonce(self.signer), 8)
+        self.assertEqual(reserve_nonce(self.signer), 10)
+
+    def test_resync_keeps_in_flight_nonces(self):
+        from dashboard.models import NonceReservation
+        from dashboard.utils.nonces import mark_sent, release_nonce, reserve_nonce, resync_nonce
+
+        with patch("dashboard.utils.nonces.web3.eth.get_transaction_count", return_value=3):
+            for _ in range(4):
+                reserve_nonce(self.signer)
+            mark_sent(self.signer, 3, "0x01")
+            mark_sent(self.signer, 5, "0x02")
+            release_nonce(self.signer, 6)
+        with patch("dashboard.utils.nonces.web3.eth.get_transaction_count", return_value=4):
+            self.assertEqual(resync_nonce(self.signer), 6)
+        self.assertEqual(
+            sorted(NonceReservation.objects.values_list('nonce', flat=True)), [4, 5]
+        )
+        self.assertEqual(reserve_nonce(self.signer), 6)
+
+    @patch("dashboard.utils.utils.web3.eth.send_raw_transaction")
+    @patch("dashboard.utils.nonces.web3.eth.get_transaction_count")
+    def test_send_resyncs_on_used_nonce(self, mock_count, mock_send):
+        from dashboard.models import NonceReservation
+        from dashboard.utils.utils import WALLET_ADDRESS, contract, send_admin_transaction
+
+        mock_count.side_effect = [0, 5]
+        mock_send.side_effect = [ValueError({'message': 'nonce too low'}), bytes.fromhex("ab" * 32)]
+        tx_hash = send_admin_transaction(contract.functions.register(), gas=100000)
+        self.assertEqual(tx_hash, "0x" + "ab" * 32)
+        self.assertEqual(mock_send.call_count, 2)
+        sent = NonceReservation.objects.get(address=WALLET_ADDRESS, status=NonceReservation.SENT)
+        self.assertEqual(sent.nonce, 5)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class TransactionQueueTests(TestCase):
+    wallet = Web3.to_checksum_address("0x16d3ACbD38aa841DB2Da166041e99C9d3cb98750")
+    signer = "0x16d3ACbD38aa841DB2Da166041e99C9d3cb98750"
+
+    def test_send_and_track_queued_transactions(self):
+        from dashboard.models import OutboundTransaction
+        from dashboard.utils import tx_queue
+        from dashboard.utils.receipts import track_transaction
+
+        ok = tx_queue.enqueue('sell_coin', self.wallet, 'ETH', 200000, 1, wallet=self.wallet)
+        bad = tx_queue.enqueue('repay_virtual_funds', self.wallet, 5, wallet=self.wallet)
+
+        def failing_send(*args):
+            raise ValueError("insufficient funds")
+
+        with patch.dict(tx_queue.ACTIONS, {'sell_coin': lambda *args: "0x" + "ab" * 32, 'repay_virtual_funds': failing_send}):
+            self.assertEqual(tx_queue.send_queued(), 1)
+        self.assertEqual(tx_queue.get_status(bad.id)['status'], OutboundTransaction.FAILED)
+
+        track_transaction("0x" + "ab" * 32)
+        receipt = {'status': '0x1', 'blockNumber': hex(123), 'gasUsed': hex(51000)}
+        with patch("dashboard.utils.receipts.batch_request", return_value=[receipt]):
+            self.assertEqual(tx_queue.sync_receipts(), 1)
+        status = tx_queue.get_status(ok.id, wallet=self.wallet)
+        self.assertEqual(status['status'], OutboundTransaction.CONFIRMED)
+        self.assertEqual(status['block_number'], 123)
+        self.assertIsNone(tx_queue.get_status(ok.id, wallet="0x0000000000000000000000000000000000000001"))
+
+    @patch("dashboard.utils.nonces.web3.eth.get_transaction_count", return_value=9)
+    def test_stuck_sending_rows_are_settled(self, mock_count):
+        from datetime import timedelta
+        from django.utils import timezone
+        from dashboard.models import NonceReservation, OutboundTransaction, TransactionReceipt
+        from dashboard.utils import tx_queue
+        from dashboard.utils.nonces import mark_sent, reserve_nonce
+
+        rows = [tx_queue.enqueue('repay_virtual_funds', self.wallet, 5, wallet=self.wallet) for _ in range(4)]
+        sent, never_reserved, unsent, maybe_sent = rows
+
+        def crash_after(step):
+            def action(*args):
+                nonce = reserve_nonce(self.signer)
+                if step == 'sent':
+                    mark_sent(self.signer, nonce, "0x" + "cd" * 32)
+                raise KeyboardInterrupt  # the worker dies here
+            return action
+
+        for tx, step in [(sent, 'sent'), (unsent, 'reserved'), (maybe_sent, 'reserved')]:
+            OutboundTransaction.objects.filter(id=tx.id).update(status=OutboundTransaction.SENDING)
+            tx.refresh_from_db()
+            with self.assertRaises(KeyboardInterrupt), tx_queue.reserving_for(tx):
+                crash_after(step)()
+        OutboundTransaction.objects.filter(id=never_reserved.id).update(status=OutboundTransaction.SENDING)
+        self.assertEqual(
+            list(NonceReservation.objects.order_by('nonce').values_list('outbound_id', flat=True)),
+            [sent.id, unsent.id, maybe_sent.id],
+        )
+
+        # Nothing is touched while the sends could still be in progress
+        self.assertEqual(tx_queue.recover_stuck(), 0)
+        OutboundTransaction.objects.update(updated_at=timezone.now() - tx_queue.STUCK_AFTER - timedelta(seconds=1))
+        # The node already has nonce 11 (maybe_sent's), but not nonce 10 (unsent's)
+        with patch("dashboard.utils.tx_queue.nonce_used", side_effect=lambda address, nonce: nonce == 11):
+            self.assertEqual(tx_queue.recover_stuck(), 4)
+
+        statuses = dict(OutboundTransaction.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {
+            sent.id: OutboundTransaction.SENT,
+            never_reserved.id: OutboundTransaction.QUEUED,
+            unsent.id: OutboundTransaction.QUEUED,
+            maybe_sent.id: OutboundTransaction.FAILED,
+        })
+        self.assertTrue(TransactionReceipt.objects.filter(tx_hash="0x" + "cd" * 32).exists())
+        self.assertEqual(NonceReservation.objects.get(nonce=10).status, NonceReservation.FAILED)
+
+    @patch("dashboard.utils.nonces.web3.eth.get_transaction_count", return_value=9)
+    def test_stuck_row_whose_reservation_was_reclaimed_is_not_resent(self, mock_count):
+        from datetime import timedelta
+        from django.utils import timezone
+        from dashboard.models import NonceReservation, OutboundTransaction
+        from dashboard.utils import tx_queue
+        from dashboard.utils.nonces import STALE_AFTER, mark_sent, reserve_nonce
+
+        self.assertLess(tx_queue.STUCK_AFTER, STALE_AFTER)
+        crashed, dropped, other = [tx_queue.enqueue('repay_virtual_funds', self.wallet, 5, wallet=self.wallet) for _ in range(3)]
+        for tx in (crashed, dropped):
+            OutboundTransaction.objects.filter(id=tx.id).update(status=OutboundTransaction.SENDING)
+            with tx_queue.reserving_for(tx):
+                reserve_nonce(self.signer)  # the worker dies before mark_sent
+        long_ago = timezone.now() - STALE_AFTER - timedelta(seconds=1)
+        NonceReservation.objects.update(updated_at=long_ago)
+        OutboundTransaction.objects.filter(status=OutboundTransaction.SENDING).update(updated_at=long_ago)
+
+        # Nonce 9 is reclaimed and sent for another row; nonce 10's reservation is dropped by a resync
+        with tx_queue.reserving_for(other):
+            self.assertEqual(reserve_nonce(self.signer), 9)
+        mark_sent(self.signer, 9, "0x" + "ee" * 32)
+        NonceReservation.objects.filter(nonce=10).delete()
+
+        with patch("dashboard.utils.tx_queue.nonce_used", side_effect=lambda address, nonce: nonce == 9) as mock_used:
+            self.assertEqual(tx_queue.recover_stuck(), 2)
+        self.assertEqual(sorted(call.args[1] for call in mock_used.call_args_list), [9, 10])
+        crashed.refresh_from_db()
+        dropped.refresh_from_db()
+        # Nonce 9 is on chain, possibly from the crashed send: never requeued
+        self.assertEqual(crashed.status, OutboundTransaction.FAILED)
+        self.assertEqual((dropped.status, dropped.nonce), (OutboundTransaction.QUEUED, None))
+
+    def test_sell_view_enqueues(self):
+        from dashboard.models import OutboundTransaction
+
+        user = User.objects.create_user(wallet_address=self.wallet)
+        self.client.force_login(user)
+        with patch("dashboard.utils.utils.get_coin_balance", return_value=5):
+            response = self.client.post(reverse("sell_coin"), {"symbol": "ETH", "price": "2000", "quantity": "1"})
+        self.assertEqual(response.status_code, 302)
+        tx = OutboundTransaction.objects.get()
+        self.assertEqual((tx.action, tx.status, tx.wallet), ('sell_coin', OutboundTransaction.QUEUED, self.wallet))
+        response = self.client.get(reverse("transaction_status", args=[tx.id]))
+        self.assertEqual(response.json()['status'], OutboundTransaction.QUEUED)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class ReceiptPollerTests(TestCase):
+
+    @patch("dashboard.utils.receipts.batch_request")
+    def test_poll_pending_receipts_in_one_batch(self, mock_batch_request):
+        from dashboard.models import TransactionReceipt
+        from dashboard.utils.receipts import get_receipt, get_receipts, poll_receipts, track_transaction
+        from dashboard.utils.rpc import RPCError
+
+        hashes = ["0x" + str(i) * 64 for i in range(4)]
+        for tx_hash in hashes:
+            track_transaction(tx_hash)
+        mock_batch_request.return_value = [
+            {'status': '0x1', 'blockNumber': hex(10), 'gasUsed': hex(21000)},
+            {'status': '0x0', 'blockNumber': hex(11), 'gasUsed': hex(30000)},
+            None,
+            RPCError('eth_getTransactionReceipt', 'rate limited'),
+        ]
+        self.assertEqual(poll_receipts(), 2)
+        mock_batch_request.assert_called_once()
+        self.assertEqual(len(mock_batch_request.call_args.args[0]), 4)
+
+        receipts = get_receipts(hashes)
+        self.assertEqual(receipts[hashes[0]].status, TransactionReceipt.SUCCESS)
+        self.assertEqual(receipts[hashes[1]].status, TransactionReceipt.REVERTED)
+        self.assertEqual(receipts[hashes[1]].gas_used, 30000)
+        self.assertEqual(get_receipt(hashes[2]).status, TransactionReceipt.PENDING)
+
+        # Only the two still pending are asked for on the next poll
+        mock_batch_request.return_value = [None, None]
+        poll_receipts()
+        self.assertEqual(len(mock_batch_request.call_args.args[0]), 2)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class Web3ClientTests(TestCase):
+
+    def test_client_is_built_on_first_use(self):
+        from dashboard.web3 import CONTRACT_ADDRESS, Web3Client, abi
+
+        client = Web3Client("http://127.0.0.1:1", CONTRACT_ADDRESS, abi, timeout=1)
+        self.assertIsNone(client._web3)
+        self.assertEqual(client.contract.address, Web3.to_checksum_address(CONTRACT_ADDRESS))
+        self.assertIs(client.contract.w3, client.web3)
+
+    def test_health_check_reports_unreachable_node(self):
+        from dashboard.web3 import CONTRACT_ADDRESS, Web3Client, abi
+
+        client = Web3Client("http://127.0.0.1:1", CONTRACT_ADDRESS, abi, timeout=1)
+        health = client.health_check()
+        self.assertFalse(health['ok'])
+        self.assertIsNotNone(health['error'])
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class ContractAdminCacheTests(TestCase):
+    admin = Web3.to_checksum_address("0x16d3ACbD38aa841DB2Da166041e99C9d3cb98750")
+    new_admin = Web3.to_checksum_address("0x00000000000000000000000000000000000000aa")
+
+    def setUp(self):
+        from dashboard.utils.contract_admin import invalidate_admin_address
+        invalidate_admin_address()
+
+    @patch("dashboard.utils.block_times.batch_request")
+    @patch("dashboard.utils.contract_admin.contract.functions.admin")
+    def test_admin_is_cached_and_follows_admin_updated(self, mock_admin, mock_batch_request):
+        from hexbytes import HexBytes
+        from dashboard.utils.contract_admin import is_admin
+        from dashboard.utils.indexer import store_events
+
+        mock_admin.return_value.call.return_value = self.admin.lower()
+        self.assertTrue(is_admin(self.admin))
+        self.assertTrue(is_admin(self.admin.lower()))
+        mock_admin.return_value.call.assert_called_once()
+
+        mock_batch_request.side_effect = lambda calls: [{'timestamp': hex(1700000000)} for _ in calls]
+        store_events([{
+            'event': 'AdminUpdated',
+            'args': {'oldAdmin': self.admin, 'newAdmin': self.new_admin},
+            'blockNumber': 200,
+            'logIndex': 0,
+            'transactionHash': HexBytes(b'\x05' * 32),
+        }])
+        self.assertFalse(is_admin(self.admin))
+        self.assertTrue(is_admin(self.new_admin))
+        mock_admin.return_value.call.assert_called_once()
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class RegistrationMirrorTests(TestCase):
+    wallet = Web3.to_checksum_address("0x16d3ACbD38aa841DB2Da166041e99C9d3cb98750")
+
+    @patch("dashboard.utils.registrations.contract.functions.registered")
+    def test_login_queues_one_admin_register(self, mock_registered):
+        from dashboard.models import OutboundTransaction, Registration
+
+        mock_registered.return_value.call.return_value = False
+        for _ in range(3):
+            response = self.client.post(reverse("wallet_login"), {"wallet_address": self.wallet})
+            self.assertEqual(response.status_code, 302)
+        self.assertEqual(OutboundTransaction.objects.filter(action='admin_register_user').count(), 1)
+        self.assertEqual(Registration.objects.get(wallet=self.wallet).status, Registration.PENDING)
+        mock_registered.return_value.call.assert_called_once()
+
+        # A failed attempt is queued again on the next login
+        OutboundTransaction.objects.update(status=OutboundTransaction.FAILED)
+        self.client.post(reverse("wallet_login"), {"wallet_address": self.wallet})
+        self.assertEqual(OutboundTransaction.objects.filter(action='admin_register_user').count(), 2)
+
+    @patch("dashboard.utils.block_times.batch_request")
+    @patch("dashboard.utils.registrations.contract.functions.registered")
+    def test_registered_event_marks_wallet(self, mock_registered, mock_batch_request):
+        from hexbytes import HexBytes
+        from dashboard.models import OutboundTransaction
+        from dashboard.utils.indexer import store_events
+        from dashboard.utils.registrations import ensure_registered, is_registered
+
+        mock_batch_request.side_effect = lambda calls: [{'timestamp': hex(1700000000)} for _ in calls]
+        self.assertFalse(is_registered(self.wallet))
+        store_events([{
+            'event': 'Registered',
+            'args': {'user': self.wallet},
+            'blockNumber': 300,
+            'logIndex': 0,
+            'transactionHash': HexBytes(b'\x07' * 32),
+        }])
+        self.assertTrue(is_registered(self.wallet))
+        ensure_registered(self.wallet)
+        mock_registered.assert_not_called()
+        self.assertFalse(OutboundTransaction.objects.exists())
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class BorrowRequestIndexTests(TestCase):
+    wallet = Web3.to_checksum_address("0x16d3ACbD38aa841DB2Da166041e99C9d3cb98750")
+    other = Web3.to_checksum_address("0x00000000000000000000000000000000000000bb")
+
+    def make_log(self, event, wallet, block, log_index, **args):
+        from hexbytes import HexBytes
+        return {
+            'event': event,
+            'args': {'user': wallet, **args},
+            'blockNumber': block,
+            'logIndex': log_index,
+            'transactionHash': HexBytes(bytes([block % 256, log_index]) * 16),
+        }
+
+    @patch("dashboard.utils.block_times.batch_request")
+    def test_events_drive_pending_requests(self, mock_batch_request):
+        from dashboard.models import BorrowRequest
+        from dashboard.utils.borrow_requests import cross_check_pending_requests, get_pending_borrow_requests
+        from dashboard.utils.indexer import store_events
+
+        mock_batch_request.side_effect = lambda calls: [{'timestamp': hex(1700000000)} for _ in calls]
+        store_events([
+            self.make_log('RequestFunds', self.wallet, 10, 0, amount=100),
+            self.make_log('RequestFunds', self.other, 10, 1, amount=50),
+            self.make_log('RequestFunds', self.wallet, 11, 0, amount=300),
+            self.make_log('FundsRejected', self.other, 12, 0),
+        ])
+        pending = list(get_pending_borrow_requests())
+        self.assertEqual([(r.wallet, r.amount) for r in pending], [(self.wallet, 300)])
+        self.assertEqual(
+            sorted(BorrowRequest.objects.values_list('status', flat=True)),
+            [BorrowRequest.PENDING, BorrowRequest.REJECTED, BorrowRequest.REPLACED],
+        )
+
+        with patch("dashboard.utils.utils.contract.functions.getAllPendingRequests") as mock_pending:
+            mock_pending.return_value.call.return_value = [[self.wallet.lower(), self.other], [300, 20]]
+            diff = cross_check_pending_requests()
+        self.assertEqual(diff, {'missing_locally': [self.other], 'missing_on_chain': [], 'amount_mismatch': []})
+
+        store_events([self.make_log('FundsApproved', self.wallet, 13, 0, amount=300)])
+        self.assertFalse(get_pending_borrow_requests().exists())
+
+    def test_admin_panel_pages_local_rows(self):
+        from django.core.cache import cache
+        from dashboard.models import BorrowRequest
+        from dashboard.utils.contract_admin import ADMIN_CACHE_KEY
+
+        BorrowRequest.objects.bulk_create([
+            BorrowRequest(wallet=f"0x{i:040x}", amount=i, block_number=i) for i in range(1, 61)
+        ])
+        cache.set(ADMIN_CACHE_KEY, self.wallet)
+        self.client.force_login(User.objects.create_user(wallet_address=self.wallet))
+        response = self.client.get(reverse("admin_panel"), {"page": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["pending_requests"]), 10)
+        self.assertContains(response, "Page 2 of 2")
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class RegistryTests(TestCase):
+    wallets = [Web3.to_checksum_address(f"0x{i:040x}") for i in range(1, 4)]
+
+    @patch("dashboard.utils.utils.batch_view_calls")
+    @patch("dashboard.utils.utils.contract.functions.getRegisteredUsers")
+    def test_reconcile_and_verify(self, mock_registered_users, mock_batch_view_calls):
+        from dashboard.models import Registration
+        from dashboard.utils.utils import get_all_registered_users, reconcile_registered_users
+
+        Registration.objects.create(wallet=self.wallets[0], status=Registration.REGISTERED)
+        Registration.objects.create(wallet=self.wallets[1], status=Registration.PENDING)
+        mock_registered_users.return_value.call.return_value = [wallet.lower() for wallet in self.wallets]
+        self.assertEqual(reconcile_registered_users(), 2)
+        self.assertEqual(get_all_registered_users(), self.wallets)
+        mock_batch_view_calls.assert_not_called()
+
+        mock_batch_view_calls.return_value = [True, False, None]
+        self.assertEqual(get_all_registered_users(verify=True), self.wallets[:1])
+        self.assertEqual(len(mock_batch_view_calls.call_args.args[0]), 3)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class CoinCatalogTests(TestCase):
+
+    @patch("dashboard.utils.upstream.get")
+    def test_refresh_and_resolve(self, mock_get):
+        from unittest.mock import Mock
+        from dashboard.models import Coin
+        from dashboard.utils.coin_catalog import refresh_coin_catalog, resolve_coins
+
+        Coin.objects.create(coingecko_id='old-top', symbol='OLD', name='Old', market_cap_rank=3)
+        coins_list = [
+            {'id': 'bitcoin', 'symbol': 'btc', 'name': 'Bitcoin'},
+            {'id': 'batcat', 'symbol': 'btc', 'name': 'Batcat'},
+            {'id': 'tiny', 'symbol': 'tny', 'name': 'Tiny'},
+        ]
+        markets = [{'id': 'bitcoin', 'symbol': 'btc', 'name': 'Bitcoin', 'image': 'https://img/btc.png',
+                    'market_cap_rank': 1, 'current_price': 60000.0}]
+        mock_get.side_effect = lambda url, **kwargs: Mock(
+            status_code=200, json=Mock(return_value=coins_list if url.endswith('/coins/list') else markets),
+        )
+        self.assertEqual(refresh_coin_catalog(), (3, 1))
+        self.assertIsNone(Coin.objects.get(coingecko_id='old-top').market_cap_rank)
+
+        with self.assertNumQueries(1):
+            resolved = resolve_coins(['btc', 'TNY', 'ETH', 'NOPE'])
+        self.assertEqual(resolved['BTC']['id'], 'bitcoin')
+        self.assertEqual(resolved['BTC']['image'], 'https://img/btc.png')
+        self.assertEqual(resolved['TNY'], {'id': 'tiny', 'name': 'Tiny', 'image': None, 'market_cap_rank': None})
+        self.assertEqual(resolved['ETH']['id'], 'ethereum')
+        self.assertNotIn('NOPE', resolved)
+
+        # A later list refresh keeps the stored image and rank
+        markets.clear()
+        refresh_coin_catalog()
+        self.assertEqual(Coin.objects.get(coingecko_id='bitcoin').image, 'https://img/btc.png')
+
+    @patch("dashboard.utils.coin_catalog.time.sleep")
+    @patch("dashboard.utils.upstream.get")
+    def test_image_backfill(self, mock_get, mock_sleep):
+        from unittest.mock import Mock
+        from dashboard.models import Coin
+        from dashboard.utils.coin_catalog import backfill_coin_images, request_coin_images
+
+        Coin.objects.create(coingecko_id='tiny', symbol='TNY', name='Tiny')
+        Coin.objects.create(coingecko_id='ghost', symbol='GST', name='Ghost')
+        request_coin_images(['tiny', 'ghost', 'unknown'])
+        self.assertEqual(Coin.objects.filter(needs_image=True).count(), 2)
+
+        mock_get.return_value = Mock(status_code=200, json=Mock(return_value=[{'id': 'tiny', 'image': 'https://img/tny.png'}]))
+        self.assertEqual(backfill_coin_images(), 1)
+        mock_get.assert_called_once()
+        self.assertEqual(mock_get.call_args.kwargs['params']['ids'], 'tiny,ghost')
+        self.assertEqual(Coin.objects.get(coingecko_id='tiny').image, 'https://img/tny.png')
+
+        # Coins without an image upstream are not queued again straight away
+        request_coin_images(['ghost'])
+        self.assertFalse(Coin.objects.filter(needs_image=True).exists())
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class FanOutTests(TestCase):
+
+    def test_slow_optional_source_does_not_hold_the_page(self):
+        import time
+        from dashboard.utils.fanout import Source, fan_out
+
+        def slow(until):
+            time.sleep(2)
+            return 'late'
+
+        def broken(until):
+            raise ValueError("upstream down")
+
+        started = time.monotonic()
+        results = fan_out({
+            'ticker': Source(lambda until: time.sleep(0.1) or {'lastPrice': '1'}, deadline=0.5, required=True),
+            'trades': Source(slow, deadline=3.0, default=[]),
+            'depth': Source(broken, deadline=3.0, default={}),
+        })
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(results, {'ticker': {'lastPrice': '1'}, 'trades': [], 'depth': {}})
+
+    def test_optional_source_gets_its_own_deadline(self):
+        import time
+        from dashboard.utils.fanout import Source, call_timeout, fan_out
+
+        timeouts = []
+
+        def coin_info(until):
+            timeouts.append(call_timeout(until))
+            time.sleep(0.6)
+            return {'name': 'Bitcoin'}
+
+        results = fan_out({
+            'ticker': Source(lambda until: time.sleep(0.1) or {'lastPrice': '1'}, deadline=2.0, required=True),
+            'coin_info': Source(coin_info, deadline=1.0, default={}),
+        })
+        self.assertEqual(results['coin_info'], {'name': 'Bitcoin'})
+        # Its HTTP calls are bounded by the source deadline, not the default upstream timeout
+        self.assertLessEqual(timeouts[0][1], 1.0)
+
+    def test_sources_run_concurrently(self):
+        import time
+        from dashboard.utils.fanout import Source, fan_out
+
+        started = time.monotonic()
+        results = fan_out({
+            name: Source(lambda until, name=name: time.sleep(0.3) or name, deadline=2.0, required=True)
+            for name in ('a', 'b', 'c', 'd')
+        })
+        self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual(results, {'a': 'a', 'b': 'b', 'c': 'c', 'd': 'd'})
+
+    @patch("dashboard.utils.upstream.get")
+    def test_coin_detail_view_uses_catalog_id(self, mock_get):
+        from unittest.mock import Mock
+        from dashboard.models import Coin
+
+        Coin.objects.create(coingecko_id='bitcoin', symbol='BTC', name='Bitcoin', market_cap_rank=1)
+
+        def fake_get(url, params=None, **kwargs):
+            if 'ticker' in url:
+                body = {'lastPrice': '10', 'priceChangePercent': '1'}
+            elif 'markets' in url:
+                body = [{'name': 'Bitcoin', 'market_cap': 2e12, 'image': 'https://img/btc.png'}]
+            elif 'depth' in url:
+                body = {'bids': [], 'asks': []}
+            else:
+                body = []
+            return Mock(status_code=200, json=Mock(return_value=body))
+
+        mock_get.side_effect = fake_get
+        response = self.client.get(reverse("coin_detail", args=["btc"]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['market_cap_display'], "$2000.0B")
+        self.assertFalse(any('search' in call.args[0] for call in mock_get.call_args_list))
+
+
+class CandleStoreTests(TestCase):
+    T0 = 1_600_000_020_000 - 1_600_000_020_000 % 60_000
+    MINUTE = 60_000
+
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(CANDLE_STORE_DIR=self.tmp.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.addCleanup(self.tmp.cleanup)
+
+    def fake_klines(self, url, params=None, **kwargs):
+        from unittest.mock import Mock
+        listed_from, listed_to = self.T0 - 20 * self.MINUTE, self.T0 + 100 * self.MINUTE
+        start = max(params['startTime'], listed_from)
+        start += -start % self.MINUTE
+        end = min(params['endTime'], listed_to)
+        klines = [
+            [t, str(t), str(t + 1), str(t - 1), str(t / self.MINUTE), "2.5"]
+            for t in range(start, end + 1, self.MINUTE)
+        ][:params['limit']]
+        return Mock(status_code=200, json=Mock(return_value=klines))
+
+    @patch("dashboard.utils.upstream.get")
+    def test_only_missing_ranges_are_fetched(self, mock_get):
+        from dashboard.utils.candles import CLOSE, FIELDS, count, get_candles, open_time
+
+        mock_get.side_effect = self.fake_klines
+        candles = get_candles('BTC', '1m', self.T0, self.T0 + 50 * self.MINUTE)
+        self.assertEqual(count(candles), 51)
+        self.assertEqual(mock_get.call_count, 1)
+
+        candles = get_candles('BTC', '1m', self.T0 + 10 * self.MINUTE, self.T0 + 40 * self.MINUTE)
+        self.assertEqual(count(candles), 31)
+        self.assertEqual(mock_get.call_count, 1)
+
+        candles = get_candles('BTC', '1m', self.T0, self.T0 + 120 * self.MINUTE)
+        self.assertEqual(count(candles), 101)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args.kwargs['params']['startTime'], self.T0 + 50 * self.MINUTE)
+
+        candles = get_candles('BTC', '1m', self.T0 - 60 * self.MINUTE, self.T0 + 5 * self.MINUTE)
+        self.assertEqual(count(candles), 26)
+        self.assertEqual(open_time(candles, 0), self.T0 - 20 * self.MINUTE)
+        self.assertEqual(candles[CLOSE], (self.T0 - 20 * self.MINUTE) / self.MINUTE)
+        self.assertEqual(mock_get.call_count, 3)
+
+        # History before the listing date is not asked for again
+        get_candles('BTC', '1m', self.T0 - 60 * self.MINUTE, self.T0)
+        self.assertEqual(mock_get.call_count, 3)
+        times = [candles[i] for i in range(0, len(candles), FIELDS)]
+        self.assertEqual(times, sorted(set(times)))
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class ResampleTests(TestCase):
+    def test_resample_aggregates_ohlcv(self):
+        from array import array
+        from dashboard.utils.resample import parse_interval, resample
+
+        minute = 60_000
+        candles = array('d')
+        for i in range(10):
+            t = 1_600_000_200_000 - 1_600_000_200_000 % (5 * minute) + i * minute
+            candles.extend((t, 100 + i, 110 + i, 90 - i, 101 + i, 1.0))
+        out = resample(candles, parse_interval('5m'))
+        self.assertEqual(len(out), 12)
+        self.assertEqual(list(out[1:6]), [100, 114, 86, 105, 5.0])
+        self.assertEqual(list(out[7:12]), [105, 119, 81, 110, 5.0])
+        with self.assertRaises(ValueError):
+            parse_interval('5s')
+
+    def test_weekly_buckets_open_on_monday(self):
+        from array import array
+        from datetime import datetime, timezone
+        from dashboard.utils.resample import parse_interval, resample
+
+        day = 86_400_000
+        sunday = int(datetime(2024, 1, 7, tzinfo=timezone.utc).timestamp() * 1000)
+        candles = array('d')
+        for i in range(3):  # Sunday, Monday, Tuesday
+            candles.extend((sunday + i * day, 10 + i, 20 + i, 5, 11 + i, 1.0))
+        out = resample(candles, parse_interval('1w'))
+        opens = [datetime.fromtimestamp(out[i] / 1000, timezone.utc) for i in range(0, len(out), 6)]
+        self.assertEqual([t.weekday() for t in opens], [0, 0])
+        self.assertEqual(list(out[6:12]), [sunday + day, 11, 22, 5, 13, 2.0])
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        from dashboard.utils.resample import lttb
+
+        xs = list(range(1000))
+        ys = [0.0] * 1000
+        ys[437] = 50.0
+        keep = lttb(xs, ys, 20)
+        self.assertEqual(len(keep), 20)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertIn(437, keep)
+        self.assertEqual(keep, sorted(keep))
+
+    @patch("dashboard.views.get_historical_market_data")
+    def test_market_history_validates_max_points(self, mock_history):
+        mock_history.return_value = {'prices': [], 'volumes': [], 'market_caps': []}
+        response = self.client.get('/api/market-history/BTC/?days=1&max_points=1')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/market-history/BTC/?days=1&max_points=500&interval=5m')
+        self.assertEqual(response.status_code, 200)
+        mock_history.assert_called_once_with('BTC', 1, interval='5m', max_points=500)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class StaleWhileRevalidateTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_stale_value_served_while_refreshing(self):
+        import time
+        from unittest.mock import Mock
+        from dashboard.utils import swr
+
+        fetch = Mock(return_value={'total': 1})
+        self.assertEqual(swr.get_or_refresh('global', fetch, 60, 600), {'total': 1})
+        self.assertEqual(swr.get_or_refresh('global', fetch, 60, 600), {'total': 1})
+        self.assertEqual(fetch.call_count, 1)
+
+        # Run background refreshes inline so the outcome can be checked
+        inline = Mock(submit=lambda fn, *args: fn(*args))
+        later = time.time() + 120
+        with patch.object(swr, '_pool', inline), patch('dashboard.utils.swr.time.time', return_value=later):
+            fetch.return_value = None  # upstream outage
+            self.assertEqual(swr.get_or_refresh('global', fetch, 60, 600), {'total': 1})
+            fetch.return_value = {'total': 2}
+            self.assertEqual(swr.get_or_refresh('global', fetch, 60, 600), {'total': 1})
+        self.assertEqual(fetch.call_count, 3)
+        self.assertEqual(swr.get_or_refresh('global', fetch, 60, 600), {'total': 2})
+
+    @patch("dashboard.utils.upstream.get")
+    def test_market_data_endpoint_uses_cache(self, mock_get):
+        from unittest.mock import Mock
+
+        mock_get.return_value = Mock(status_code=200, json=Mock(return_value={
+            'data': {'total_market_cap': {'usd': 5}, 'markets': 7},
+        }))
+        for _ in range(3):
+            response = self.client.get('/api/market-data/')
+            self.assertEqual(response.json()['total_market_cap'], 5)
+        self.assertEqual(mock_get.call_count, 1)
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_concurrent_callers_share_one_fetch(self):
+        import threading
+        from dashboard.utils import single_flight
+
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(2)
+            return 'payload'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(single_flight.run('hot', fetch)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        started.wait(2)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['payload'] * 5)
+
+    def test_other_process_holding_lock_gets_recheck(self):
+        from unittest.mock import Mock
+        from django.core.cache import cache
+        from dashboard.utils import single_flight
+
+        # Simulate another worker's lock on the key
+        cache.add('single_flight:hot', 'other-worker', 30)
+        fetch = Mock(return_value='fresh')
+        self.assertEqual(single_flight.run('hot', fetch, recheck=lambda: 'stale', wait=0), 'stale')
+        self.assertIsNone(single_flight.run('hot', fetch, wait=0))
+        fetch.assert_not_called()
+        cache.delete('single_flight:hot')
+        self.assertEqual(single_flight.run('hot', fetch), 'fresh')
+        self.assertIsNone(cache.get('single_flight:hot'))
+
+
+class SQLiteCacheTests(TestCase):
+    def make_cache(self, path):
+        from dashboard.utils.sqlite_cache import SQLiteCache
+        return SQLiteCache(path, {
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'MAX_ENTRIES': 100,
+                'NAMESPACES': {'price': {'TIMEOUT': 10, 'MAX_ENTRIES': 3}},
+            },
+        })
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = f"{self.tmp.name}/cache.sqlite3"
+
+    def test_values_shared_between_instances(self):
+        worker_a, worker_b = self.make_cache(self.path), self.make_cache(self.path)
+        worker_a.set('coins', {'BTC': 'bitcoin'})
+        self.assertEqual(worker_b.get('coins'), {'BTC': 'bitcoin'})
+        self.assertTrue(worker_a.add('lock', 'a', 30))
+        self.assertFalse(worker_b.add('lock', 'b', 30))
+        self.assertEqual(worker_b.get('lock'), 'a')
+        worker_b.delete('lock')
+        self.assertTrue(worker_b.add('lock', 'b', 30))
+
+    def test_namespace_ttl_and_lru_eviction(self):
+        cache = self.make_cache(self.path)
+        for offset, symbol in enumerate(('BTC', 'SOL', 'ETH')):
+            with patch('dashboard.utils.sqlite_cache.time.time', return_value=1000.0 + offset / 10):
+                cache.set(f'price:{symbol}', 1.0)
+        with patch('dashboard.utils.sqlite_cache.time.time', return_value=1000.0):
+            cache.set('other', 'kept')
+        with patch('dashboard.utils.sqlite_cache.time.time', return_value=1005.0):
+            self.assertEqual(cache.get('price:BTC'), 1.0)  # BTC becomes most recently used
+            self.assertEqual(cache.get_many(['price:SOL']), {'price:SOL': 1.0})  # so does SOL, through get_many
+            cache.set('price:ADA', 2.0)
+            self.assertEqual(set(cache.get_many(['price:BTC', 'price:ETH', 'price:SOL', 'price:ADA'])),
+                             {'price:BTC', 'price:SOL', 'price:ADA'})
+        # Namespace default TTL is 10s, the backend default (300s) still applies elsewhere
+        with patch('dashboard.utils.sqlite_cache.time.time', return_value=1011.0):
+            self.assertIsNone(cache.get('price:SOL'))
+            self.assertEqual(cache.get('other'), 'kept')
+
+
+@override_settings(CACHES=ISOLATED_CACHES)
+class IndexerConfirmationTests(TestCase):
+    @patch("dashboard.utils.indexer._scanner")
+    @patch("dashboard.utils.indexer.web3")
+    def test_sync_stops_short_of_the_head(self, mock_web3, mock_scanner):
+        from dashboard.utils.indexer import CONFIRMATIONS, get_checkpoint, sync_events
+
+        mock_scanner.scan.return_value = []
+        checkpoint = get_checkpoint()
+        head = checkpoint.last_block + 100
+        mock_web3.eth.block_number = head
+        sync_events()
+        self.assertEqual(mock_scanner.scan.call_args.args[1], head - CONFIRMATIONS)
+        self.assertEqual(get_checkpoint().last_block, head - CONFIRMATIONS)
+
+        # An explicit target past the safe block is capped as well
+        mock_web3.eth.block_number = head + 5
+        sync_events(to_block=head + 5)
+        self.assertEqual(get_checkpoint().last_block, head + 5 - CONFIRMATIONS)
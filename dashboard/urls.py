@@ -6,6 +6,8 @@ from .views import (
                     # remove_coin_from_watchlist_view,
                     buy_coin_view,
                     sell_coin_view,
+                    transaction_status_view,
+                    receipt_status_view,
                     market_chart_view,
                     get_market_data,
                     get_market_history,
@@ -22,5 +24,7 @@ urlpatterns = [
     path("api/market-data/", get_market_data, name="market_data"),
     path("api/market-history/<str:symbol>/", get_market_history, name="market_history"),
     path("sell/", sell_coin_view, name="sell_coin"),
+    path("api/tx/<int:tx_id>/", transaction_status_view, name="transaction_status"),
+    path("api/receipt/<str:tx_hash>/", receipt_status_view, name="receipt_status"),
     path('other-coins/', other_coins_view, name='other_coins'),
 ]
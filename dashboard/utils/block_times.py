@@ -0,0 +1,54 @@
+"""
+Block number -> timestamp store.
+
+Timestamps are read from memory, then from the BlockTimestamp table, and only
+blocks never seen before are fetched from the node, in batched
+eth_getBlockByNumber calls without full transactions.
+"""
+import threading
+
+from dashboard.models import BlockTimestamp
+from dashboard.utils.rpc import RPCError, batch_request
+
+QUERY_CHUNK = 500
+
+_timestamps = {}
+_lock = threading.Lock()
+
+
+def get_block_timestamps(block_numbers):
+    """Return {block_number: unix timestamp} for every block in `block_numbers`."""
+    wanted = set(block_numbers)
+    with _lock:
+        missing = sorted(wanted - _timestamps.keys())
+    if missing:
+        found = {}
+        for offset in range(0, len(missing), QUERY_CHUNK):
+            rows = BlockTimestamp.objects.filter(block_number__in=missing[offset:offset + QUERY_CHUNK])
+            found.update(rows.values_list('block_number', 'timestamp'))
+        missing = [block for block in missing if block not in found]
+        if missing:
+            fetched = fetch_block_timestamps(missing)
+            BlockTimestamp.objects.bulk_create(
+                [BlockTimestamp(block_number=block, timestamp=ts) for block, ts in fetched.items()],
+                ignore_conflicts=True,
+            )
+            found.update(fetched)
+        with _lock:
+            _timestamps.update(found)
+    return {block: _timestamps[block] for block in wanted}
+
+
+def get_block_timestamp(block_number):
+    return get_block_timestamps([block_number])[block_number]
+
+
+def fetch_block_timestamps(block_numbers):
+    """Fetch timestamps for `block_numbers` from the node in JSON-RPC batches."""
+    calls = [('eth_getBlockByNumber', [hex(block), False]) for block in block_numbers]
+    timestamps = {}
+    for block, header in zip(block_numbers, batch_request(calls)):
+        if header is None:
+            raise RPCError('eth_getBlockByNumber', f"block {block} not found")
+        timestamps[block] = int(header['timestamp'], 16)
+    return timestamps
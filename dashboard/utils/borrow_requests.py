@@ -0,0 +1,77 @@
+"""
+Borrow requests kept current from indexed contract events.
+
+The contract holds at most one pending request per user (pendingRequests),
+so the events map onto BorrowRequest rows like this:
+
+- RequestFunds: opens a pending row; an older pending row for the same
+  wallet is marked replaced, as the contract overwrote its amount
+- FundsApproved / FundsRejected: close the wallet's pending row
+
+The admin panel pages through pending rows with an indexed query instead of
+asking the node about every registered user.
+"""
+from django.utils import timezone
+from web3 import Web3
+
+from dashboard.models import BorrowRequest
+
+CLOSING_EVENTS = {
+    'FundsApproved': BorrowRequest.APPROVED,
+    'FundsRejected': BorrowRequest.REJECTED,
+}
+
+
+def _close_pending(wallet, status, block_number):
+    BorrowRequest.objects.filter(wallet=wallet, status=BorrowRequest.PENDING).update(
+        status=status,
+        resolved_block=block_number,
+        updated_at=timezone.now(),
+    )
+
+
+def borrow_events_stored(events):
+    """Indexer hook: apply RequestFunds / FundsApproved / FundsRejected rows in log order."""
+    events = sorted(
+        (event for event in events if event.event == 'RequestFunds' or event.event in CLOSING_EVENTS),
+        key=lambda event: (event.block_number, event.log_index),
+    )
+    for event in events:
+        if event.event == 'RequestFunds':
+            _close_pending(event.wallet, BorrowRequest.REPLACED, event.block_number)
+            BorrowRequest.objects.create(
+                wallet=event.wallet,
+                amount=event.amount,
+                tx_hash=event.tx_hash,
+                log_index=event.log_index,
+                block_number=event.block_number,
+            )
+        else:
+            _close_pending(event.wallet, CLOSING_EVENTS[event.event], event.block_number)
+
+
+def get_pending_borrow_requests():
+    return BorrowRequest.objects.filter(status=BorrowRequest.PENDING).order_by('block_number', 'id')
+
+
+def cross_check_pending_requests():
+    """
+    Compare the local pending rows with the contract's own list, fetched with
+    a single getAllPendingRequests() call. Returns the differences:
+    {'missing_locally': [...], 'missing_on_chain': [...], 'amount_mismatch': [...]}.
+    """
+    # Imported here: utils -> indexer -> this module
+    from dashboard.utils.utils import get_all_pending_requests
+
+    on_chain = {request['wallet']: request['amount'] for request in get_all_pending_requests()}
+    local = {
+        Web3.to_checksum_address(wallet): amount
+        for wallet, amount in get_pending_borrow_requests().values_list('wallet', 'amount')
+    }
+    return {
+        'missing_locally': sorted(set(on_chain) - set(local)),
+        'missing_on_chain': sorted(set(local) - set(on_chain)),
+        'amount_mismatch': sorted(
+            wallet for wallet in set(local) & set(on_chain) if local[wallet] != on_chain[wallet]
+        ),
+    }
@@ -0,0 +1,166 @@
+"""
+Local OHLCV candle store backed by flat binary files.
+
+Candles for each (symbol, interval) live in one file of float64 values, six
+per candle: open time (ms), open, high, low, close, volume. Files are read
+into `array('d')` buffers (48 bytes per candle, no per-row Python objects)
+and kept in memory until the file changes. A request is answered from the
+store; Binance is only asked for candles before the first or after the last
+one stored, and the result is written back with an atomic rename.
+"""
+import os
+import threading
+import time
+from array import array
+from pathlib import Path
+
+from django.conf import settings
+
+from dashboard.utils import upstream
+
+KLINES_URL = 'https://api.binance.com/api/v3/klines'
+KLINES_LIMIT = 1000  # Binance maximum per request
+FIELDS = 6  # open_time, open, high, low, close, volume
+OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(FIELDS)
+# Re-fetch the newest, still forming candle at most this often
+LIVE_REFRESH = 10  # seconds
+
+INTERVAL_MS = {
+    '1m': 60_000,
+    '3m': 180_000,
+    '5m': 300_000,
+    '15m': 900_000,
+    '30m': 1_800_000,
+    '1h': 3_600_000,
+    '2h': 7_200_000,
+    '4h': 14_400_000,
+    '6h': 21_600_000,
+    '12h': 43_200_000,
+    '1d': 86_400_000,
+}
+
+_buffers = {}  # path -> (mtime_ns, array)
+# Earliest start already requested per file; history before the listing date is never fetched twice
+_head_checked = {}
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def store_dir():
+    return Path(getattr(settings, 'CANDLE_STORE_DIR', settings.BASE_DIR / 'data' / 'candles'))
+
+
+def _path(symbol, interval):
+    return store_dir() / f"{symbol.upper()}_{interval}.candles"
+
+
+def _lock(path):
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+def load(symbol, interval):
+    """All stored candles for the pair as a flat array('d')."""
+    path = _path(symbol, interval)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return array('d')
+    cached = _buffers.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    data = array('d')
+    with open(path, 'rb') as f:
+        data.frombytes(f.read())
+    _buffers[path] = (mtime, data)
+    return data
+
+
+def _save(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f'.tmp{os.getpid()}.{threading.get_ident()}')
+    with open(tmp, 'wb') as f:
+        data.tofile(f)
+    os.replace(tmp, path)
+    _buffers[path] = (path.stat().st_mtime_ns, data)
+
+
+def count(data):
+    return len(data) // FIELDS
+
+
+def open_time(data, index):
+    return data[index * FIELDS]
+
+
+def bisect_time(data, ms):
+    """Index of the first candle opening at or after `ms`."""
+    lo, hi = 0, count(data)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if data[mid * FIELDS] < ms:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def fetch_klines(symbol, interval, start_ms, end_ms):
+    """Candles opening in [start_ms, end_ms] from Binance, paging past the 1000 limit."""
+    fetched = array('d')
+    binance_symbol = f"{symbol.upper()}USDT"
+    while start_ms <= end_ms:
+        response = upstream.get(KLINES_URL, params={
+            'symbol': binance_symbol,
+            'interval': interval,
+            'startTime': int(start_ms),
+            'endTime': int(end_ms),
+            'limit': KLINES_LIMIT,
+        })
+        response.raise_for_status()
+        klines = response.json()
+        for k in klines:
+            fetched.extend((float(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5])))
+        if len(klines) < KLINES_LIMIT:
+            break
+        start_ms = int(klines[-1][0]) + INTERVAL_MS[interval]
+    return fetched
+
+
+def get_candles(symbol, interval, start_ms, end_ms):
+    """
+    Candles opening in [start_ms, end_ms] as a flat array('d'), fetching only
+    the head and tail the store does not have yet.
+    """
+    step = INTERVAL_MS[interval]
+    path = _path(symbol, interval)
+    with _lock(path):
+        data = load(symbol, interval)
+        changed = False
+        if not count(data):
+            data = fetch_klines(symbol, interval, start_ms, end_ms)
+            changed = bool(count(data))
+        else:
+            first = open_time(data, 0)
+            last = open_time(data, count(data) - 1)
+            if start_ms < first and start_ms < _head_checked.get(path, first):
+                head = fetch_klines(symbol, interval, start_ms, first - 1)
+                _head_checked[path] = start_ms
+                if count(head):
+                    data = head + data
+                    changed = True
+            forming = last + step > time.time() * 1000
+            stale = time.time() - path.stat().st_mtime >= LIVE_REFRESH
+            if end_ms >= last + step or (forming and stale and end_ms >= last):
+                # The last stored candle may have been incomplete, so it is fetched again
+                tail = fetch_klines(symbol, interval, last, end_ms)
+                if count(tail):
+                    data = data[:bisect_time(data, open_time(tail, 0)) * FIELDS] + tail
+                    changed = True
+                else:
+                    # Nothing new upstream; touch the file so the next request waits LIVE_REFRESH again
+                    os.utime(path)
+                    _buffers[path] = (path.stat().st_mtime_ns, data)
+        if changed:
+            _save(path, data)
+    return data[bisect_time(data, start_ms) * FIELDS:bisect_time(data, end_ms + 1) * FIELDS]
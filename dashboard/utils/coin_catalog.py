@@ -0,0 +1,172 @@
+"""
+Persistent CoinGecko catalog in the Coin table.
+
+`refresh_coin_catalog` (manage.py refresh_coin_catalog) bulk-upserts the
+full /coins/list plus rank, image and price from the top /coins/markets
+pages. Views resolve symbols with one indexed query instead of downloading
+and walking the ~15k entry list on every request.
+
+Several coins can share a symbol; the best ranked one wins, as on
+CoinGecko's own market pages.
+"""
+import time
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from dashboard.models import Coin
+from dashboard.utils import upstream
+
+COINS_LIST_URL = "https://api.coingecko.com/api/v3/coins/list"
+MARKETS_URL = "https://api.coingecko.com/api/v3/coins/markets"
+MARKETS_PER_PAGE = 250
+BULK_BATCH_SIZE = 1000
+# Image backfill: ids per /coins/markets call, seconds between calls (free tier allows ~30/min)
+IMAGE_BATCH_SIZE = 250
+IMAGE_REQUEST_INTERVAL = 2.5
+# Coins CoinGecko had no image for are asked about again after this long
+IMAGE_RECHECK_AFTER = timedelta(days=7)
+
+# Used for symbols the catalog does not know yet (e.g. before the first refresh)
+SEED_COINS = {
+    'BTC': {'id': 'bitcoin', 'name': 'Bitcoin', 'image': 'https://assets.coingecko.com/coins/images/1/large/bitcoin.png'},
+    'ETH': {'id': 'ethereum', 'name': 'Ethereum', 'image': 'https://assets.coingecko.com/coins/images/279/large/ethereum.png'},
+    'STETH': {'id': 'staked-ether', 'name': 'Staked ETH', 'image': 'https://assets.coingecko.com/coins/images/13442/large/steth_logo.png'},
+    'BNB': {'id': 'binancecoin', 'name': 'BNB', 'image': 'https://assets.coingecko.com/coins/images/825/large/bnb-icon2_2x.png'},
+    'USDT': {'id': 'tether', 'name': 'Tether', 'image': 'https://assets.coingecko.com/coins/images/325/large/Tether.png'},
+    'SOL': {'id': 'solana', 'name': 'Solana', 'image': 'https://assets.coingecko.com/coins/images/4128/large/solana.png'},
+    'ADA': {'id': 'cardano', 'name': 'Cardano', 'image': 'https://assets.coingecko.com/coins/images/975/large/cardano.png'},
+    'XRP': {'id': 'ripple', 'name': 'XRP', 'image': 'https://assets.coingecko.com/coins/images/44/large/xrp-symbol-white-128.png'},
+    'DOGE': {'id': 'dogecoin', 'name': 'Dogecoin', 'image': 'https://assets.coingecko.com/coins/images/5/large/dogecoin.png'},
+    'DOT': {'id': 'polkadot', 'name': 'Polkadot', 'image': 'https://assets.coingecko.com/coins/images/12171/large/polkadot.png'},
+    'ENA': {'id': 'enjincoin', 'name': 'Enjin Coin', 'image': 'https://assets.coingecko.com/coins/images/110/large/enjincoin.png'},
+    'MATIC': {'id': 'matic-network', 'name': 'Polygon', 'image': 'https://assets.coingecko.com/coins/images/4713/large/matic-token-icon.png'},
+}
+
+
+def _fetch_json(url, params=None):
+    response = upstream.get(url, params=params, headers={'Accept': 'application/json'})
+    response.raise_for_status()
+    return response.json()
+
+
+def refresh_coin_catalog(market_pages=1):
+    """
+    Upsert every CoinGecko coin, then rank/image/price for the top
+    `market_pages` * 250 coins. Returns (coins listed, coins ranked).
+    """
+    listed = [
+        Coin(coingecko_id=coin['id'], symbol=coin['symbol'].upper(), name=coin['name'])
+        for coin in _fetch_json(COINS_LIST_URL)
+        if coin.get('id') and coin.get('symbol')
+    ]
+    # Only name/symbol come from the list, so images and ranks already stored are kept
+    Coin.objects.bulk_create(
+        listed,
+        batch_size=BULK_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['coingecko_id'],
+        update_fields=['symbol', 'name'],
+    )
+
+    markets = []
+    for page in range(1, market_pages + 1):
+        markets += _fetch_json(MARKETS_URL, params={
+            'vs_currency': 'usd',
+            'order': 'market_cap_desc',
+            'per_page': MARKETS_PER_PAGE,
+            'page': page,
+        })
+    ranked = [
+        Coin(
+            coingecko_id=coin['id'],
+            symbol=coin['symbol'].upper(),
+            name=coin['name'],
+            image=coin.get('image') or '',
+            market_cap_rank=coin.get('market_cap_rank'),
+            current_price=coin.get('current_price') or 0.0,
+        )
+        for coin in markets
+    ]
+    if ranked:
+        # Coins that dropped out of the fetched pages lose their old rank
+        Coin.objects.exclude(coingecko_id__in=[coin.coingecko_id for coin in ranked]).filter(
+            market_cap_rank__isnull=False,
+        ).update(market_cap_rank=None)
+        Coin.objects.bulk_create(
+            ranked,
+            batch_size=BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['coingecko_id'],
+            update_fields=['symbol', 'name', 'image', 'market_cap_rank', 'current_price'],
+        )
+    return len(listed), len(ranked)
+
+
+def resolve_coins(symbols):
+    """{SYMBOL: {'id', 'name', 'image', 'market_cap_rank'}} for `symbols`, in one query."""
+    symbols = {symbol.upper() for symbol in symbols}
+    coins = (
+        Coin.objects
+        .filter(symbol__in=symbols)
+        .order_by('symbol', F('market_cap_rank').asc(nulls_last=True), 'id')
+        .values('symbol', 'coingecko_id', 'name', 'image', 'market_cap_rank')
+    )
+    resolved = {}
+    for coin in coins:
+        if coin['symbol'] not in resolved:
+            resolved[coin['symbol']] = {
+                'id': coin['coingecko_id'],
+                'name': coin['name'],
+                'image': coin['image'] or None,
+                'market_cap_rank': coin['market_cap_rank'],
+            }
+    for symbol in symbols - set(resolved):
+        if symbol in SEED_COINS:
+            resolved[symbol] = dict(SEED_COINS[symbol], market_cap_rank=None)
+    return resolved
+
+
+def resolve_coin(symbol):
+    return resolve_coins([symbol]).get(symbol.upper())
+
+
+# ---------- Image backfill ----------
+def request_coin_images(coingecko_ids):
+    """Flag coins shown without an image so backfill_coin_images fetches them. One UPDATE, no HTTP."""
+    recheck_before = timezone.now() - IMAGE_RECHECK_AFTER
+    Coin.objects.filter(coingecko_id__in=coingecko_ids, image='', needs_image=False).filter(
+        Q(image_checked_at__isnull=True) | Q(image_checked_at__lt=recheck_before),
+    ).update(needs_image=True)
+
+
+def backfill_coin_images(max_batches=None):
+    """
+    Fetch images for flagged coins through /coins/markets?ids=..., which
+    returns the image URL for a whole batch in one small response, pausing
+    between calls to stay inside the rate limit. Returns the number of images stored.
+    """
+    stored = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        coins = list(Coin.objects.filter(needs_image=True).order_by('id')[:IMAGE_BATCH_SIZE])
+        if not coins:
+            break
+        if batches:
+            time.sleep(IMAGE_REQUEST_INTERVAL)
+        markets = _fetch_json(MARKETS_URL, params={
+            'vs_currency': 'usd',
+            'ids': ','.join(coin.coingecko_id for coin in coins),
+            'per_page': IMAGE_BATCH_SIZE,
+        })
+        images = {coin['id']: coin.get('image') or '' for coin in markets}
+        now = timezone.now()
+        for coin in coins:
+            coin.image = images.get(coin.coingecko_id, '')
+            coin.needs_image = False
+            coin.image_checked_at = now
+            stored += bool(coin.image)
+        Coin.objects.bulk_update(coins, ['image', 'needs_image', 'image_checked_at'])
+        batches += 1
+    return stored
@@ -0,0 +1,39 @@
+"""
+Cached lookup of the contract's admin address.
+
+Authorization checks run on every admin request, so the address is kept in
+the Django cache for ADMIN_CACHE_TTL seconds instead of calling admin() each
+time. The indexer overwrites the cached value as soon as it stores an
+AdminUpdated event, so a handover does not wait for the TTL.
+"""
+from django.core.cache import cache
+from web3 import Web3
+
+from dashboard.web3 import contract
+
+ADMIN_CACHE_KEY = 'contract_admin'
+ADMIN_CACHE_TTL = 300  # seconds
+
+
+def get_admin_address():
+    address = cache.get(ADMIN_CACHE_KEY)
+    if address is None:
+        address = Web3.to_checksum_address(contract.functions.admin().call())
+        cache.set(ADMIN_CACHE_KEY, address, ADMIN_CACHE_TTL)
+    return address
+
+
+def is_admin(wallet):
+    return Web3.to_checksum_address(wallet) == get_admin_address()
+
+
+def invalidate_admin_address():
+    cache.delete(ADMIN_CACHE_KEY)
+
+
+def admin_updated(events):
+    """Indexer hook: cache the newest admin from AdminUpdated rows."""
+    updates = [event for event in events if event.event == 'AdminUpdated']
+    if updates:
+        latest = max(updates, key=lambda event: (event.block_number, event.log_index))
+        cache.set(ADMIN_CACHE_KEY, latest.wallet, ADMIN_CACHE_TTL)
@@ -0,0 +1,71 @@
+"""
+Running per-(wallet, symbol) buy aggregates.
+
+The indexer feeds every newly stored CoinBought event through
+`update_cost_basis`, so the average buy price is a single row lookup instead
+of a scan over the wallet's trade history.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Least
+from web3 import Web3
+
+from dashboard.models import CostBasis, TradeEvent
+
+
+def _spent_cents(trade):
+    if trade.total_cost is not None:
+        return trade.total_cost
+    # No recorded cost: count the quantity as dollars, like the old log scan did
+    return trade.quantity * 100
+
+
+def update_cost_basis(trades):
+    """Add newly ingested trades to the aggregates. Sells do not change the cost basis."""
+    totals = {}
+    for trade in trades:
+        if trade.kind != TradeEvent.BUY:
+            continue
+        key = (trade.wallet, trade.symbol)
+        quantity, spent, first_block, last_block = totals.get(key, (0, 0, trade.block_number, trade.block_number))
+        totals[key] = (
+            quantity + Decimal(trade.quantity),
+            spent + Decimal(_spent_cents(trade)),
+            min(first_block, trade.block_number),
+            max(last_block, trade.block_number),
+        )
+    with transaction.atomic():
+        for (wallet, symbol), (quantity, spent, first_block, last_block) in totals.items():
+            basis, created = CostBasis.objects.get_or_create(
+                wallet=wallet,
+                symbol=symbol,
+                defaults={
+                    'total_quantity': quantity,
+                    'total_spent': spent,
+                    'first_block': first_block,
+                    'last_block': last_block,
+                },
+            )
+            if not created:
+                CostBasis.objects.filter(pk=basis.pk).update(
+                    total_quantity=F('total_quantity') + quantity,
+                    total_spent=F('total_spent') + spent,
+                    first_block=Least('first_block', first_block),
+                    last_block=Greatest('last_block', last_block),
+                )
+
+
+def rebuild_cost_basis():
+    """Recompute every aggregate from the TradeEvent table."""
+    with transaction.atomic():
+        CostBasis.objects.all().delete()
+        update_cost_basis(TradeEvent.objects.filter(kind=TradeEvent.BUY).iterator())
+
+
+def get_cost_basis(user_wallet, symbol):
+    return CostBasis.objects.filter(
+        wallet=Web3.to_checksum_address(user_wallet),
+        symbol=symbol.upper(),
+    ).first()
@@ -0,0 +1,143 @@
+"""
+Topic hashes and decoding for CryptoPlatform events.
+
+Topic-0 hashes are computed once from the ABI so a single eth_getLogs call
+can ask for several events at once (topic-0 OR-set) and the mixed results
+can be routed by looking at their first topic. Decoding works on the raw
+logs directly instead of going through web3's per-log event processing.
+"""
+from functools import lru_cache
+
+from eth_abi import decode, encode
+from hexbytes import HexBytes
+from web3 import Web3
+
+from dashboard.web3 import abi, contract, web3
+
+EVENT_ABIS = {entry['name']: entry for entry in abi if entry['type'] == 'event'}
+
+
+def event_signature(event_abi):
+    types = ','.join(item['type'] for item in event_abi['inputs'])
+    return f"{event_abi['name']}({types})"
+
+
+EVENT_TOPICS = {name: Web3.keccak(text=event_signature(entry)) for name, entry in EVENT_ABIS.items()}
+TOPIC_EVENTS = {topic: name for name, topic in EVENT_TOPICS.items()}
+
+
+def get_event_logs(event_names, from_block, to_block):
+    """Raw logs of every event in `event_names` for the range, in one eth_getLogs call."""
+    return web3.eth.get_logs({
+        'address': contract.address,
+        'fromBlock': from_block,
+        'toBlock': to_block,
+        'topics': [[Web3.to_hex(EVENT_TOPICS[name]) for name in event_names]],
+    })
+
+
+class EventLayout:
+    """Where each argument of an event lives in a raw log, computed once from the ABI."""
+
+    def __init__(self, event_abi):
+        self.name = event_abi['name']
+        self.indexed = [(item['name'], item['type']) for item in event_abi['inputs'] if item['indexed']]
+        self.data = [(item['name'], item['type']) for item in event_abi['inputs'] if not item['indexed']]
+        self.data_types = [type_ for _, type_ in self.data]
+        self.order = [item['name'] for item in event_abi['inputs']]
+        # Raw location of the `user` argument: ('topic', n) or ('data', byte offset of its head word)
+        self.user_location = None
+        for position, (name, _) in enumerate(self.indexed):
+            if name == 'user':
+                self.user_location = ('topic', position + 1)
+        for position, (name, _) in enumerate(self.data):
+            if name == 'user':
+                self.user_location = ('data', position * 32)
+
+    def user_word(self, log):
+        if self.user_location is None:
+            return None
+        kind, position = self.user_location
+        if kind == 'topic':
+            return bytes(log['topics'][position])
+        return bytes(log['data'][position:position + 32])
+
+
+EVENT_LAYOUTS = {name: EventLayout(entry) for name, entry in EVENT_ABIS.items()}
+
+
+def _address_word(address):
+    return b'\x00' * 12 + bytes.fromhex(address[2:].lower())
+
+
+@lru_cache(maxsize=4096)
+def _checksum(address):
+    return Web3.to_checksum_address(address)
+
+
+def _normalize(type_, value):
+    if type_ == 'address':
+        return _checksum(value)
+    return value
+
+
+def decode_logs(raw_logs, user=None):
+    """
+    Decode raw eth_getLogs entries of mixed event types.
+
+    Logs are matched on precomputed topic hashes and, when `user` is given,
+    dropped by comparing the raw `user` word before any ABI decoding. The
+    survivors are decoded per event type with eth_abi. Unknown topics and
+    events without a `user` argument (when filtering) are skipped. Returns
+    dicts shaped like web3's EventData, in input order.
+    """
+    user_word = _address_word(user) if user else None
+    batches = {}
+    for position, log in enumerate(raw_logs):
+        if not log['topics']:
+            continue
+        name = TOPIC_EVENTS.get(bytes(log['topics'][0]))
+        if name is None:
+            continue
+        if user_word is not None and EVENT_LAYOUTS[name].user_word(log) != user_word:
+            continue
+        batches.setdefault(name, []).append((position, log))
+
+    decoded = []
+    for name, entries in batches.items():
+        layout = EVENT_LAYOUTS[name]
+        for position, log in entries:
+            data_values = decode(layout.data_types, bytes(log['data']))
+            values = {arg: _normalize(type_, value) for (arg, type_), value in zip(layout.data, data_values)}
+            for topic, (arg, type_) in zip(log['topics'][1:], layout.indexed):
+                values[arg] = _normalize(type_, decode([type_], bytes(topic))[0])
+            decoded.append((position, {
+                'event': name,
+                'args': {arg: values[arg] for arg in layout.order},
+                'address': log['address'],
+                'blockHash': log['blockHash'],
+                'blockNumber': log['blockNumber'],
+                'logIndex': log['logIndex'],
+                'transactionHash': log['transactionHash'],
+                'transactionIndex': log['transactionIndex'],
+            }))
+    decoded.sort(key=lambda item: item[0])
+    return [event for _, event in decoded]
+
+
+def build_raw_log(event_name, args, block_number, log_index):
+    """Encode a synthetic raw log for `event_name`, used by tests and benchmarks."""
+    layout = EVENT_LAYOUTS[event_name]
+    topics = [EVENT_TOPICS[event_name]]
+    topics += [HexBytes(encode([type_], [args[name]])) for name, type_ in layout.indexed]
+    return {
+        'address': contract.address,
+        'topics': topics,
+        'data': HexBytes(encode(layout.data_types, [args[name] for name, _ in layout.data])),
+        'blockNumber': block_number,
+        'logIndex': log_index,
+        'transactionIndex': 0,
+        'transactionHash': HexBytes(block_number.to_bytes(16, 'big') + log_index.to_bytes(16, 'big')),
+        'blockHash': HexBytes(block_number.to_bytes(32, 'big')),
+        'removed': False,
+    }
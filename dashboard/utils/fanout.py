@@ -0,0 +1,73 @@
+"""
+Concurrent fan-out for independent upstream calls.
+
+Each source runs on a shared thread pool with its own deadline, measured
+from the start of the fan-out. Required sources are waited for up to their
+deadline; optional sources up to theirs, but never past the last required
+deadline, so a slow optional source costs a missing widget instead of page
+latency. A source that raises or misses its deadline yields its default
+value.
+
+A running future cannot be cancelled, so sources are called with the
+monotonic time they must finish by and are expected to bound their own
+HTTP calls with `call_timeout(until)`; abandoned work then frees its pool
+thread soon after the deadline instead of holding it for a full upstream
+timeout.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from dashboard.utils import upstream
+
+MAX_WORKERS = 16
+# Smallest timeout handed to a call, so one that starts late still gets a chance
+MIN_CALL_TIMEOUT = 0.1
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='fanout')
+
+
+class Source:
+    """`fn(until)` produces the value; `until` is the time.monotonic() it must be done by."""
+
+    def __init__(self, fn, deadline, default=None, required=False):
+        self.fn = fn
+        self.deadline = deadline
+        self.default = default
+        self.required = required
+
+
+def call_timeout(until):
+    """(connect, read) timeout for upstream.get that ends around `until`."""
+    left = max(MIN_CALL_TIMEOUT, until - time.monotonic())
+    return (min(upstream.DEFAULT_TIMEOUT[0], left), left)
+
+
+def _collect(future, source, wait_until):
+    try:
+        return future.result(timeout=max(0.0, wait_until - time.monotonic()))
+    except FutureTimeout:
+        future.cancel()
+        return source.default
+    except Exception:
+        return source.default
+
+
+def fan_out(sources):
+    """
+    Run `sources` ({name: Source}) concurrently and return {name: result}.
+    Total wall time is at most the longest required deadline (or the longest
+    optional one when nothing is required).
+    """
+    started = time.monotonic()
+    futures = {name: _pool.submit(source.fn, started + source.deadline) for name, source in sources.items()}
+    required = [source.deadline for source in sources.values() if source.required]
+    cutoff = started + max(required) if required else float('inf')
+    results = {}
+    for name, source in sources.items():
+        if source.required:
+            results[name] = _collect(futures[name], source, started + source.deadline)
+    for name, source in sources.items():
+        if not source.required:
+            results[name] = _collect(futures[name], source, min(started + source.deadline, cutoff))
+    return results
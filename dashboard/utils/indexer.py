@@ -0,0 +1,142 @@
+"""
+Persistent indexer for CryptoPlatform contract events.
+
+Logs are copied into local tables (TradeEvent / AccountEvent) and a
+checkpoint records the last block that was fully ingested, so each run only
+asks the node for blocks it has not seen yet. Views read from the tables and
+never scan the chain themselves.
+"""
+from django.db import transaction
+from web3 import Web3
+
+from dashboard.models import AccountEvent, IndexerCheckpoint, TradeEvent
+from dashboard.utils.block_times import get_block_timestamps
+from dashboard.utils.borrow_requests import borrow_events_stored
+from dashboard.utils.contract_admin import admin_updated
+from dashboard.utils.cost_basis import update_cost_basis
+from dashboard.utils.events import decode_logs, get_event_logs
+from dashboard.utils.log_scanner import LogScanner
+from dashboard.utils.registrations import registrations_stored
+from dashboard.web3 import DEPLOY_BLOCK, web3
+
+CHECKPOINT_NAME = 'contract_events'
+# Blocks scanned between checkpoint commits
+WINDOW_SIZE = 50000
+# Blocks left behind the head so a shallow reorg cannot leave orphaned events in the index
+CONFIRMATIONS = 12
+
+
+def _trade_event(log, common):
+    args = log['args']
+    return TradeEvent(
+        kind=TradeEvent.BUY if log['event'] == 'CoinBought' else TradeEvent.SELL,
+        symbol=args['symbol'].upper(),
+        quantity=args['quantity'],
+        total_cost=args.get('totalCost'),
+        **common
+    )
+
+
+def _account_event(log, common):
+    return AccountEvent(event=log['event'], amount=log['args'].get('amount'), **common)
+
+
+EVENT_HANDLERS = {
+    'CoinBought': _trade_event,
+    'CoinSold': _trade_event,
+    'Registered': _account_event,
+    'RequestFunds': _account_event,
+    'FundsApproved': _account_event,
+    'FundsRejected': _account_event,
+    'Repaid': _account_event,
+    'AdminUpdated': _account_event,
+}
+INDEXED_EVENTS = tuple(EVENT_HANDLERS)
+# Argument stored as the row's wallet, for events without a `user` argument
+EVENT_WALLET_ARGS = {
+    'AdminUpdated': 'newAdmin',
+}
+
+# Called with the newly stored rows of a model, inside the ingest transaction
+STORE_HOOKS = {
+    TradeEvent: [update_cost_basis],
+    AccountEvent: [admin_updated, registrations_stored, borrow_events_stored],
+}
+
+
+def get_checkpoint():
+    checkpoint, _ = IndexerCheckpoint.objects.get_or_create(
+        name=CHECKPOINT_NAME,
+        defaults={'last_block': DEPLOY_BLOCK - 1},
+    )
+    return checkpoint
+
+
+def fetch_logs(start, end):
+    # One eth_getLogs per range for every indexed event (topic-0 OR-set)
+    return get_event_logs(INDEXED_EVENTS, start, end)
+
+
+_scanner = LogScanner(fetch_logs)
+
+
+def sync_events(to_block=None):
+    """
+    Ingest every indexed event between the checkpoint and `to_block`
+    (default: latest block), never closer than CONFIRMATIONS blocks to the
+    head. Returns the number of events stored.
+    """
+    checkpoint = get_checkpoint()
+    safe_block = web3.eth.block_number - CONFIRMATIONS
+    to_block = safe_block if to_block is None else min(to_block, safe_block)
+    stored = 0
+    start = checkpoint.last_block + 1
+    while start <= to_block:
+        end = min(start + WINDOW_SIZE - 1, to_block)
+        logs = decode_logs(_scanner.scan(start, end))
+        with transaction.atomic():
+            stored += store_events(logs)
+            IndexerCheckpoint.objects.filter(pk=checkpoint.pk).update(last_block=end)
+        start = end + 1
+    return stored
+
+
+def store_events(logs):
+    """Route decoded event logs to their handlers and write the rows. Returns the number stored."""
+    timestamps = get_block_timestamps(log['blockNumber'] for log in logs)
+    rows = {}
+    for log in logs:
+        handler = EVENT_HANDLERS.get(log['event'])
+        if handler is None:
+            continue
+        block = log['blockNumber']
+        common = {
+            'wallet': Web3.to_checksum_address(log['args'][EVENT_WALLET_ARGS.get(log['event'], 'user')]),
+            'block_number': block,
+            'log_index': log['logIndex'],
+            'tx_hash': Web3.to_hex(log['transactionHash']),
+            'timestamp': timestamps[block],
+        }
+        row = handler(log, common)
+        rows.setdefault(type(row), []).append(row)
+    stored = 0
+    for model, objs in rows.items():
+        # Skip logs that are already indexed so hooks only see new rows
+        existing = set(model.objects.filter(tx_hash__in={obj.tx_hash for obj in objs}).values_list('tx_hash', 'log_index'))
+        objs = [obj for obj in objs if (obj.tx_hash, obj.log_index) not in existing]
+        model.objects.bulk_create(objs, ignore_conflicts=True)
+        for hook in STORE_HOOKS.get(model, ()):
+            hook(objs)
+        stored += len(objs)
+    return stored
+
+
+# ---------- Readers ----------
+def get_user_trades(user_wallet, kind=None, symbol=None):
+    user_wallet = Web3.to_checksum_address(user_wallet)
+    trades = TradeEvent.objects.filter(wallet=user_wallet)
+    if kind:
+        trades = trades.filter(kind=kind)
+    if symbol:
+        trades = trades.filter(symbol=symbol.upper())
+    return trades.order_by('block_number', 'log_index')
@@ -0,0 +1,141 @@
+"""
+Adaptive, parallel eth_getLogs range scanner.
+
+A block range is cut into chunks that are fetched on a bounded thread pool.
+The chunk size grows while responses stay small and is halved when the
+provider complains about the range or result size; the offending chunk is
+split and re-queued. Other failures are retried with backoff and, if they
+keep failing, abort the scan instead of silently dropping the range.
+"""
+import random
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+RANGE_ERROR_MARKERS = (
+    'block range',
+    'range is too large',
+    'range too large',
+    'query returned more than',
+    'response size exceeded',
+    'response size is larger',
+    'too many results',
+    'query timeout exceeded',
+)
+# Throttling is retried with backoff, never answered by splitting the range
+RATE_LIMIT_MARKERS = (
+    'rate limit',
+    'too many requests',
+    'request rate exceeded',
+    "'code': 429",
+)
+
+
+class RangeTooLarge(Exception):
+    pass
+
+
+class LogScanError(Exception):
+    def __init__(self, start, end, cause):
+        self.start = start
+        self.end = end
+        super().__init__(f"Failed to fetch logs for blocks {start}-{end}: {cause}")
+
+
+def is_range_error(exc):
+    if isinstance(exc, RangeTooLarge):
+        return True
+    message = str(exc).lower()
+    if any(marker in message for marker in RATE_LIMIT_MARKERS):
+        return False
+    return any(marker in message for marker in RANGE_ERROR_MARKERS)
+
+
+class LogScanner:
+    """
+    `fetch(start, end)` must return the logs for the inclusive block range.
+    The scanner keeps the chunk size it has learned between calls to `scan`.
+    """
+
+    def __init__(self, fetch, chunk_size=500, min_chunk=1, max_chunk=10000,
+                 target_logs=1000, max_workers=4, max_retries=4, retry_delay=0.5, recover_after=20):
+        self.fetch = fetch
+        self.chunk_size = chunk_size
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.target_logs = target_logs
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        # Largest chunk size the provider is known to accept, learned from range errors.
+        # Some of those are transient (query timeouts), so it doubles again after
+        # `recover_after` successful ranges in a row.
+        self.ceiling = max_chunk
+        self.recover_after = recover_after
+        self._successes = 0
+
+    def scan(self, from_block, to_block):
+        """Return all logs in [from_block, to_block], ordered by block and log index."""
+        logs = []
+        splits = deque()
+        next_start = from_block
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while in_flight or splits or next_start <= to_block:
+                while len(in_flight) < self.max_workers and (splits or next_start <= to_block):
+                    if splits:
+                        start, end = splits.popleft()
+                    else:
+                        start = next_start
+                        end = min(start + self.chunk_size - 1, to_block)
+                        next_start = end + 1
+                    in_flight[pool.submit(self._fetch_with_retry, start, end)] = (start, end)
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, end = in_flight.pop(future)
+                    try:
+                        chunk_logs = future.result()
+                    except RangeTooLarge as exc:
+                        if start == end:
+                            self._abort(in_flight)
+                            raise LogScanError(start, end, exc)
+                        mid = (start + end) // 2
+                        splits.extend([(start, mid), (mid + 1, end)])
+                        self.ceiling = max(self.min_chunk, min(self.ceiling, (end - start + 1) // 2))
+                        self.chunk_size = min(self.chunk_size, self.ceiling)
+                        self._successes = 0
+                        continue
+                    except LogScanError:
+                        self._abort(in_flight)
+                        raise
+                    logs.extend(chunk_logs)
+                    self._adjust(len(chunk_logs))
+        logs.sort(key=lambda log: (log['blockNumber'], log['logIndex']))
+        return logs
+
+    def _fetch_with_retry(self, start, end):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.fetch(start, end)
+            except Exception as exc:
+                if is_range_error(exc):
+                    raise RangeTooLarge(str(exc)) from exc
+                if attempt == self.max_retries:
+                    raise LogScanError(start, end, exc) from exc
+                time.sleep(self.retry_delay * (2 ** attempt) * (0.5 + random.random()))
+
+    def _adjust(self, log_count):
+        self._successes += 1
+        if self._successes >= self.recover_after and self.ceiling < self.max_chunk:
+            self.ceiling = min(self.max_chunk, self.ceiling * 2)
+            self._successes = 0
+        if log_count > self.target_logs:
+            self.chunk_size = max(self.min_chunk, self.chunk_size // 2)
+        elif log_count < self.target_logs // 2:
+            self.chunk_size = min(self.ceiling, self.chunk_size * 2)
+
+    @staticmethod
+    def _abort(in_flight):
+        for future in in_flight:
+            future.cancel()
@@ -1,104 +1,118 @@
-import requests
+from dashboard.utils import upstream
+from dashboard.utils.candles import CLOSE, FIELDS, INTERVAL_MS, OPEN_TIME, VOLUME, get_candles
+from dashboard.utils.resample import base_interval, lttb, parse_interval, resample
+from dashboard.utils.swr import get_or_refresh
 from datetime import datetime, timedelta
 
-def get_coingecko_market_data():
+# Stale-while-revalidate windows (seconds) for CoinGecko global aggregates
+GLOBAL_SOFT_TTL = 60
+GLOBAL_HARD_TTL = 6 * 60 * 60
+CHART_SOFT_TTL = 10 * 60
+CHART_HARD_TTL = 24 * 60 * 60
+MARKET_CAP_CHART_DAYS = 30
+# Upper bound on stored candles read for one resampled series
+MAX_BASE_CANDLES = 50_000
+
+def fetch_global_data():
+    """Raw `data` object of CoinGecko /global, or None on failure."""
     try:
         url = 'https://api.coingecko.com/api/v3/global'
-        response = requests.get(url)
+        response = upstream.get(url)
+        if response.status_code == 200:
+            return response.json().get('data', {})
+        print(f"[ERROR] CoinGecko global API failed with status {response.status_code}")
+    except Exception as e:
+        print(f"[EXCEPTION] Error fetching CoinGecko global data: {str(e)}")
+    return None
+
+
+def fetch_market_cap_chart(days=MARKET_CAP_CHART_DAYS):
+    """Total market cap and volume series from CoinGecko, or None on failure."""
+    try:
+        url = 'https://api.coingecko.com/api/v3/global/market_cap_chart'
+        response = upstream.get(url, params={'vs_currency': 'usd', 'days': days})
         if response.status_code == 200:
             json_data = response.json()
-            data = json_data.get('data', {})
-            result = {
-                'total_market_cap': data.get('total_market_cap', {}).get('usd', 0),
-                'total_volume': data.get('total_volume', {}).get('usd', 0),
-                'market_cap_change_percentage_24h': data.get('market_cap_change_percentage_24h', 0.0),
-                'market_cap_percentage': data.get('market_cap_percentage', {'btc': 0, 'eth': 0}),
-                'active_cryptocurrencies': data.get('active_cryptocurrencies', 0),
-                'markets': data.get('markets', 0),
-                'last_updated': data.get('updated_at', '')
+            return {
+                'market_caps': json_data.get('market_caps', []),
+                'total_volumes': json_data.get('total_volumes', []),
             }
-            return result
-        else:
-            print(f"[ERROR] CoinGecko global API failed with status {response.status_code}")
+        print(f"[ERROR] CoinGecko market cap chart failed with status {response.status_code}")
     except Exception as e:
-        print(f"[EXCEPTION] Error fetching CoinGecko global data: {str(e)}")
+        print(f"[EXCEPTION] Error fetching CoinGecko market cap chart: {str(e)}")
     return None
 
-def get_historical_market_data(symbol, days=7):
+
+# Global aggregates move slowly; pages get the cached copy and never wait on CoinGecko once warm
+def get_global_data():
+    return get_or_refresh('coingecko_global', fetch_global_data, GLOBAL_SOFT_TTL, GLOBAL_HARD_TTL)
+
+
+def get_market_cap_chart():
+    return get_or_refresh('coingecko_market_cap_chart', fetch_market_cap_chart, CHART_SOFT_TTL, CHART_HARD_TTL)
+
+
+def get_coingecko_market_data():
+    data = get_global_data()
+    if data is None:
+        return None
+    return {
+        'total_market_cap': data.get('total_market_cap', {}).get('usd', 0),
+        'total_volume': data.get('total_volume', {}).get('usd', 0),
+        'market_cap_change_percentage_24h': data.get('market_cap_change_percentage_24h', 0.0),
+        'market_cap_percentage': data.get('market_cap_percentage', {'btc': 0, 'eth': 0}),
+        'active_cryptocurrencies': data.get('active_cryptocurrencies', 0),
+        'markets': data.get('markets', 0),
+        'last_updated': data.get('updated_at', '')
+    }
+
+def get_historical_market_data(symbol, days=7, interval=None, max_points=None):
+    """
+    Close prices and volumes for the last `days`. `interval` (e.g. '5m', '2h')
+    overrides the default ladder and is built from stored base candles;
+    `max_points` downsamples the result with LTTB. Raises ValueError for an
+    interval that is malformed or would need too many base candles.
+    """
+    if interval:
+        target_ms = parse_interval(interval)
+        base = base_interval(target_ms)
+        if int(days) * 86_400_000 // INTERVAL_MS[base] > MAX_BASE_CANDLES:
+            raise ValueError(f"Interval {interval} is too fine for {days} days")
     try:
         # Convert days to milliseconds
         end_time = int(datetime.now().timestamp() * 1000)
         start_time = end_time - (int(days) * 24 * 60 * 60 * 1000)
 
-        # Determine interval based on time range
-        if int(days) <= 1:
-            interval = '1m'  # 1 minute
-        elif int(days) <= 7:
-            interval = '15m'  # 15 minutes
-        elif int(days) <= 30:
-            interval = '1h'  # 1 hour
-        elif int(days) <= 90:
-            interval = '4h'  # 4 hours
-        else:
-            interval = '1d'  # 1 day
-
-        # Format symbol for Binance (add USDT pair)
-        binance_symbol = f"{symbol.upper()}USDT"
+        if not interval:
+            # Determine interval based on time range
+            if int(days) <= 1:
+                base = '1m'  # 1 minute
+            elif int(days) <= 7:
+                base = '15m'  # 15 minutes
+            elif int(days) <= 30:
+                base = '1h'  # 1 hour
+            elif int(days) <= 90:
+                base = '4h'  # 4 hours
+            else:
+                base = '1d'  # 1 day
 
-        # Fetch kline (candlestick) data from Binance
-        url = 'https://api.binance.com/api/v3/klines'
-        params = {
-            'symbol': binance_symbol,
-            'interval': interval,
-            'startTime': start_time,
-            'endTime': end_time,
-            'limit': 1000  # Maximum limit for most intervals
+        # Served from the local candle store; Binance is only asked for candles it does not have
+        candles = get_candles(symbol, base, start_time, end_time)
+        if interval and target_ms != INTERVAL_MS[base]:
+            candles = resample(candles, target_ms)
+        times = candles[OPEN_TIME::FIELDS]
+        closes = candles[CLOSE::FIELDS]
+        candle_volumes = candles[VOLUME::FIELDS]
+        keep = lttb(times, closes, max_points) if max_points else range(len(times))
+        prices = [[int(times[i]), closes[i]] for i in keep]
+        # Each kept point carries the volume of every candle up to the next kept one
+        bounds = list(keep) + [len(times)]
+        volumes = [[int(times[i]), sum(candle_volumes[i:j])] for i, j in zip(bounds, bounds[1:])]
+        return {
+            'prices': prices,
+            'volumes': volumes,
+            'market_caps': []  # Binance doesn't provide market cap data
         }
-        response = requests.get(url, params=params)
-        
-        if response.status_code == 200:
-            klines = response.json()
-
-            # Format data for chart
-            try:
-                # Use closing price (index 4) for price data
-                prices = [[int(k[0]), float(k[4])] for k in klines]
-                # Use volume (index 5) for volume data
-                volumes = [[int(k[0]), float(k[5])] for k in klines]
-                market_caps = []  # Binance doesn't provide market cap data
-            except Exception as e:
-                return None
-
-            return {
-                'prices': prices,
-                'volumes': volumes,
-                'market_caps': market_caps
-            }
-            # Get top coins data for the period
-            coins_url = "https://api.coingecko.com/api/v3/coins/markets"
-            coins_params = {
-                "vs_currency": "usd",
-                "order": "market_cap_desc",
-                "per_page": 10,
-                "sparkline": True,
-                "days": str(days)
-            }
-            coins_response = requests.get(coins_url, params=coins_params)
-            top_coins = []
-            if coins_response.status_code == 200:
-                try:
-                    coins_data = coins_response.json()
-                    top_coins = coins_data if isinstance(coins_data, list) else []
-                except Exception as e:
-                    top_coins = []
-            result = {
-                'market_caps': market_caps,
-                'volumes': volumes,
-                'top_coins': top_coins
-            }
-            return result
-        else:
-            print(f"[ERROR] CoinGecko historical API failed with status {response.status_code}")
     except Exception as e:
         print(f"[EXCEPTION] Error fetching historical market data: {str(e)}")
     return None
@@ -0,0 +1,147 @@
+"""
+Nonce allocation for backend signing wallets.
+
+Nonces are handed out from a SignerNonce counter row instead of asking the
+node for get_transaction_count before every send, so concurrent requests
+(threads or processes) never sign two transactions with the same nonce.
+Every allocation is recorded as a NonceReservation:
+
+- reserved: handed out, transaction not sent yet
+- sent: accepted by the node
+- failed: the send failed; the nonce is reused by the next reservation so
+  the account does not end up with a gap that blocks later transactions
+
+`resync_nonce` realigns the counter with the node's pending count.
+Reservations made inside `reserving_for(outbound)` are linked to that queue
+row, which lets the queue tell whether a send cut short by a crash went out.
+"""
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from web3 import Web3
+
+from dashboard.models import NonceReservation, OutboundTransaction, SignerNonce
+from dashboard.web3 import web3
+
+# A reservation that was never sent or released after this long is treated as failed
+STALE_AFTER = timedelta(minutes=5)
+
+_context = threading.local()
+
+
+@contextmanager
+def reserving_for(outbound):
+    """Link every reservation made in this thread inside the block to the OutboundTransaction `outbound`."""
+    previous = getattr(_context, 'outbound_id', None)
+    _context.outbound_id = outbound.id
+    try:
+        yield
+    finally:
+        _context.outbound_id = previous
+
+
+def _chain_nonce(address):
+    return web3.eth.get_transaction_count(address, 'pending')
+
+
+def nonce_used(address, nonce):
+    """True if the node has a transaction (mined or pending) with `nonce` or a later one."""
+    return _chain_nonce(Web3.to_checksum_address(address)) > nonce
+
+
+def _lock_signer(address):
+    """
+    Return the signer row, locked for the current transaction. The UPDATE
+    comes first so SQLite takes its write lock before any read; other
+    backends get a row lock from select_for_update.
+    """
+    if not SignerNonce.objects.filter(address=address).update(updated_at=timezone.now()):
+        SignerNonce.objects.get_or_create(address=address, defaults={'next_nonce': _chain_nonce(address)})
+    return SignerNonce.objects.select_for_update().get(address=address)
+
+
+def _release_stale(address):
+    """Reservations whose process died before sending or releasing them become reusable."""
+    NonceReservation.objects.filter(
+        address=address,
+        status=NonceReservation.RESERVED,
+        updated_at__lt=timezone.now() - STALE_AFTER,
+    ).update(status=NonceReservation.FAILED)
+
+
+def reserve_nonce(address):
+    """
+    Next nonce for `address`. Released and stale reservations are reused
+    first (lowest nonce first), so a crashed sender cannot leave a gap that
+    holds every later transaction in the mempool.
+    """
+    address = Web3.to_checksum_address(address)
+    with transaction.atomic():
+        signer = _lock_signer(address)
+        _release_stale(address)
+        released = (
+            NonceReservation.objects
+            .filter(address=address, status=NonceReservation.FAILED)
+            .order_by('nonce')
+            .first()
+        )
+        outbound_id = getattr(_context, 'outbound_id', None)
+        if released is not None:
+            nonce = released.nonce
+            released.status = NonceReservation.RESERVED
+            released.tx_hash = ''
+            released.outbound_id = outbound_id
+            released.save(update_fields=['status', 'tx_hash', 'outbound', 'updated_at'])
+        else:
+            nonce = signer.next_nonce
+            signer.next_nonce = nonce + 1
+            signer.save(update_fields=['next_nonce', 'updated_at'])
+            NonceReservation.objects.create(address=address, nonce=nonce, outbound_id=outbound_id)
+        if outbound_id is not None:
+            # Recorded on the queue row too, so recovery still knows the nonce after the reservation is reused
+            OutboundTransaction.objects.filter(id=outbound_id).update(signer=address, nonce=nonce)
+        return nonce
+
+
+def mark_sent(address, nonce, tx_hash):
+    NonceReservation.objects.filter(address=Web3.to_checksum_address(address), nonce=nonce).update(
+        status=NonceReservation.SENT,
+        tx_hash=tx_hash,
+        updated_at=timezone.now(),
+    )
+
+
+def release_nonce(address, nonce):
+    """The transaction using `nonce` was never accepted; let the next reservation reuse it."""
+    NonceReservation.objects.filter(
+        address=Web3.to_checksum_address(address),
+        nonce=nonce,
+        status=NonceReservation.RESERVED,
+    ).update(status=NonceReservation.FAILED, updated_at=timezone.now())
+
+
+def resync_nonce(address):
+    """
+    Realign the counter with the node. Reservations the chain has already
+    consumed are dropped, stale reservations are released, and the counter
+    never moves below a nonce that is still reserved or in flight.
+    Returns the new next nonce.
+    """
+    address = Web3.to_checksum_address(address)
+    chain_nonce = _chain_nonce(address)
+    with transaction.atomic():
+        signer = _lock_signer(address)
+        reservations = NonceReservation.objects.filter(address=address)
+        reservations.filter(nonce__lt=chain_nonce).delete()
+        _release_stale(address)
+        highest_active = reservations.exclude(status=NonceReservation.FAILED).aggregate(Max('nonce'))['nonce__max']
+        next_nonce = max(chain_nonce, highest_active + 1 if highest_active is not None else 0)
+        # Released nonces at or above the counter will be handed out by the counter itself
+        reservations.filter(status=NonceReservation.FAILED, nonce__gte=next_nonce).delete()
+        signer.next_nonce = next_nonce
+        signer.save(update_fields=['next_nonce', 'updated_at'])
+    return next_nonce
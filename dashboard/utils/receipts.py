@@ -0,0 +1,61 @@
+"""
+Receipt tracking for transactions sent by the backend.
+
+Every hash returned by a write helper is registered as a pending
+TransactionReceipt. `poll_receipts` asks the node for all pending receipts
+in one JSON-RPC batch, so each poll costs the same single round trip
+however many transactions are in flight. Views look receipts up in the
+table and never wait on the node.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from dashboard.models import TransactionReceipt
+from dashboard.utils.rpc import RPCError, batch_request
+
+# Hashes that have not been mined after this long are most likely dropped; stop polling them
+PENDING_WINDOW = timedelta(days=1)
+MAX_PER_POLL = 1000
+
+
+def track_transaction(tx_hash):
+    TransactionReceipt.objects.get_or_create(tx_hash=tx_hash.lower())
+
+
+def poll_receipts(limit=MAX_PER_POLL):
+    """Fetch the receipts of pending transactions and record the mined ones. Returns the number recorded."""
+    pending = list(
+        TransactionReceipt.objects
+        .filter(status=TransactionReceipt.PENDING, created_at__gte=timezone.now() - PENDING_WINDOW)
+        .order_by('created_at')[:limit]
+    )
+    if not pending:
+        return 0
+    results = batch_request(
+        [('eth_getTransactionReceipt', [receipt.tx_hash]) for receipt in pending],
+        raise_errors=False,
+    )
+    mined = []
+    now = timezone.now()
+    for receipt, result in zip(pending, results):
+        # None: not mined yet; RPCError: try again on the next poll
+        if result is None or isinstance(result, RPCError):
+            continue
+        receipt.status = TransactionReceipt.SUCCESS if int(result['status'], 16) == 1 else TransactionReceipt.REVERTED
+        receipt.block_number = int(result['blockNumber'], 16)
+        receipt.gas_used = int(result['gasUsed'], 16)
+        receipt.updated_at = now
+        mined.append(receipt)
+    TransactionReceipt.objects.bulk_update(mined, ['status', 'block_number', 'gas_used', 'updated_at'])
+    return len(mined)
+
+
+def get_receipts(tx_hashes):
+    """{tx_hash: receipt row} for the hashes that are tracked, in one query."""
+    hashes = {tx_hash.lower() for tx_hash in tx_hashes if tx_hash}
+    return {receipt.tx_hash: receipt for receipt in TransactionReceipt.objects.filter(tx_hash__in=hashes)}
+
+
+def get_receipt(tx_hash):
+    return get_receipts([tx_hash]).get(tx_hash.lower())
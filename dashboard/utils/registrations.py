@@ -0,0 +1,77 @@
+"""
+Local mirror of contract registrations.
+
+Registration rows are written as `registered` from indexed Registered
+events, and as `pending` while an adminRegister transaction we queued is in
+flight. Login and borrow flows read this table instead of calling
+registered() on the node, and a wallet only gets a new adminRegister when
+the previous one failed or reverted.
+"""
+from django.db import transaction
+from django.utils import timezone
+from web3 import Web3
+
+from dashboard.models import OutboundTransaction, Registration
+from dashboard.web3 import contract
+
+RETRY_STATUSES = (OutboundTransaction.FAILED, OutboundTransaction.REVERTED)
+
+
+def is_registered(wallet):
+    return Registration.objects.filter(
+        wallet=Web3.to_checksum_address(wallet),
+        status=Registration.REGISTERED,
+    ).exists()
+
+
+def ensure_registered(wallet):
+    """
+    Make sure `wallet` is, or is about to be, registered on the contract.
+    Returns its Registration row. The node is only asked right before an
+    adminRegister would be queued: the wallet may have registered before
+    the index started, or a previous attempt reverted because it already was.
+    """
+    # Imported here: tx_queue -> utils -> indexer -> this module
+    from dashboard.utils.tx_queue import enqueue
+
+    wallet = Web3.to_checksum_address(wallet)
+    registration, _ = Registration.objects.select_related('transaction').get_or_create(wallet=wallet)
+    if registration.status == Registration.REGISTERED:
+        return registration
+    if registration.transaction is not None and registration.transaction.status not in RETRY_STATUSES:
+        return registration
+    if contract.functions.registered(wallet).call():
+        registration.status = Registration.REGISTERED
+        registration.save(update_fields=['status', 'updated_at'])
+        return registration
+
+    with transaction.atomic():
+        # Write first so concurrent logins for the same wallet queue at most one adminRegister
+        Registration.objects.filter(pk=registration.pk).update(updated_at=timezone.now())
+        registration = Registration.objects.select_for_update().select_related('transaction').get(pk=registration.pk)
+        if registration.status == Registration.REGISTERED:
+            return registration
+        if registration.transaction is None or registration.transaction.status in RETRY_STATUSES:
+            registration.transaction = enqueue('admin_register_user', wallet, wallet=wallet)
+            registration.save(update_fields=['transaction', 'updated_at'])
+    return registration
+
+
+def registrations_stored(events):
+    """Indexer hook: mark wallets with a Registered event as registered."""
+    registered = {}
+    for event in events:
+        if event.event == 'Registered':
+            registered[event.wallet] = min(event.block_number, registered.get(event.wallet, event.block_number))
+    if not registered:
+        return
+    now = timezone.now()
+    Registration.objects.bulk_create(
+        [
+            Registration(wallet=wallet, status=Registration.REGISTERED, block_number=block, updated_at=now)
+            for wallet, block in registered.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['wallet'],
+        update_fields=['status', 'block_number', 'updated_at'],
+    )
@@ -0,0 +1,105 @@
+"""
+Resampling and downsampling for candle series.
+
+`resample` builds any interval from a finer base interval (open of the first
+candle, max high, min low, close of the last, summed volume), so charts are
+not tied to the intervals Binance happens to serve. `lttb` picks a bounded
+number of points with Largest-Triangle-Three-Buckets, which keeps the
+visual shape of the series (peaks and dips survive) instead of averaging it
+away.
+
+Both work on the flat array('d') layout of dashboard.utils.candles; NumPy is
+not a dependency of this project.
+"""
+import re
+from array import array
+
+from dashboard.utils.candles import CLOSE, FIELDS, HIGH, INTERVAL_MS, LOW, OPEN, OPEN_TIME, VOLUME, count
+
+UNIT_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+# Intervals kept in the candle store, coarsest first
+BASE_INTERVALS = ('1d', '4h', '1h', '15m', '1m')
+# The Unix epoch is a Thursday; Binance weeks open on Monday 00:00 UTC, four days later
+WEEK_OFFSET_MS = 4 * UNIT_MS['d']
+
+
+def parse_interval(interval):
+    """'90m' / '2h' / '3d' -> milliseconds. Raises ValueError on anything else."""
+    match = re.fullmatch(r'(\d+)([mhdw])', interval or '')
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"Invalid interval: {interval!r}")
+    return int(match.group(1)) * UNIT_MS[match.group(2)]
+
+
+def base_interval(target_ms):
+    """Coarsest stored interval that evenly divides `target_ms`."""
+    for interval in BASE_INTERVALS:
+        if target_ms % INTERVAL_MS[interval] == 0:
+            return interval
+    raise ValueError(f"Interval must be a whole number of minutes, got {target_ms} ms")
+
+
+def bucket_offset(target_ms):
+    """Where buckets of `target_ms` start relative to the epoch, matching Binance's kline boundaries."""
+    return WEEK_OFFSET_MS if target_ms % UNIT_MS['w'] == 0 else 0
+
+
+def resample(candles, target_ms):
+    """
+    Aggregate candles into buckets of `target_ms`. Minute, hour and day
+    buckets are aligned to the epoch and weeks start on Monday, as on Binance.
+    """
+    out = array('d')
+    if not count(candles):
+        return out
+    offset = bucket_offset(target_ms)
+    bucket = None
+    for i in range(0, len(candles), FIELDS):
+        start = candles[i + OPEN_TIME] - (candles[i + OPEN_TIME] - offset) % target_ms
+        if start != bucket:
+            bucket = start
+            out.extend((start, candles[i + OPEN], candles[i + HIGH], candles[i + LOW],
+                        candles[i + CLOSE], candles[i + VOLUME]))
+            continue
+        j = len(out) - FIELDS
+        if candles[i + HIGH] > out[j + HIGH]:
+            out[j + HIGH] = candles[i + HIGH]
+        if candles[i + LOW] < out[j + LOW]:
+            out[j + LOW] = candles[i + LOW]
+        out[j + CLOSE] = candles[i + CLOSE]
+        out[j + VOLUME] += candles[i + VOLUME]
+    return out
+
+
+def lttb(xs, ys, threshold):
+    """
+    Indexes of the points kept when reducing (xs, ys) to `threshold` points.
+    The first and last points are always kept.
+    """
+    n = len(xs)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return [0, n - 1]
+    selected = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third corner of the triangle
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
@@ -0,0 +1,55 @@
+"""
+Raw JSON-RPC batching against the Ethereum node.
+
+web3.py 6 has no batch support, so calls that would otherwise be one HTTP
+round trip each (block headers, receipts, eth_call) are sent here as a single
+JSON array per batch.
+"""
+import requests
+
+from dashboard.web3 import RPC_URL
+
+BATCH_SIZE = 100
+TIMEOUT = 30
+
+_session = requests.Session()
+
+
+class RPCError(Exception):
+    def __init__(self, method, error):
+        self.method = method
+        self.error = error
+        super().__init__(f"{method} failed: {error}")
+
+
+def batch_request(calls, raise_errors=True):
+    """
+    Send `calls`, a list of (method, params) pairs, as JSON-RPC batches and
+    return their results in the same order. With `raise_errors=False` a
+    failed call yields an RPCError in its slot instead of aborting the batch.
+    """
+    results = []
+    for offset in range(0, len(calls), BATCH_SIZE):
+        chunk = calls[offset:offset + BATCH_SIZE]
+        payload = [
+            {'jsonrpc': '2.0', 'id': i, 'method': method, 'params': params}
+            for i, (method, params) in enumerate(chunk)
+        ]
+        response = _session.post(RPC_URL, json=payload, timeout=TIMEOUT)
+        response.raise_for_status()
+        body = response.json()
+        if isinstance(body, dict):
+            # The whole batch was rejected (e.g. batch too large / rate limited)
+            raise RPCError('batch', body.get('error', body))
+        by_id = {entry['id']: entry for entry in body}
+        for i, (method, _) in enumerate(chunk):
+            entry = by_id.get(i)
+            if entry is None:
+                raise RPCError(method, 'missing response')
+            if 'error' in entry:
+                if raise_errors:
+                    raise RPCError(method, entry['error'])
+                results.append(RPCError(method, entry['error']))
+                continue
+            results.append(entry['result'])
+    return results
@@ -0,0 +1,75 @@
+"""
+Single-flight coalescing for expensive upstream refreshes.
+
+When many callers miss the same key at once, only one of them (the leader)
+runs the fetch. Callers in the same process wait on the leader and share its
+result. Other processes are kept out by a lock taken with `cache.add`, which
+is atomic in every Django cache backend that is shared between workers. They
+poll `recheck` (usually a cache read) until the leader has stored the value,
+or give up after `wait` seconds so the caller can fall back to stale data.
+"""
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+# Seconds a follower waits for the leader's result
+WAIT = 2.0
+POLL_INTERVAL = 0.05
+# Cross-process locks expire on their own if the leader dies mid-fetch
+LOCK_TTL = 30
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _lock_key(key):
+    return f"single_flight:{key}"
+
+
+def _poll(recheck, deadline):
+    while True:
+        value = recheck() if recheck else None
+        if value is not None or time.monotonic() >= deadline:
+            return value
+        time.sleep(POLL_INTERVAL)
+
+
+def run(key, fetch, recheck=None, wait=WAIT, lock_ttl=LOCK_TTL):
+    """
+    Run `fetch()` for `key` unless another caller already is. Returns the
+    leader's result, or `recheck()` (None if not given) when another process
+    held the lock and `wait` ran out.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        flight.done.wait(wait)
+        return flight.result
+
+    try:
+        token = uuid.uuid4().hex
+        if not cache.add(_lock_key(key), token, lock_ttl):
+            flight.result = _poll(recheck, time.monotonic() + wait)
+            return flight.result
+        try:
+            flight.result = fetch()
+        finally:
+            if cache.get(_lock_key(key)) == token:
+                cache.delete(_lock_key(key))
+        return flight.result
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
@@ -0,0 +1,213 @@
+"""
+Django cache backend stored in a local SQLite file.
+
+Every worker process on the host opens the same file, so a value fetched by
+one gunicorn worker is warm for all of them, and `cache.add` is atomic across
+processes (single-flight locks rely on that). No outside service is needed.
+
+Keys are grouped into namespaces by the part before their first ':'
+(`live_price:BTC` is in `live_price`; keys without a ':' share the default
+namespace). Each namespace can set its own default TIMEOUT and MAX_ENTRIES
+under OPTIONS['NAMESPACES']; when a namespace grows past its limit the least
+recently used entries are evicted.
+
+    CACHES = {'default': {
+        'BACKEND': 'dashboard.utils.sqlite_cache.SQLiteCache',
+        'LOCATION': BASE_DIR / 'data' / 'cache.sqlite3',
+        'OPTIONS': {'NAMESPACES': {'live_price': {'TIMEOUT': 30, 'MAX_ENTRIES': 5000}}},
+    }}
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_entries_lru ON cache_entries (namespace, accessed);
+"""
+# Reads only bump an entry's LRU position if it was last touched longer ago than this
+TOUCH_INTERVAL = 1.0
+BUSY_TIMEOUT = 5.0
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = Path(location)
+        self.namespaces = params.get('OPTIONS', {}).get('NAMESPACES', {})
+        self._local = threading.local()
+
+    # ---------- Connection ----------
+    def _connection(self):
+        # One connection per thread, reopened after a fork (gunicorn --preload)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # ---------- Namespaces ----------
+    @staticmethod
+    def namespace_of(key):
+        return key.split(':', 1)[0] if ':' in key else ''
+
+    def _namespace_option(self, namespace, name, default):
+        return self.namespaces.get(namespace, {}).get(name, default)
+
+    def _expires(self, key, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self._namespace_option(self.namespace_of(key), 'TIMEOUT', self.default_timeout)
+        if timeout is None:
+            return None
+        # Same convention as Django's backends: 0 or less means "expire now"
+        return time.time() + timeout if timeout > 0 else 0
+
+    def _namespace_limit(self, namespace):
+        # BaseCache reads the backend-wide OPTIONS['MAX_ENTRIES'] into self._max_entries
+        return self._namespace_option(namespace, 'MAX_ENTRIES', self._max_entries)
+
+    # ---------- Cache API ----------
+    def get(self, key, default=None, version=None):
+        db_key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT value, expires, accessed FROM cache_entries WHERE key = ?', (db_key,)
+        ).fetchone()
+        if row is None:
+            return default
+        value, expires, accessed = row
+        now = time.time()
+        if expires is not None and expires <= now:
+            conn.execute('DELETE FROM cache_entries WHERE key = ? AND expires <= ?', (db_key, now))
+            return default
+        if now - accessed > TOUCH_INTERVAL:
+            conn.execute('UPDATE cache_entries SET accessed = ? WHERE key = ?', (now, db_key))
+        return pickle.loads(value)
+
+    def get_many(self, keys, version=None):
+        db_keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not db_keys:
+            return {}
+        now = time.time()
+        placeholders = ','.join('?' * len(db_keys))
+        conn = self._connection()
+        rows = conn.execute(
+            f'SELECT key, value, accessed FROM cache_entries WHERE key IN ({placeholders}) AND (expires IS NULL OR expires > ?)',
+            (*db_keys, now),
+        ).fetchall()
+        touched = [db_key for db_key, _, accessed in rows if now - accessed > TOUCH_INTERVAL]
+        if touched:
+            conn.execute(
+                f"UPDATE cache_entries SET accessed = ? WHERE key IN ({','.join('?' * len(touched))})",
+                (now, *touched),
+            )
+        return {db_keys[db_key]: pickle.loads(value) for db_key, value, _ in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        db_key = self.make_and_validate_key(key, version=version)
+        namespace = self.namespace_of(key)
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, namespace, value, expires, accessed) VALUES (?, ?, ?, ?, ?)',
+            (db_key, namespace, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expires(key, timeout), time.time()),
+        )
+        self._cull(conn, namespace)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        rows = [
+            (self.make_and_validate_key(key, version=version), self.namespace_of(key),
+             pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expires(key, timeout), now)
+            for key, value in data.items()
+        ]
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'INSERT OR REPLACE INTO cache_entries (key, namespace, value, expires, accessed) VALUES (?, ?, ?, ?, ?)',
+                rows,
+            )
+        for namespace in {row[1] for row in rows}:
+            self._cull(conn, namespace)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Store only if the key is missing or expired, atomically across processes."""
+        db_key = self.make_and_validate_key(key, version=version)
+        namespace = self.namespace_of(key)
+        now = time.time()
+        conn = self._connection()
+        cursor = conn.execute(
+            'INSERT INTO cache_entries (key, namespace, value, expires, accessed) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires, '
+            'accessed = excluded.accessed WHERE cache_entries.expires IS NOT NULL AND cache_entries.expires <= ?',
+            (db_key, namespace, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expires(key, timeout), now, now),
+        )
+        added = cursor.rowcount == 1
+        if added:
+            self._cull(conn, namespace)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        db_key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        cursor = self._connection().execute(
+            'UPDATE cache_entries SET expires = ?, accessed = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self._expires(key, timeout), now, db_key, now),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        db_key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute('DELETE FROM cache_entries WHERE key = ?', (db_key,))
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        db_key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)', (db_key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entries')
+
+    def clear_namespace(self, namespace):
+        self._connection().execute('DELETE FROM cache_entries WHERE namespace = ?', (namespace,))
+
+    def close(self, **kwargs):
+        # Connections are per thread and reused across requests
+        pass
+
+    # ---------- Eviction ----------
+    def _cull(self, conn, namespace):
+        """Drop expired entries of `namespace`, then the least recently used ones above its limit."""
+        max_entries = self._namespace_limit(namespace)
+        total = conn.execute('SELECT COUNT(*) FROM cache_entries WHERE namespace = ?', (namespace,)).fetchone()[0]
+        if total <= max_entries:
+            return
+        conn.execute(
+            'DELETE FROM cache_entries WHERE namespace = ? AND expires IS NOT NULL AND expires <= ?',
+            (namespace, time.time()),
+        )
+        conn.execute(
+            'DELETE FROM cache_entries WHERE key IN ('
+            'SELECT key FROM cache_entries WHERE namespace = ? ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+            (namespace, max_entries),
+        )
@@ -0,0 +1,75 @@
+"""
+Stale-while-revalidate caching on top of the Django cache.
+
+Entries are stored with the time they were fetched. Until `soft_ttl` they are
+served as is; after that they are still served at once, but a refresh is
+started in the background. The entry only expires at `hard_ttl`, so an
+upstream outage shorter than that costs stale numbers instead of an error
+page. Failed fetches (None or an exception) never overwrite a good value.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+
+from dashboard.utils import single_flight
+
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='swr')
+# Keys with a background refresh in flight in this process
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _fetch_and_store(key, fetch, hard_ttl):
+    try:
+        value = fetch()
+    except Exception as e:
+        print(f"[EXCEPTION] Refreshing {key} failed: {str(e)}")
+        return None
+    if value is not None:
+        cache.set(key, {'value': value, 'fetched_at': time.time()}, hard_ttl)
+    return value
+
+
+def _cached_value(key):
+    entry = cache.get(key)
+    return entry['value'] if entry is not None else None
+
+
+def _refresh(key, fetch, hard_ttl):
+    try:
+        # Another worker already refreshing this key is enough; keep serving the stale value
+        single_flight.run(key, lambda: _fetch_and_store(key, fetch, hard_ttl), wait=0)
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def refresh_in_background(key, fetch, hard_ttl):
+    """Start a refresh of `key` unless one is already running in this process."""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+    _pool.submit(_refresh, key, fetch, hard_ttl)
+    return True
+
+
+def get_or_refresh(key, fetch, soft_ttl, hard_ttl):
+    """
+    Cached value of `fetch()` under `key`. Only a cold (or hard-expired) key
+    waits for the upstream; returns None if that fetch fails or another
+    worker's fetch does not land in time.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        # Concurrent cold misses share one upstream call
+        return single_flight.run(
+            key,
+            lambda: _fetch_and_store(key, fetch, hard_ttl),
+            recheck=lambda: _cached_value(key),
+        )
+    if time.time() - entry['fetched_at'] >= soft_ttl:
+        refresh_in_background(key, fetch, hard_ttl)
+    return entry['value']
@@ -0,0 +1,170 @@
+"""
+Durable queue for contract writes signed by the backend wallet.
+
+Views call `enqueue` and return straight away; the `process_tx_queue`
+worker signs and sends queued rows in order and then follows their
+receipts (see receipts.py). Each OutboundTransaction row moves through:
+
+    queued -> sending -> sent -> confirmed | reverted
+    queued -> sending -> failed (the send itself raised)
+
+A worker that dies mid-send leaves its row in `sending`; `recover_stuck`
+settles such rows from the nonce recorded on them.
+"""
+from django.utils import timezone
+
+from dashboard.models import NonceReservation, OutboundTransaction, TransactionReceipt
+from dashboard.utils.nonces import STALE_AFTER, nonce_used, release_nonce, reserving_for
+from dashboard.utils.receipts import get_receipts, poll_receipts, track_transaction
+from dashboard.utils.utils import (
+    admin_register_user,
+    approve_virtual_funds,
+    buy_coin,
+    reject_virtual_funds,
+    repay_virtual_funds,
+    request_virtual_funds_for,
+    sell_coin,
+)
+
+ACTIONS = {
+    'admin_register_user': admin_register_user,
+    'approve_virtual_funds': approve_virtual_funds,
+    'buy_coin': buy_coin,
+    'reject_virtual_funds': reject_virtual_funds,
+    'repay_virtual_funds': repay_virtual_funds,
+    'request_virtual_funds_for': request_virtual_funds_for,
+    'sell_coin': sell_coin,
+}
+BATCH_SIZE = 20
+# A row still `sending` after this long belongs to a worker that died (sends take seconds).
+# Kept well under STALE_AFTER so the dead worker's reservation is normally still in place.
+STUCK_AFTER = STALE_AFTER / 2
+
+
+def enqueue(action, *args, wallet=''):
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown transaction action: {action}")
+    return OutboundTransaction.objects.create(action=action, args=list(args), wallet=wallet)
+
+
+def claim_queued(limit=BATCH_SIZE):
+    """Move up to `limit` queued rows to `sending`. Rows claimed by another worker are skipped."""
+    ids = list(
+        OutboundTransaction.objects
+        .filter(status=OutboundTransaction.QUEUED)
+        .order_by('id')
+        .values_list('id', flat=True)[:limit]
+    )
+    claimed = []
+    for tx_id in ids:
+        # Conditional update, so only one worker wins each row
+        if OutboundTransaction.objects.filter(id=tx_id, status=OutboundTransaction.QUEUED).update(
+            status=OutboundTransaction.SENDING,
+            updated_at=timezone.now(),
+        ):
+            claimed.append(tx_id)
+    return list(OutboundTransaction.objects.filter(id__in=claimed).order_by('id'))
+
+
+def send_queued(limit=BATCH_SIZE):
+    """Sign and send queued transactions in FIFO order. Returns the number sent."""
+    sent = 0
+    for tx in claim_queued(limit):
+        try:
+            with reserving_for(tx):
+                result = ACTIONS[tx.action](*tx.args)
+        except Exception as e:
+            tx.status = OutboundTransaction.FAILED
+            tx.error = str(e)
+        else:
+            # Helpers that validate first (approve_virtual_funds) return a message instead of a hash
+            if isinstance(result, str) and result.startswith('0x'):
+                tx.status = OutboundTransaction.SENT
+                tx.tx_hash = result
+                sent += 1
+            else:
+                tx.status = OutboundTransaction.FAILED
+                tx.error = str(result)
+        tx.save(update_fields=['status', 'tx_hash', 'error', 'updated_at'])
+    return sent
+
+
+def recover_stuck(older_than=STUCK_AFTER):
+    """
+    Settle rows left in `sending` by a dead worker without sending anything twice:
+
+    - no nonce was ever reserved for it: nothing was signed, so it is requeued
+    - its nonce reservation is still linked to it and marked sent: the row
+      becomes `sent` with that hash
+    - otherwise (reserved, released, reused or gone) it is requeued only if
+      the node has no transaction with that nonce; if it has one, that may be
+      the lost send, so the row is failed for a person to check
+
+    Returns the number of rows settled.
+    """
+    stuck = OutboundTransaction.objects.filter(
+        status=OutboundTransaction.SENDING,
+        updated_at__lt=timezone.now() - older_than,
+    ).order_by('id')
+    settled = 0
+    for tx in stuck:
+        # A requeued row starts over; the next send records its own nonce
+        changes = {'status': OutboundTransaction.QUEUED, 'signer': '', 'nonce': None}
+        if tx.nonce is not None:
+            reservation = NonceReservation.objects.filter(address=tx.signer, nonce=tx.nonce).first()
+            if reservation is not None and reservation.outbound_id == tx.id and reservation.status == NonceReservation.SENT:
+                track_transaction(reservation.tx_hash)
+                changes = {'status': OutboundTransaction.SENT, 'tx_hash': reservation.tx_hash}
+            elif nonce_used(tx.signer, tx.nonce):
+                changes = {
+                    'status': OutboundTransaction.FAILED,
+                    'error': f"Worker stopped mid-send; nonce {tx.nonce} may have been used by this transaction",
+                }
+            elif reservation is not None and reservation.outbound_id == tx.id:
+                release_nonce(tx.signer, tx.nonce)
+        # Conditional, in case the original worker finished after all
+        settled += OutboundTransaction.objects.filter(id=tx.id, status=OutboundTransaction.SENDING).update(
+            updated_at=timezone.now(), **changes
+        )
+    return settled
+
+
+def sync_receipts():
+    """
+    Poll receipts for everything in flight and copy the mined ones onto sent
+    queue rows. Returns the number of queue rows updated.
+    """
+    poll_receipts()
+    sent = {tx.tx_hash.lower(): tx for tx in OutboundTransaction.objects.filter(status=OutboundTransaction.SENT)}
+    updated = []
+    now = timezone.now()
+    for tx_hash, receipt in get_receipts(sent).items():
+        if receipt.status == TransactionReceipt.PENDING:
+            continue
+        tx = sent[tx_hash]
+        tx.status = OutboundTransaction.CONFIRMED if receipt.status == TransactionReceipt.SUCCESS else OutboundTransaction.REVERTED
+        tx.block_number = receipt.block_number
+        tx.gas_used = receipt.gas_used
+        tx.updated_at = now
+        updated.append(tx)
+    OutboundTransaction.objects.bulk_update(updated, ['status', 'block_number', 'gas_used', 'updated_at'])
+    return len(updated)
+
+
+def get_status(tx_id, wallet=None):
+    """Status dict for a queued transaction, or None if it does not exist (or belongs to another wallet)."""
+    txs = OutboundTransaction.objects.filter(id=tx_id)
+    if wallet is not None:
+        txs = txs.filter(wallet=wallet)
+    tx = txs.first()
+    if tx is None:
+        return None
+    return {
+        'id': tx.id,
+        'action': tx.action,
+        'status': tx.status,
+        'tx_hash': tx.tx_hash or None,
+        'block_number': tx.block_number,
+        'gas_used': tx.gas_used,
+        'error': tx.error or None,
+    }
@@ -0,0 +1,67 @@
+"""
+Shared HTTP client for market-data upstreams (Binance, CoinGecko).
+
+Every host gets one requests.Session with a keep-alive connection pool, so
+repeated calls reuse TCP+TLS connections instead of handshaking each time.
+GETs have default connect/read timeouts, ask for gzip, and are retried with
+jittered exponential backoff on connection errors, timeouts and
+429/5xx responses.
+"""
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.3
+BACKOFF_MAX = 5.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POOL_SIZE = 20
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def get_session(url):
+    host = urlsplit(url).netloc
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({
+                'Accept': 'application/json',
+                'Accept-Encoding': 'gzip, deflate',
+            })
+            _sessions[host] = session
+    return session
+
+
+def _backoff(attempt, response=None):
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAX)
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def get(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, retries=MAX_RETRIES):
+    """GET `url` through the pooled session for its host. Returns the last response."""
+    session = get_session(url)
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(_backoff(attempt))
+            continue
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        time.sleep(_backoff(attempt, response))
@@ -1,7 +1,48 @@
-from dashboard.web3 import PRIVATE_KEY, WALLET_ADDRESS, contract, web3
+from dashboard.models import Registration
+from dashboard.utils.cost_basis import get_cost_basis
+from dashboard.utils.indexer import get_user_trades
+from dashboard.utils.nonces import mark_sent, release_nonce, reserve_nonce, resync_nonce
+from dashboard.utils.receipts import track_transaction
+from dashboard.utils.rpc import RPCError, batch_request
+from dashboard.web3 import MULTICALL3_ADDRESS, PRIVATE_KEY, WALLET_ADDRESS, contract, web3
+from eth_abi import decode, encode
 from web3 import Web3
 from decimal import Decimal, getcontext
 getcontext().prec = 18
+# ---------- Signing ----------
+GAS_PRICE_GWEI = '20'
+CHAIN_ID = 11155111
+# Node errors meaning the nonce is already taken on chain
+NONCE_USED_MARKERS = ('nonce too low', 'already known', 'replacement transaction underpriced')
+
+def send_admin_transaction(contract_call, gas, sender=WALLET_ADDRESS):
+    """
+    Sign `contract_call` with the backend key and send it, using a nonce from
+    the shared allocator instead of get_transaction_count. If the node says
+    the nonce is already used, resync with the chain and try once more.
+    """
+    for attempt in range(2):
+        nonce = reserve_nonce(WALLET_ADDRESS)
+        try:
+            txn = contract_call.build_transaction({
+                'from': sender,
+                'nonce': nonce,
+                'gas': gas,
+                'gasPrice': web3.to_wei(GAS_PRICE_GWEI, 'gwei'),
+                'chainId': CHAIN_ID
+            })
+            signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
+            tx_hash = web3.to_hex(web3.eth.send_raw_transaction(signed_txn.raw_transaction))
+        except Exception as e:
+            release_nonce(WALLET_ADDRESS, nonce)
+            if attempt == 0 and any(marker in str(e).lower() for marker in NONCE_USED_MARKERS):
+                resync_nonce(WALLET_ADDRESS)
+                continue
+            raise
+        mark_sent(WALLET_ADDRESS, nonce, tx_hash)
+        track_transaction(tx_hash)
+        return tx_hash
+
 # ---------- Borrow / Approval ----------
 def is_user_registered(user_address):
     user_address = Web3.to_checksum_address(user_address)
@@ -12,139 +53,48 @@ def is_user_registered(user_address):
         return False
 
 def get_all_pending_requests():
-    addresses = contract.functions.getRegisteredUsers().call({'from': Web3.to_checksum_address(WALLET_ADDRESS)})
-    pending = []
-    for addr in addresses:
-        addr = Web3.to_checksum_address(addr)
-        amount = contract.functions.pendingRequests(addr).call({'from': Web3.to_checksum_address(WALLET_ADDRESS)})
-        if amount > 0:
-            pending.append({"wallet": addr, "amount": amount})
-    return pending
+    # One admin-only view call instead of pendingRequests(addr) per registered user
+    addresses, amounts = contract.functions.getAllPendingRequests().call({'from': Web3.to_checksum_address(WALLET_ADDRESS)})
+    return [
+        {"wallet": Web3.to_checksum_address(addr), "amount": amount}
+        for addr, amount in zip(addresses, amounts)
+    ]
 
 def request_virtual_funds(amount):
-    nonce = web3.eth.get_transaction_count(WALLET_ADDRESS)
-    txn = contract.functions.requestVirtualUSD(amount).build_transaction({
-        'from': WALLET_ADDRESS,
-        'nonce': nonce,
-        'gas': 200000,
-        'gasPrice': web3.to_wei('20', 'gwei'),
-        'chainId': 11155111
-    })
-    signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-    tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-    return web3.to_hex(tx_hash)
+    return send_admin_transaction(contract.functions.requestVirtualUSD(amount), gas=200000)
 
 def request_virtual_funds_for(user_address, amount):
     user_address = Web3.to_checksum_address(user_address)
-    nonce = web3.eth.get_transaction_count(WALLET_ADDRESS)
-    txn = contract.functions.requestVirtualUSDFor(user_address, amount).build_transaction({
-        'from': WALLET_ADDRESS,
-        'nonce': nonce,
-        'gas': 200000,
-        'gasPrice': web3.to_wei('20', 'gwei'),
-        'chainId': 11155111
-    })
-    signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-    tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-    return web3.to_hex(tx_hash)
+    return send_admin_transaction(contract.functions.requestVirtualUSDFor(user_address, amount), gas=200000)
 
 def approve_virtual_funds(user_address):
     user_address = Web3.to_checksum_address(user_address)
-    nonce = web3.eth.get_transaction_count(WALLET_ADDRESS)
-
     try:
         contract.functions.approveFunds(user_address).estimate_gas({'from': WALLET_ADDRESS})
     except Exception as e:
         error_message = str(e)
         return f"Gas estimation failed: {error_message}"
 
-    txn = contract.functions.approveFunds(user_address).build_transaction({
-        'from': WALLET_ADDRESS,
-        'nonce': nonce,
-        'gas': 300000,
-        'gasPrice': web3.to_wei('20', 'gwei'),
-        'chainId': 11155111
-    })
-    signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-    tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-    return web3.to_hex(tx_hash)
+    return send_admin_transaction(contract.functions.approveFunds(user_address), gas=300000)
 
 def reject_virtual_funds(user_address):
     user_address = Web3.to_checksum_address(user_address)
-    nonce = web3.eth.get_transaction_count(WALLET_ADDRESS)
-    txn = contract.functions.rejectFunds(user_address).build_transaction({
-        'from': WALLET_ADDRESS,
-        'nonce': nonce,
-        'gas': 100000,
-        'gasPrice': web3.to_wei('20', 'gwei'),
-        'chainId': 11155111
-    })
-    signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-    tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-    return web3.to_hex(tx_hash)
+    return send_admin_transaction(contract.functions.rejectFunds(user_address), gas=100000)
 
 def repay_virtual_funds(user_wallet, amount):
     user_wallet = Web3.to_checksum_address(user_wallet)
-    nonce = web3.eth.get_transaction_count(WALLET_ADDRESS)
-    txn = contract.functions.repayBorrowedAmount(amount).build_transaction({
-        'from': user_wallet,
-        'nonce': nonce,
-        'gas': 150000,
-        'gasPrice': web3.to_wei('20', 'gwei'),
-        'chainId': 11155111
-    })
-    signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-    tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-    return web3.to_hex(tx_hash)
+    return send_admin_transaction(contract.functions.repayBorrowedAmount(amount), gas=150000, sender=user_wallet)
 
 # ---------- Coin Trading ----------
 def buy_coin(user_wallet, symbol, price, quantity):
     symbol = symbol.upper()
     user_wallet = Web3.to_checksum_address(user_wallet)
-    nonce = web3.eth.get_transaction_count(WALLET_ADDRESS)
-    # Debug: Check registration and balance before transaction
-    try:
-        is_registered = contract.functions.registered(user_wallet).call()
-    except Exception as e:
-        pass
-    try:
-        usd_balance = contract.functions.getUSDBalance(user_wallet).call()
-    except Exception as e:
-        pass
-    try:
-        holdings = contract.functions.getUserHoldings(user_wallet).call()
-    except Exception as e:
-        pass
-    txn = contract.functions.buyCoinFor(user_wallet, symbol, int(price), quantity).build_transaction({
-        'from': WALLET_ADDRESS,
-        'nonce': nonce,
-        'gas': 250000,
-        'gasPrice': web3.to_wei('20', 'gwei'),
-        'chainId': 11155111
-    })
-    signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-    tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-    # Debug: Check holdings after buy (may need to wait for confirmation in production)
-    try:
-        holdings_after = contract.functions.getUserHoldings(user_wallet).call()
-    except Exception as e:
-        pass
-    return web3.to_hex(tx_hash)
+    return send_admin_transaction(contract.functions.buyCoinFor(user_wallet, symbol, int(price), quantity), gas=250000)
 
 def sell_coin(user_wallet, symbol, price, quantity):
     symbol = symbol.upper()
     user_wallet = Web3.to_checksum_address(user_wallet)
-    nonce = web3.eth.get_transaction_count(WALLET_ADDRESS)
-    txn = contract.functions.sellCoinFor(user_wallet, symbol, int(price), quantity).build_transaction({
-        'from': WALLET_ADDRESS,
-        'nonce': nonce,
-        'gas': 250000,
-        'gasPrice': web3.to_wei('20', 'gwei'),
-        'chainId': 11155111
-    })
-    signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-    tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-    return web3.to_hex(tx_hash)
+    return send_admin_transaction(contract.functions.sellCoinFor(user_wallet, symbol, int(price), quantity), gas=250000)
 
 # ---------- Watchlist ----------
 def add_to_watchlist(user_address, symbol):
@@ -214,75 +164,150 @@ def get_transaction_history(user_wallet):
     user_wallet = Web3.to_checksum_address(user_wallet)
     return contract.functions.getTransactionHistory().call({'from': user_wallet})
 
+# ---------- Batched Reads ----------
+AGGREGATE3_SELECTOR = bytes.fromhex('82ad56cb')  # aggregate3((address,bool,bytes)[])
+_multicall_deployed = None
+
+def _abi_type(item):
+    if item['type'].startswith('tuple'):
+        return '(' + ','.join(_abi_type(component) for component in item['components']) + ')' + item['type'][len('tuple'):]
+    return item['type']
+
+def _decode_output(fn_name, data):
+    outputs = contract.get_function_by_name(fn_name).abi['outputs']
+    values = list(decode([_abi_type(item) for item in outputs], data))
+    for i, item in enumerate(outputs):
+        # Match web3's .call(), which returns checksummed addresses
+        if item['type'] == 'address':
+            values[i] = Web3.to_checksum_address(values[i])
+        elif item['type'] == 'address[]':
+            values[i] = [Web3.to_checksum_address(addr) for addr in values[i]]
+    return values[0] if len(values) == 1 else values
+
+def _multicall_available():
+    global _multicall_deployed
+    if _multicall_deployed is None:
+        _multicall_deployed = bool(MULTICALL3_ADDRESS) and len(web3.eth.get_code(Web3.to_checksum_address(MULTICALL3_ADDRESS))) > 0
+    return _multicall_deployed
+
+def batch_view_calls(calls, block_identifier=None, raise_errors=True):
+    """
+    Run several contract view calls in one round trip, pinned to one block.
+
+    `calls` is a list of (function_name, args) or (function_name, args, caller)
+    tuples; `caller` sets msg.sender for functions such as getTransactionHistory.
+    Results are decoded and returned in order. Calls go through one Multicall3
+    aggregate3 when a deployment exists and no call needs its own caller,
+    otherwise through a single JSON-RPC batch of eth_call. With
+    `raise_errors=False` a failed call yields None instead of raising.
+    """
+    if not calls:
+        return []
+    if block_identifier is None:
+        block_identifier = web3.eth.block_number
+    block = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+    encoded = [contract.encodeABI(fn_name=call[0], args=list(call[1])) for call in calls]
+    callers = [call[2] if len(call) > 2 else None for call in calls]
+
+    if not any(callers) and _multicall_available():
+        payload = AGGREGATE3_SELECTOR + encode(
+            ['(address,bool,bytes)[]'],
+            [[(contract.address, True, bytes.fromhex(data[2:])) for data in encoded]],
+        )
+        raw = web3.eth.call({'to': Web3.to_checksum_address(MULTICALL3_ADDRESS), 'data': Web3.to_hex(payload)}, block_identifier)
+        returned = decode(['(bool,bytes)[]'], bytes(raw))[0]
+        results = []
+        for (fn_name, *_), (success, data) in zip(calls, returned):
+            if not success:
+                if raise_errors:
+                    raise RPCError(fn_name, f"call reverted: {Web3.to_hex(data)}")
+                results.append(None)
+                continue
+            results.append(_decode_output(fn_name, data))
+        return results
+
+    rpc_calls = []
+    for data, caller in zip(encoded, callers):
+        tx = {'to': contract.address, 'data': data}
+        if caller:
+            tx['from'] = Web3.to_checksum_address(caller)
+        rpc_calls.append(('eth_call', [tx, block]))
+    results = []
+    for (fn_name, *_), raw in zip(calls, batch_request(rpc_calls, raise_errors=raise_errors)):
+        results.append(None if isinstance(raw, RPCError) else _decode_output(fn_name, bytes.fromhex(raw[2:])))
+    return results
+
+def get_user_state(user_wallet, block_identifier=None):
+    """Balance, borrowed amount, watchlist, holdings and history of a wallet in one round trip."""
+    user_wallet = Web3.to_checksum_address(user_wallet)
+    usd_balance, borrowed, watchlist, holdings, history = batch_view_calls([
+        ('getUSDBalance', [user_wallet]),
+        ('getBorrowedAmount', [user_wallet]),
+        ('getWatchlist', [user_wallet]),
+        ('getUserHoldings', [user_wallet]),
+        ('getTransactionHistory', [], user_wallet),
+    ], block_identifier=block_identifier, raise_errors=False)
+    return {
+        'usd_balance': usd_balance,
+        'borrowed': borrowed,
+        'watchlist': watchlist,
+        'holdings': list(zip(*holdings)) if holdings else [],
+        'transactions': history,
+    }
+
 # ---------- Registration ----------
 def register_user():
-    nonce = web3.eth.get_transaction_count(WALLET_ADDRESS)
-    txn = contract.functions.register().build_transaction({
-        'from': WALLET_ADDRESS,
-        'nonce': nonce,
-        'gas': 100000,
-        'gasPrice': web3.to_wei('20', 'gwei'),
-        'chainId': 11155111
-    })
-    signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-    tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-    return web3.to_hex(tx_hash)
+    return send_admin_transaction(contract.functions.register(), gas=100000)
 
 def admin_register_user(user_address):
     user_address = Web3.to_checksum_address(user_address)
-    nonce = web3.eth.get_transaction_count(WALLET_ADDRESS)
-    txn = contract.functions.adminRegister(user_address).build_transaction({
-        'from': WALLET_ADDRESS,
-        'nonce': nonce,
-        'gas': 200000,
-        'gasPrice': web3.to_wei('20', 'gwei'),
-        'chainId': 11155111
-    })
-    signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-    tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-    return web3.to_hex(tx_hash)
+    return send_admin_transaction(contract.functions.adminRegister(user_address), gas=200000)
 
-def get_all_registered_users():
-    addresses = set()
-    try:
-        user_list = contract.functions.getRegisteredUsers().call({'from': WALLET_ADDRESS})
-        for addr in user_list:
-            addresses.add(Web3.to_checksum_address(addr))
-    except Exception as e:
-        pass
+def get_registered_wallets():
+    return list(
+        Registration.objects
+        .filter(status=Registration.REGISTERED)
+        .order_by('wallet')
+        .values_list('wallet', flat=True)
+    )
 
-    try:
-        i = 0
-        while True:
-            addr = contract.functions.registeredUsers(i).call()
-            addresses.add(Web3.to_checksum_address(addr))
-            i += 1
-    except Exception:
-        pass
+def get_all_registered_users(verify=False):
+    """
+    Registered wallets from the local registry (fed by Registered events and
+    reconcile_registered_users). With `verify=True` the list is audited
+    against registered(addr) in one batched round trip and only confirmed
+    wallets are returned.
+    """
+    wallets = get_registered_wallets()
+    if verify:
+        results = batch_view_calls([('registered', [wallet]) for wallet in wallets], raise_errors=False)
+        wallets = [wallet for wallet, registered in zip(wallets, results) if registered]
+    return wallets
 
-    registered = []
-    for addr in addresses:
-        try:
-            if contract.functions.registered(addr).call():
-                registered.append(addr)
-        except Exception:
-            continue
-    return registered
+def reconcile_registered_users():
+    """Add wallets from one getRegisteredUsers() call that the registry is missing. Returns how many were added."""
+    addresses = {
+        Web3.to_checksum_address(addr)
+        for addr in contract.functions.getRegisteredUsers().call({'from': WALLET_ADDRESS})
+    }
+    known = set(
+        Registration.objects
+        .filter(wallet__in=addresses, status=Registration.REGISTERED)
+        .values_list('wallet', flat=True)
+    )
+    missing = addresses - known
+    Registration.objects.bulk_create(
+        [Registration(wallet=wallet, status=Registration.REGISTERED) for wallet in missing],
+        update_conflicts=True,
+        unique_fields=['wallet'],
+        update_fields=['status', 'updated_at'],
+    )
+    return len(missing)
 
 # ---------- Admin Update (Optional) ----------
 def update_admin(new_admin_address):
     new_admin_address = Web3.to_checksum_address(new_admin_address)
-    nonce = web3.eth.get_transaction_count(WALLET_ADDRESS)
-    txn = contract.functions.updateAdmin(new_admin_address).build_transaction({
-        'from': WALLET_ADDRESS,
-        'nonce': nonce,
-        'gas': 100000,
-        'gasPrice': web3.to_wei('20', 'gwei'),
-        'chainId': 11155111
-    })
-    signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-    tx_hash = web3.eth.send_raw_transaction(signed_txn.raw_transaction)
-    return web3.to_hex(tx_hash)
+    return send_admin_transaction(contract.functions.updateAdmin(new_admin_address), gas=100000)
 def get_user_holdings(user_wallet):
     user_wallet = Web3.to_checksum_address(user_wallet)
     symbols, amounts = contract.functions.getUserHoldings(user_wallet).call()
@@ -300,146 +325,159 @@ def get_coin_holdings(user_wallet):
     return holdings
 def get_avg_buy_price(user_wallet, symbol):
     """
-    Calculates average buy price based on CoinBought event logs (chunked for provider limits).
+    Average buy price from the running CoinBought aggregates kept by the indexer.
     """
-    from web3 import Web3
-    DEPLOY_BLOCK = 8819605  # Set this to your contract's actual deploy block
-    latest_block = web3.eth.block_number
-    chunk_size = 500
-    total_quantity = Decimal("0.0")
-    total_spent = Decimal("0.0")
-    user_wallet = Web3.to_checksum_address(user_wallet)
-    for start in range(DEPLOY_BLOCK, latest_block + 1, chunk_size):
-        end = min(start + chunk_size - 1, latest_block)
-        try:
-            buy_logs = contract.events.CoinBought().get_logs(from_block=start, to_block=end, argument_filters={'user': user_wallet})
-            for event in buy_logs:
-                event_symbol = event['args']['symbol'].upper()
-                if event_symbol != symbol.upper():
-                    continue
-                quantity = Decimal(str(event['args']['quantity']))
-                # Prefer totalCost if available, else fallback to pricePerToken * quantity
-                if 'totalCost' in event['args']:
-                    spent = Decimal(str(event['args']['totalCost'])) / Decimal('100')
-                elif 'pricePerToken' in event['args']:
-                    spent = quantity * (Decimal(str(event['args']['pricePerToken'])) / Decimal('100'))
-                else:
-                    spent = quantity
-                total_quantity += quantity
-                total_spent += spent
-        except Exception as e:
-            pass
-    if total_quantity > 0:
-        return float(total_spent / total_quantity)
+    basis = get_cost_basis(user_wallet, symbol)
+    if basis and basis.total_quantity > 0:
+        return float((basis.total_spent / Decimal('100')) / basis.total_quantity)
     return 0.0
 
 # ---------- Live Price Fetcher ----------
-import requests
-def get_live_price(symbol):
-    symbol = symbol.upper()
-    # Try Binance API first
-    binance_map = {
-        'BNB': 'BNBUSDT',
-        'USDT': 'USDTUSDT',
-        'XRP': 'XRPUSDT',
-        'SOL': 'SOLUSDT',
-        'BTC': 'BTCUSDT',
-        'ETH': 'ETHUSDT',
-        'STETH': 'STETHUSDT',
-        'ADA': 'ADAUSDT',
-        'DOGE': 'DOGEUSDT',
-        'DOT': 'DOTUSDT',
-        'MATIC': 'MATICUSDT',
-        'CRV': 'CRVUSDT',
-        # Add more mappings as needed
-    }
-    binance_symbol = binance_map.get(symbol, f"{symbol}USDT")  # Default to symbol + USDT
-    url = f'https://api.binance.com/api/v3/ticker/price?symbol={binance_symbol}'
+import json
+from dashboard.utils import single_flight, upstream
+from dashboard.utils.coin_catalog import resolve_coins
+from django.core.cache import cache
+
+PRICE_CACHE_TTL = 15  # seconds, shared by every view through the Django cache
+BINANCE_MAP = {
+    'BNB': 'BNBUSDT',
+    'XRP': 'XRPUSDT',
+    'SOL': 'SOLUSDT',
+    'BTC': 'BTCUSDT',
+    'ETH': 'ETHUSDT',
+    'STETH': 'STETHUSDT',
+    'ADA': 'ADAUSDT',
+    'DOGE': 'DOGEUSDT',
+    'DOT': 'DOTUSDT',
+    'MATIC': 'MATICUSDT',
+    'CRV': 'CRVUSDT',
+    # Add more mappings as needed
+}
+# Quote currencies have no <SYMBOL>USDT pair; one invalid pair fails the whole Binance batch
+BINANCE_UNLISTED = {'USDT', 'USD'}
+# Pairs Binance lists, learned from the full ticker after a batch was rejected
+BINANCE_PAIRS_KEY = 'binance_listed_pairs'
+BINANCE_PAIRS_TTL = 60 * 60
+COINGECKO_MAP = {
+    'BNB': 'binancecoin',
+    'USDT': 'tether',
+    'XRP': 'ripple',
+    'SOL': 'solana',
+    'BTC': 'bitcoin',
+    'ETH': 'ethereum',
+    'STETH': 'staked-ether',
+    'ADA': 'cardano',
+    'DOGE': 'dogecoin',
+    'DOT': 'polkadot',
+    'MATIC': 'matic-network',
+    'CRV': 'curve-dao-token',
+    # Add more mappings as needed
+}
+
+def _fetch_binance_prices(symbols):
+    pairs = {BINANCE_MAP.get(symbol, f"{symbol}USDT"): symbol for symbol in symbols if symbol not in BINANCE_UNLISTED}
+    listed = cache.get(BINANCE_PAIRS_KEY)
+    if listed is not None:
+        pairs = {pair: symbol for pair, symbol in pairs.items() if pair in listed}
+    if not pairs:
+        return {}
+    url = 'https://api.binance.com/api/v3/ticker/price'
     try:
-        resp = requests.get(url, timeout=5)
-        data = resp.json()
-        return float(data['price'])
+        resp = upstream.get(url, params={'symbols': json.dumps(list(pairs), separators=(',', ':'))})
+        if resp.status_code == 400:
+            # One unlisted pair fails the whole batch (-1121 Invalid symbol) without saying which.
+            # Price from the full ticker instead and remember which pairs exist for later batches.
+            resp = upstream.get(url)
+            resp.raise_for_status()
+            items = resp.json()
+            cache.set(BINANCE_PAIRS_KEY, {item['symbol'] for item in items}, BINANCE_PAIRS_TTL)
+        else:
+            resp.raise_for_status()
+            items = resp.json()
+        return {pairs[item['symbol']]: float(item['price']) for item in items if item['symbol'] in pairs}
     except Exception as e:
-        print(f"[get_live_price] Binance API error: {e}")
-    # Fallback to CoinGecko
-    coingecko_map = {
-        'BNB': 'binancecoin',
-        'USDT': 'tether',
-        'XRP': 'ripple',
-        'SOL': 'solana',
-        'BTC': 'bitcoin',
-        'ETH': 'ethereum',
-        'STETH': 'staked-ether',
-        'ADA': 'cardano',
-        'DOGE': 'dogecoin',
-        'DOT': 'polkadot',
-        'MATIC': 'matic-network',
-        'CRV': 'curve-dao-token',
-        # Add more mappings as needed
-    }
-    coingecko_id = coingecko_map.get(symbol, symbol.lower())  # Default to lowercase symbol
-    url = f'https://api.coingecko.com/api/v3/simple/price?ids={coingecko_id}&vs_currencies=usd'
+        print(f"[get_live_prices] Binance API error: {e}")
+    return {}
+
+def _coingecko_ids(symbols):
+    """{coingecko_id: SYMBOL}, resolved through the Coin catalog for symbols outside COINGECKO_MAP."""
+    catalog = resolve_coins([symbol for symbol in symbols if symbol not in COINGECKO_MAP])
+    ids = {}
+    for symbol in symbols:
+        coin_id = COINGECKO_MAP.get(symbol) or (catalog.get(symbol) or {}).get('id') or symbol.lower()
+        ids[coin_id] = symbol
+    return ids
+
+def _fetch_coingecko_prices(symbols):
+    """Prices from CoinGecko, or None if the request itself failed."""
+    ids = _coingecko_ids(symbols)
+    url = 'https://api.coingecko.com/api/v3/simple/price'
     try:
-        resp = requests.get(url, timeout=5)
+        resp = upstream.get(url, params={'ids': ','.join(ids), 'vs_currencies': 'usd'})
+        resp.raise_for_status()
         data = resp.json()
-        return float(data[coingecko_id]['usd'])
+        return {symbol: float(data[coin_id]['usd']) for coin_id, symbol in ids.items() if 'usd' in data.get(coin_id, {})}
     except Exception as e:
-        print(f"[get_live_price] CoinGecko API error: {e}")
-    return 0.0
+        print(f"[get_live_prices] CoinGecko API error: {e}")
+    return None
 
-from datetime import datetime
-from web3 import Web3
+def _fetch_live_prices(symbols, keys):
+    fetched = _fetch_binance_prices(symbols)
+    unpriced = [symbol for symbol in symbols if symbol not in fetched]
+    if unpriced:
+        coingecko_prices = _fetch_coingecko_prices(unpriced)
+        if coingecko_prices is not None:
+            # Symbols neither source knows are cached as 0.0 so they are not looked up on every request
+            fetched.update({symbol: coingecko_prices.get(symbol, 0.0) for symbol in unpriced})
+    cache.set_many({keys[symbol]: price for symbol, price in fetched.items()}, PRICE_CACHE_TTL)
+    return fetched
 
-def get_user_trade_events(user_wallet, contract, web3):
-    user_wallet = Web3.to_checksum_address(user_wallet)
-    DEPLOY_BLOCK = 8819605  # Set this to your contract's actual deploy block
-    # Use 'user' as the argument name, matching your event's indexed argument
-    # CoinBought: user is indexed, so we can filter
-    try:
-        buy_events = contract.events.CoinBought().get_logs(
-            from_block=DEPLOY_BLOCK,
-            to_block='latest',
-            argument_filters={'user': user_wallet}
+def _cached_prices(symbols, keys):
+    """Cached prices for `symbols`, or None until every one of them is cached."""
+    cached = cache.get_many([keys[symbol] for symbol in symbols])
+    if len(cached) < len(symbols):
+        return None
+    return {symbol: cached[keys[symbol]] for symbol in symbols}
+
+def get_live_prices(symbols):
+    """
+    Live USD prices for `symbols` as {SYMBOL: price}, 0.0 when unknown.
+    Cached prices are served first; the rest come from one Binance
+    ticker/price call and one CoinGecko simple/price call for whatever
+    Binance could not price.
+    """
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+    keys = {symbol: f"live_price:{symbol}" for symbol in symbols}
+    cached = cache.get_many(list(keys.values()))
+    prices = {symbol: cached[key] for symbol, key in keys.items() if key in cached}
+    missing = [symbol for symbol in symbols if symbol not in prices]
+    if missing:
+        # Requests missing the same symbols at once share one upstream round trip
+        fetched = single_flight.run(
+            'live_prices:' + ','.join(sorted(missing)),
+            lambda: _fetch_live_prices(missing, keys),
+            recheck=lambda: _cached_prices(missing, keys),
         )
-    except Exception as e:
-        buy_events = []
+        if fetched is None:
+            # Another worker's fetch did not land in time (e.g. CoinGecko is down and nothing was
+            # cached for some symbols): use what it did cache and fetch the rest here
+            cached = cache.get_many([keys[symbol] for symbol in missing])
+            fetched = {symbol: cached[keys[symbol]] for symbol in missing if keys[symbol] in cached}
+            fetched.update(_fetch_live_prices([symbol for symbol in missing if symbol not in fetched], keys))
+        prices.update(fetched)
+    return {symbol: prices.get(symbol, 0.0) for symbol in symbols}
 
-    # CoinSold: user is NOT indexed, so we CANNOT filter in the query
-    try:
-        latest_block = web3.eth.block_number
-        chunk_size = 5000
-        sell_events_all = []
-        for start in range(DEPLOY_BLOCK, latest_block + 1, chunk_size):
-            end = min(start + chunk_size - 1, latest_block)
-            try:
-                chunk_events = contract.events.CoinSold().get_logs(
-                    from_block=start,
-                    to_block=end
-                )
-                sell_events_all.extend(chunk_events)
-            except Exception as e:
-                pass
-        # Filter in Python
-        sell_events = [event for event in sell_events_all if event['args'].get('user', '').lower() == user_wallet.lower()]
-    except Exception as e:
-        sell_events = []
+def get_live_price(symbol):
+    return get_live_prices([symbol])[symbol.upper()]
 
+def get_user_trade_events(user_wallet):
     txs = []
-    for event in buy_events:
-        txs.append({
-            'type': 'buy',
-            'symbol': event['args']['symbol'],
-            'amount': event['args']['quantity'],
-            'timestamp': int(web3.eth.get_block(event['blockNumber'])['timestamp']),
-            'tx_hash': event['transactionHash'].hex(),
-        })
-    for event in sell_events:
+    for trade in get_user_trades(user_wallet):
         txs.append({
-            'type': 'sell',
-            'symbol': event['args']['symbol'],
-            'amount': event['args']['quantity'],
-            'timestamp': int(web3.eth.get_block(event['blockNumber'])['timestamp']),
-            'tx_hash': event['transactionHash'].hex(),
+            'type': trade.kind,
+            'symbol': trade.symbol,
+            'amount': int(trade.quantity),
+            'timestamp': trade.timestamp,
+            'tx_hash': trade.tx_hash,
         })
     return txs
-
@@ -1,25 +1,38 @@
 import json
 import traceback
 from django.http import Http404, HttpResponseBadRequest, JsonResponse
-import requests
+from dashboard.utils import upstream
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
 from web3 import Web3
-from .utils.market_data import get_coingecko_market_data, get_historical_market_data
-from dashboard.web3 import contract, web3  # Import web3 from web3.py
+from .utils.market_data import (
+    get_coingecko_market_data,
+    get_global_data,
+    get_historical_market_data,
+    get_market_cap_chart,
+)
+from dashboard.models import TradeEvent
+from dashboard.utils.coin_catalog import resolve_coin
+from dashboard.utils.fanout import Source, call_timeout, fan_out
+from dashboard.utils.indexer import get_user_trades
+from dashboard.utils.receipts import get_receipt
+from dashboard.utils.tx_queue import enqueue, get_status
 from dashboard.utils.utils import (
     repay_virtual_funds,
     request_virtual_funds,
     get_virtual_balance,
-    buy_coin,
-    sell_coin,
     get_transaction_history,
     get_coin_balance,
-    get_live_price,
+    get_live_prices,
+    get_user_state,
 )
 
+# Bounds for the `max_points` parameter of the market-history endpoint
+MIN_CHART_POINTS = 3
+MAX_CHART_POINTS = 5000
+
 # ===================== BUY COIN =====================
 
 def buy_coin_view(request):
@@ -42,8 +55,8 @@ def buy_coin_view(request):
                 messages.error(request, f"Insufficient virtual USD balance. You need ${total_cost:.2f} but have ${float(virtual_balance)/100:.2f}.")
                 return redirect("dashboard")
             price_cents = int(float(price) * 100)
-            tx_hash = buy_coin(user_wallet, symbol, price_cents, int(quantity))
-            messages.success(request, f"Buy TX sent! Hash: {tx_hash}")
+            tx = enqueue('buy_coin', user_wallet, symbol, price_cents, int(quantity), wallet=Web3.to_checksum_address(user_wallet))
+            messages.success(request, f"Buy order queued (#{tx.id}).")
         except Exception as e:
             messages.error(request, f"Buy failed: {str(e)}")
 
@@ -74,13 +87,34 @@ def sell_coin_view(request):
                 return redirect("dashboard")
 
             price_cents = int(float(price) * 100)
-            tx_hash = sell_coin(user_wallet, symbol, price_cents, int(quantity))
-            messages.success(request, f"Sell TX sent! Hash: {tx_hash}")
+            tx = enqueue('sell_coin', user_wallet, symbol, price_cents, int(quantity), wallet=Web3.to_checksum_address(user_wallet))
+            messages.success(request, f"Sell order queued (#{tx.id}).")
         except Exception as e:
             messages.error(request, f"Sell failed: {str(e)}")
 
     return redirect("dashboard")
 
+# ===================== QUEUED TX STATUS =====================
+@login_required
+def transaction_status_view(request, tx_id):
+    wallet = None if request.user.is_superuser else Web3.to_checksum_address(request.user.wallet_address)
+    status = get_status(tx_id, wallet=wallet)
+    if status is None:
+        return JsonResponse({'error': 'Transaction not found'}, status=404)
+    return JsonResponse(status)
+
+@login_required
+def receipt_status_view(request, tx_hash):
+    receipt = get_receipt(tx_hash)
+    if receipt is None:
+        return JsonResponse({'error': 'Transaction not tracked'}, status=404)
+    return JsonResponse({
+        'tx_hash': receipt.tx_hash,
+        'status': receipt.status,
+        'block_number': receipt.block_number,
+        'gas_used': receipt.gas_used,
+    })
+
 # ===================== REQUEST FUNDS =====================
 
 def request_funds_view(request):
@@ -116,9 +150,15 @@ def get_market_history(request, symbol):
         days = int(request.GET.get('days', 7))
         if days <= 0:
             return JsonResponse({'error': 'Days parameter must be positive'}, status=400)
-            
+        interval = request.GET.get('interval') or None
+        max_points = request.GET.get('max_points')
+        if max_points is not None:
+            max_points = int(max_points)
+            if not MIN_CHART_POINTS <= max_points <= MAX_CHART_POINTS:
+                return JsonResponse({'error': f'max_points must be between {MIN_CHART_POINTS} and {MAX_CHART_POINTS}'}, status=400)
+
         # Get historical data for specific coin
-        data = get_historical_market_data(symbol, days)
+        data = get_historical_market_data(symbol, days, interval=interval, max_points=max_points)
         if not data:
             return JsonResponse({'error': 'No data available'}, status=404)
             
@@ -129,7 +169,7 @@ def get_market_history(request, symbol):
         })
         
     except ValueError as e:
-        return JsonResponse({'error': f'Invalid days parameter: {str(e)}'}, status=400)
+        return JsonResponse({'error': f'Invalid parameter: {str(e)}'}, status=400)
     except Exception as e:
         return JsonResponse({'error': 'Failed to fetch historical data', 'detail': str(e)}, status=500)
 
@@ -200,57 +240,28 @@ def dashboard_view(request):
     try:
         user_wallet = Web3.to_checksum_address(request.user.wallet_address.lower())
 
-        # Fetch virtual balance
-        virtual_balance = get_virtual_balance(user_wallet)  # Convert cents to dollars
-        # Get raw transactions
-        transactions = get_transaction_history(user_wallet)
-        # --- Fetch buy/sell events from logs ---
+        # Balance, holdings and raw transactions in one batched read
+        state = get_user_state(user_wallet)
+        virtual_balance = state['usd_balance'] or 0
+        transactions = state['transactions'] or []
+        holding_balances = {symbol.upper(): amount for symbol, amount in state['holdings']}
+        # --- Buy/sell events from the local event index ---
         buy_events = []
         sell_events = []
-        DEPLOY_BLOCK = 8824481
-
-        # Fetch CoinBought events
-        try:
-            latest_block = web3.eth.block_number
-            chunk_size = 500
-            buy_logs_all = []
-            
-            for start in range(DEPLOY_BLOCK, latest_block + 1, chunk_size):
-                end = min(start + chunk_size - 1, latest_block)
-                try:
-                    chunk_events = contract.events.CoinBought().get_logs(
-                        from_block=start, 
-                        to_block=end, 
-                        argument_filters={'user': user_wallet}
-                    )
-                    buy_logs_all.extend(chunk_events)
-                except Exception as e:
-                    pass # Removed print(f"[DEBUG] Error fetching CoinBought logs for blocks {start}-{end}: {e}")
-
-            for event in buy_logs_all:
-                block = event['blockNumber']
-                timestamp = int(web3.eth.get_block(block)['timestamp'])
-                symbol = event['args']['symbol'].upper()
-                amount = event['args']['quantity']
-                usd_value = None
-                
-                if 'totalCost' in event['args']:
-                    usd_value = float(event['args']['totalCost']) / 100
-                elif 'pricePerToken' in event['args']:
-                    usd_value = float(amount) * (float(event['args']['pricePerToken']) / 100)
-                else:
-                    usd_value = float(amount)
-
-                buy_events.append({
-                    'type': 'buy',
-                    'symbol': symbol,
-                    'amount': amount,
-                    'timestamp': timestamp,
-                    'usd_value': usd_value,
-                    'tx_hash': event['transactionHash'].hex(),
-                })
-        except Exception as e:
-            pass # Removed print(f"[DEBUG] Error fetching CoinBought logs: {e}")
+        for trade in get_user_trades(user_wallet, kind=TradeEvent.BUY):
+            if trade.total_cost is not None:
+                usd_value = float(trade.total_cost) / 100
+            else:
+                usd_value = float(trade.quantity)
+
+            buy_events.append({
+                'type': 'buy',
+                'symbol': trade.symbol,
+                'amount': int(trade.quantity),
+                'timestamp': trade.timestamp,
+                'usd_value': usd_value,
+                'tx_hash': trade.tx_hash,
+            })
 
         # Convert contract history to dicts
         contract_txs = []
@@ -287,12 +298,13 @@ def dashboard_view(request):
         # Calculate current holdings value
         total_holdings_value = 0
         user_coins = set(tx['symbol'] for tx in all_txs if tx['type'] == 'buy')
-        
+        live_prices = get_live_prices(user_coins)
+
         for symbol in user_coins:
             try:
-                balance = get_coin_balance(user_wallet, symbol)
+                balance = holding_balances.get(symbol)
                 balance = float(balance) if balance else 0.0
-                live_price = get_live_price(symbol)
+                live_price = live_prices.get(symbol)
                 try:
                     live_price = float(live_price)
                 except (TypeError, ValueError):
@@ -323,6 +335,35 @@ def dashboard_view(request):
         })
 
 # ===================== COIN DETAIL =====================
+# Fan-out sources get no retries: a retry would not fit in the deadline anyway
+def _binance_json(url, params, until):
+    response = upstream.get(url, params=params, timeout=call_timeout(until), retries=0)
+    response.raise_for_status()
+    return response.json()
+
+def _coingecko_coin_info(symbol, coin_id, until):
+    # coin_id comes from the catalog; /search is only needed for unknown coins
+    if not coin_id:
+        search_response = upstream.get(
+            "https://api.coingecko.com/api/v3/search", params={"query": symbol},
+            timeout=call_timeout(until), retries=0,
+        )
+        if search_response.status_code == 200:
+            for result in search_response.json().get('coins', []):
+                if result['symbol'].upper() == symbol:
+                    coin_id = result['id']
+                    break
+    if not coin_id:
+        return {}
+    response = upstream.get("https://api.coingecko.com/api/v3/coins/markets", params={
+        "vs_currency": "usd",
+        "ids": coin_id,
+        "sparkline": False,
+    }, timeout=call_timeout(until), retries=0)
+    if response.status_code == 200 and response.json():
+        return response.json()[0]
+    return {}
+
 def coin_detail_view(request, symbol):
     try:
         if not symbol:
@@ -330,62 +371,30 @@ def coin_detail_view(request, symbol):
         symbol = symbol.upper()
         binance_symbol = f"{symbol}USDT"
 
-        # --- Get CoinGecko Data ---
-        coin_info = {}
-        coin_id = None
-        try:
-            search_url = f"https://api.coingecko.com/api/v3/search?query={symbol}"
-            search_response = requests.get(search_url)
-            if search_response.status_code == 200:
-                search_data = search_response.json()
-                if search_data.get('coins'):
-                    for coin in search_data['coins']:
-                        if coin['symbol'].upper() == symbol:
-                            coin_id = coin['id']
-                            break
-            if coin_id:
-                coingecko_url = f"https://api.coingecko.com/api/v3/coins/markets"
-                params = {
-                    "vs_currency": "usd",
-                    "ids": coin_id,
-                    "sparkline": False,
-                }
-                coingecko_response = requests.get(coingecko_url, params=params)
-                if coingecko_response.status_code == 200:
-                    coin_data = coingecko_response.json()
-                    if coin_data:
-                        coin_info = coin_data[0]
-        except Exception as e:
-            pass # Removed print("[CoinGecko] Error:", e)
-
-        # --- Get Binance Data ---
-        try:
-            ticker_url = f"https://api.binance.com/api/v3/ticker/24hr?symbol={binance_symbol}"
-            ticker_response = requests.get(ticker_url)
-            if ticker_response.status_code != 200:
-                raise Http404("Coin not found on Binance")
-            ticker_data = ticker_response.json()
-        except Exception as e:
-            pass # Removed print("[Binance] Error:", e)
+        # --- Fetch all sources at once; only the Binance ticker is required ---
+        catalog_coin = resolve_coin(symbol)
+        coin_id = catalog_coin['id'] if catalog_coin else None
+        data = fan_out({
+            'coin_info': Source(lambda until: _coingecko_coin_info(symbol, coin_id, until), deadline=4.0, default={}),
+            'ticker': Source(
+                lambda until: _binance_json("https://api.binance.com/api/v3/ticker/24hr", {"symbol": binance_symbol}, until),
+                deadline=5.0, required=True,
+            ),
+            'trades': Source(
+                lambda until: _binance_json("https://api.binance.com/api/v3/trades", {"symbol": binance_symbol, "limit": 50}, until),
+                deadline=3.0, default=[],
+            ),
+            'order_book': Source(
+                lambda until: _binance_json("https://api.binance.com/api/v3/depth", {"symbol": binance_symbol, "limit": 10}, until),
+                deadline=3.0, default={"bids": [], "asks": []},
+            ),
+        })
+        ticker_data = data['ticker']
+        if not ticker_data:
             raise Http404("Coin not found or API error.")
-
-        # --- Recent Trades ---
-        try:
-            trades_url = f"https://api.binance.com/api/v3/trades?symbol={binance_symbol}&limit=50"
-            trades_response = requests.get(trades_url)
-            recent_trades = trades_response.json() if trades_response.status_code == 200 else []
-        except Exception as e:
-            pass # Removed print("[Trades] Error:", e)
-            recent_trades = []
-
-        # --- Order Book ---
-        try:
-            depth_url = f"https://api.binance.com/api/v3/depth?symbol={binance_symbol}&limit=10"
-            depth_response = requests.get(depth_url)
-            order_book = depth_response.json() if depth_response.status_code == 200 else {"bids": [], "asks": []}
-        except Exception as e:
-            pass # Removed print("[OrderBook] Error:", e)
-            order_book = {"bids": [], "asks": []}
+        coin_info = data['coin_info']
+        recent_trades = data['trades']
+        order_book = data['order_book']
 
         # --- Market Cap ---
         market_cap = coin_info.get('market_cap', 0)
@@ -456,11 +465,8 @@ def market_chart_view(request):
         market_data = {}
 
         # Global market data
-        global_url = "https://api.coingecko.com/api/v3/global"
-        global_response = requests.get(global_url)
-        if global_response.status_code == 200:
-            global_json = global_response.json()
-            global_data = global_json.get('data', {})
+        global_data = get_global_data()
+        if global_data is not None:
             market_data.update({
                 "total_market_cap": global_data.get('total_market_cap', {}).get('usd'),
                 "total_volume": global_data.get('total_volume', {}).get('usd'),
@@ -469,24 +475,11 @@ def market_chart_view(request):
                 "btc_dominance": global_data.get('market_cap_percentage', {}).get('btc'),
                 "eth_dominance": global_data.get('market_cap_percentage', {}).get('eth')
             })
-        else:
-            print("[ERROR] Global market data failed with status", global_response.status_code)
 
         # Market chart data (last 30 days)
-        chart_url = "https://api.coingecko.com/api/v3/global/market_cap_chart"
-        chart_params = {
-            "vs_currency": "usd",
-            "days": 30
-        }
-        chart_response = requests.get(chart_url, params=chart_params)
-        if chart_response.status_code == 200:
-            chart_json = chart_response.json()
-            market_data["chart_data"] = {
-                "market_caps": chart_json.get("market_caps", []),
-                "total_volumes": chart_json.get("total_volumes", [])
-            }
-        else:
-            print("[ERROR] Chart data failed with status", chart_response.status_code, chart_response.text)
+        chart_data = get_market_cap_chart()
+        if chart_data is not None:
+            market_data["chart_data"] = chart_data
 
         return JsonResponse(market_data)
 
@@ -504,7 +497,7 @@ def coin_details_view(request, symbol):
         normalized_symbol = symbol.lower()
         # Fetch coin details from CoinGecko API
         url = f"https://api.coingecko.com/api/v3/coins/{normalized_symbol}"
-        response = requests.get(url)
+        response = upstream.get(url)
         if response.status_code == 200:
             coin_data = response.json()
             return render(request, 'coin_detail.html', {'coin': coin_data})
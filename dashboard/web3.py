@@ -1,11 +1,16 @@
+import logging
+import threading
+import time
+
+from django.utils.functional import SimpleLazyObject
 from web3 import Web3
 
-# === Connect to Ethereum node ===
-web3 = Web3(Web3.HTTPProvider("https://eth-sepolia.g.alchemy.com/v2/N0adIqZubpwEje_0URf5i"))
+logger = logging.getLogger(__name__)
 
-# Check connection
-if not web3.is_connected():
-	raise ConnectionError("Failed to connect to Ethereum network.")
+# === Ethereum node ===
+RPC_URL = "https://eth-sepolia.g.alchemy.com/v2/N0adIqZubpwEje_0URf5i"
+# Seconds before an RPC request gives up
+RPC_TIMEOUT = 10
 
 # === Wallet Details ===
 WALLET_ADDRESS = "0x16d3ACbD38aa841DB2Da166041e99C9d3cb98750"  # Replace with your wallet address
@@ -15,6 +20,13 @@ PRIVATE_KEY = "ebb51a573b7dbfb3163e8f856249b75d9f973f78c17760f937a5eea285cfbe8b"
 # === Smart Contract ===
 CONTRACT_ADDRESS = "0x962D7BF89D9214604457033bB1B557da8e14e71f"
 
+# Multicall3 is deployed at the same address on most chains, Sepolia included.
+# Set to None to always use plain JSON-RPC batches for view calls.
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# First block to scan for contract events (the contract's deploy block)
+DEPLOY_BLOCK = 8819605
+
 # ✅ Paste your ABI directly here
 abi = [
 	{
@@ -633,23 +645,67 @@ abi = [
 	}
 ]
 
-contract = web3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=abi)
+# === Client ===
+class Web3Client:
+	"""
+	Process-wide connection to the node and the CryptoPlatform contract.
+	Nothing touches the network until `web3` or `contract` is first used,
+	so importing this module (manage.py commands, tests, workers) is free.
+	"""
+
+	def __init__(self, rpc_url, contract_address, abi, timeout=RPC_TIMEOUT):
+		self.rpc_url = rpc_url
+		self.contract_address = Web3.to_checksum_address(contract_address)
+		self.abi = abi
+		self.timeout = timeout
+		self._web3 = None
+		self._contract = None
+		self._lock = threading.RLock()
+
+	@property
+	def web3(self):
+		if self._web3 is None:
+			with self._lock:
+				if self._web3 is None:
+					self._web3 = Web3(Web3.HTTPProvider(self.rpc_url, request_kwargs={'timeout': self.timeout}))
+		return self._web3
+
+	@property
+	def contract(self):
+		if self._contract is None:
+			with self._lock:
+				if self._contract is None:
+					self._contract = self.web3.eth.contract(address=self.contract_address, abi=self.abi)
+		return self._contract
+
+	def health_check(self):
+		"""One cheap RPC call. Returns {'ok', 'block_number', 'latency_ms', 'error'}; never raises."""
+		started = time.monotonic()
+		try:
+			block_number = self.web3.eth.block_number
+		except Exception as e:
+			return {'ok': False, 'block_number': None, 'latency_ms': None, 'error': str(e)}
+		latency_ms = round((time.monotonic() - started) * 1000, 1)
+		return {'ok': True, 'block_number': block_number, 'latency_ms': latency_ms, 'error': None}
 
+	def warm_up(self):
+		"""Open the connection pool and check the backend wallet is the contract admin."""
+		health = self.health_check()
+		if not health['ok']:
+			logger.warning("Ethereum node unreachable at warm-up: %s", health['error'])
+			return health
+		try:
+			admin_address = self.contract.functions.admin().call()
+			if admin_address.lower() != WALLET_ADDRESS.lower():
+				logger.warning("Backend wallet is NOT the contract admin. Admin-only functions will fail.")
+		except Exception as e:
+			logger.warning("Error fetching contract admin: %s", e)
+		return health
 
 
-# === Debug: Print contract admin and backend wallet ===
-try:
-	admin_address = contract.functions.admin().call()
-	# cont=contract.functions.getWatchlist("0xdA46A64ab8c6BEda14677c49D2Bdd0fC4Bf7b72D").call()
-	# print(f"[DEBUG] contract.functions.getWatchlist('0xdA46A64ab8c6BEda14677c49D2Bdd0fC4Bf7b72D').call():  {cont}")
-	# print(f"[DEBUG] Contract admin address: {admin_address}")
-	# print(f"[DEBUG] Backend WALLET_ADDRESS: {WALLET_ADDRESS}")
-	# if admin_address.lower() != WALLET_ADDRESS.lower():
-	# 	print("[WARNING] Backend wallet is NOT the contract admin. Admin-only functions will fail.")
-	# else:
-	# 	print("[INFO] Backend wallet IS the contract admin. Admin-only functions should work.")
-except Exception as e:
-	print(f"[DEBUG] Error fetching contract admin: {e}")
+client = Web3Client(RPC_URL, CONTRACT_ADDRESS, abi)
+web3 = SimpleLazyObject(lambda: client.web3)
+contract = SimpleLazyObject(lambda: client.contract)
 
 # === Debug: Example checks for adminRegister issues ===
 def debug_admin_register(user_address):
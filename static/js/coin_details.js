@@ -32,7 +32,7 @@ document.addEventListener('DOMContentLoaded', function() {
         }
 
         // Construct the API URL with the coin symbol
-        const url = `/api/market-history/${symbol}/?days=${days}`;
+        const url = `/api/market-history/${symbol}/?days=${days}&max_points=1000`;
 
         fetch(url)
             .then(response => response.json())
@@ -4,47 +4,51 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required, user_passes_test
-import requests
+from dashboard.utils import upstream
 from web3 import Web3
-from dashboard.web3 import contract, WALLET_ADDRESS, web3
-from django.core.cache import cache
+from django.core.paginator import Paginator
 import logging
 
 from .models import WalletUser
+from dashboard.models import TradeEvent
+from dashboard.utils.borrow_requests import cross_check_pending_requests, get_pending_borrow_requests
+from dashboard.utils.coin_catalog import request_coin_images, resolve_coins
+from dashboard.utils.contract_admin import is_admin
+from dashboard.utils.indexer import get_user_trades
+from dashboard.utils.registrations import ensure_registered
+from dashboard.utils.tx_queue import enqueue
 from user.decorators import wallet_login_required
 from dashboard.utils.utils import (
     approve_virtual_funds,
-    get_all_pending_requests,
     get_avg_buy_price,
-    get_borrowed_amount,
     get_transaction_history,
-    get_virtual_balance,
-    get_watchlist,
-    get_coin_balance,
+    get_user_state,
     reject_virtual_funds,
-    repay_virtual_funds,
     request_virtual_funds,
-    get_live_price,  # Import the live price function from utils
+    get_live_prices,
 )
 
 logger = logging.getLogger(__name__)
 
 def is_admin_address(user):
     try:
-        wallet = user.wallet_address
-        admin_address = contract.functions.admin().call()
-        return Web3.to_checksum_address(wallet) == Web3.to_checksum_address(admin_address)
+        return is_admin(user.wallet_address)
     except Exception:
         return False
 # ===== Admin Panel View =====
+ADMIN_PANEL_PAGE_SIZE = 50
+
 @user_passes_test(is_admin_address)
 def admin_panel_view(request):
-    try:
-        pending = get_all_pending_requests()
-        return render(request, "admin_panel.html", {"pending_requests": pending})
-    except Exception as e:
-        messages.error(request, f"Error: {e}")
-        return render(request, "admin_panel.html", {"pending_requests": []})
+    page = Paginator(get_pending_borrow_requests(), ADMIN_PANEL_PAGE_SIZE).get_page(request.GET.get("page"))
+    context = {"pending_requests": page.object_list, "page_obj": page}
+    # ?verify=1 compares the local rows with the contract's own pending list
+    if request.GET.get("verify"):
+        try:
+            context["cross_check"] = cross_check_pending_requests()
+        except Exception as e:
+            messages.error(request, f"Chain cross-check failed: {e}")
+    return render(request, "admin_panel.html", context)
 # ===== Wallet Connection =====
 def connect_wallet_page(request):
     return render(request, "connect_wallet.html")
@@ -66,11 +70,11 @@ def wallet_login_view(request):
 
         # Create or get the user
         user, _ = WalletUser.objects.get_or_create(wallet_address=wallet_address.lower())
-        # Register user in the contract if not already registered
-        from dashboard.web3 import contract
-        from dashboard.utils.utils import admin_register_user
-        if not contract.functions.registered(wallet_address).call():
-            admin_register_user(wallet_address)
+        # Register user in the contract if not already registered (queued, never sent twice)
+        try:
+            ensure_registered(wallet_address)
+        except Exception as e:
+            logger.warning("Could not check registration for %s: %s", wallet_address, e)
         # Specify backend explicitly to avoid ValueError
         login(request, user, backend='user.backends.WalletAddressBackend')
 
@@ -86,25 +90,18 @@ def portfolio_view(request):
     user_wallet = Web3.to_checksum_address(request.user.wallet_address.lower())
     print("[portfolio_view] User wallet:", user_wallet)
 
-    # Step 1: Get balances and watchlist
+    # Step 1: Get balances, watchlist, holdings and history in one batched read
     try:
-        usd_balance = get_virtual_balance(user_wallet)
-        print("[portfolio_view] USD balance:", usd_balance)
+        state = get_user_state(user_wallet)
+        logger.debug("User state for %s: %s", user_wallet, state)
     except Exception as e:
-        print("[portfolio_view] Error fetching USD balance:", e)
-
+        logger.warning("Could not fetch user state for %s: %s", user_wallet, e)
+        state = {}
+    usd_balance = state.get('usd_balance')
     usd_balance_virtual = float(usd_balance)  if usd_balance else 0.0  # Convert cents to dollars
-    try:
-        watchlist = get_watchlist(user_wallet)
-        print("[portfolio_view] Watchlist:", watchlist)
-    except Exception as e:
-        print("[portfolio_view] Error fetching watchlist:", e)
-
-    try:
-        transaction_data = get_transaction_history(user_wallet)
-        print("[portfolio_view] Transaction data:", transaction_data)
-    except Exception as e:
-        print("[portfolio_view] Error fetching transaction history:", e)
+    watchlist = state.get('watchlist') or []
+    transaction_data = state.get('transactions') or []
+    holding_balances = {symbol.upper(): amount for symbol, amount in state.get('holdings', [])}
 
     # Step 2: Filter transactions
     tx_type = request.GET.get("type")
@@ -124,95 +121,32 @@ def portfolio_view(request):
             "usd_value": tx[2],
         })
 
-    # Step 3: Get coin info
-    try:
-        markets_url = "https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&order=market_cap_desc&per_page=50&page=1&sparkline=False"
-        market_data = cache.get('coingecko_market_data_top50')
-        if not market_data:
-            response = requests.get(markets_url, headers={'Accept': 'application/json'})
-            market_data = response.json() if response.status_code == 200 else []
-            cache.set('coingecko_market_data_top50', market_data, 120)
-        print("[portfolio_view] Market data fetched:", market_data)
-        coin_map = {}
-        for coin in market_data:
-            symbol = coin.get('symbol', '').upper()
-            if symbol:
-                coin_map[symbol] = {
-                    'id': coin.get('id'),
-                    'name': coin.get('name'),
-                    'image': coin.get('image'),
-                    'market_cap_rank': coin.get('market_cap_rank')
-                }
-        coingecko_list_url = "https://api.coingecko.com/api/v3/coins/list"
-        all_coins = cache.get('coingecko_all_coins')
-        if not all_coins:
-            response = requests.get(coingecko_list_url, headers={'Accept': 'application/json'})
-            all_coins = response.json() if response.status_code == 200 else []
-            cache.set('coingecko_all_coins', all_coins, 600)
-        for coin in all_coins:
-            symbol = coin.get('symbol', '').upper()
-            if symbol and symbol not in coin_map:
-                coin_map[symbol] = {
-                    'id': coin.get('id'),
-                    'name': coin.get('name'),
-                    'image': None
-                }
-        print("[portfolio_view] Coin map built:", coin_map)
-    except Exception as e:
-        print("[portfolio_view] Error fetching coin info:", e)
-        coin_map = {
-            'BTC': {'id': 'bitcoin', 'name': 'Bitcoin', 'image': 'https://assets.coingecko.com/coins/images/1/large/bitcoin.png'},
-            'ETH': {'id': 'ethereum', 'name': 'Ethereum', 'image': 'https://assets.coingecko.com/coins/images/279/large/ethereum.png'},
-            'STETH': {'id': 'staked-ether', 'name': 'Staked ETH', 'image': 'https://assets.coingecko.com/coins/images/13442/large/steth_logo.png'},
-            'BNB': {'id': 'binancecoin', 'name': 'BNB', 'image': 'https://assets.coingecko.com/coins/images/825/large/bnb-icon2_2x.png'},
-            'USDT': {'id': 'tether', 'name': 'Tether', 'image': 'https://assets.coingecko.com/coins/images/325/large/Tether.png'},
-            'SOL': {'id': 'solana', 'name': 'Solana', 'image': 'https://assets.coingecko.com/coins/images/4128/large/solana.png'},
-            'ADA': {'id': 'cardano', 'name': 'Cardano', 'image': 'https://assets.coingecko.com/coins/images/975/large/cardano.png'},
-            'XRP': {'id': 'ripple', 'name': 'XRP', 'image': 'https://assets.coingecko.com/coins/images/44/large/xrp-symbol-white-128.png'},
-            'DOGE': {'id': 'dogecoin', 'name': 'Dogecoin', 'image': 'https://assets.coingecko.com/coins/images/5/large/dogecoin.png'},
-            'DOT': {'id': 'polkadot', 'name': 'Polkadot', 'image': 'https://assets.coingecko.com/coins/images/12171/large/polkadot.png'},
-            'ENA': {'id': 'enjincoin', 'name': 'Enjin Coin', 'image': 'https://assets.coingecko.com/coins/images/110/large/enjincoin.png'},
-            'MATIC': {'id': 'matic-network', 'name': 'Polygon', 'image': 'https://assets.coingecko.com/coins/images/4713/large/matic-token-icon.png'}
-        }
-
-    # Step 4: Build holdings
+    # Step 3: Build holdings
     holdings = []
     user_coins = set()
     for tx in transaction_data:
         if isinstance(tx, (list, tuple)) and len(tx) >= 2:
             user_coins.add(tx[1].upper())
-    try:
-        symbols, _ = contract.functions.getUserHoldings(user_wallet).call()
-        user_coins.update([s.upper() for s in symbols])
-    except Exception as e:
-        print("[portfolio_view] Error building holdings:", e)
-        pass
+    user_coins.update(holding_balances)
+    coin_map = resolve_coins(user_coins)
+    live_prices = get_live_prices(user_coins)
+    missing_images = []
     for symbol in user_coins:
         try:
             coin_info = coin_map.get(symbol, {'id': symbol.lower(), 'name': symbol})
-            balance = get_coin_balance(user_wallet, symbol)
+            # Coins missing from getUserHoldings have a zero balance on chain
+            balance = holding_balances.get(symbol)
             balance = float(balance) if balance else 0.0
             buy_price = get_avg_buy_price(user_wallet, symbol)
-            live_price = get_live_price(symbol)
+            live_price = live_prices.get(symbol)
             try:
                 live_price = float(live_price)
             except (TypeError, ValueError):
                 live_price = 0.0
+            # Missing images are fetched by backfill_coin_images; the template shows a placeholder meanwhile
             image_url = coin_info.get('image')
             if not image_url:
-                try:
-                    url = f"https://api.coingecko.com/api/v3/coins/{coin_info['id']}"
-                    headers = {'Accept': 'application/json'}
-                    response = requests.get(url, headers=headers)
-                    if response.status_code == 200:
-                        data = response.json()
-                        image_url = data.get('image', {}).get('large')
-                    else:
-                        image_url = None
-                except Exception as e:
-                    image_url = None
-            if not image_url:
-                image_url = f"https://assets.coingecko.com/coins/images/1/large/bitcoin.png"
+                missing_images.append(coin_info['id'])
             name = coin_info['name']
             if balance > 0 or live_price > 0:
                 holdings.append({
@@ -228,15 +162,11 @@ def portfolio_view(request):
         except Exception as e:
             print("[portfolio_view] Error processing coin", symbol, e)
             pass
+    if missing_images:
+        request_coin_images(missing_images)
     filtered_holdings = [coin for coin in holdings if coin["quantity"] > 0]
 
-    # Fetch borrowed amount
-    try:
-        borrowed = get_borrowed_amount(user_wallet)
-        print("[portfolio_view] Borrowed amount:", borrowed)
-    except Exception as e:
-        print("[portfolio_view] Error fetching borrowed amount:", e)
-        borrowed = 0.0
+    borrowed = state.get('borrowed') or 0.0
 
     context = {
         "wallet": user_wallet,
@@ -257,13 +187,11 @@ def borrow_virtual_funds_view(request):
         amount = int(request.POST.get("amount"))
         user_wallet = Web3.to_checksum_address(request.user.wallet_address.lower())
         
-        from dashboard.utils.utils import admin_register_user, request_virtual_funds_for
-        # Register user if not already registered
-        if not contract.functions.registered(user_wallet).call():
-            admin_register_user(user_wallet)
         try:
-            tx_hash = request_virtual_funds_for(user_wallet, amount)
-            messages.success(request, f"Borrowed ${amount}. TX: {tx_hash[:10]}...")
+            # Register user if not already registered; the queue sends in order so registration lands first
+            ensure_registered(user_wallet)
+            tx = enqueue('request_virtual_funds_for', user_wallet, amount, wallet=user_wallet)
+            messages.success(request, f"Borrow request for ${amount} queued (#{tx.id}).")
         except Exception as e:
             messages.error(request, f"Borrow failed: {e}")
     return redirect("portfolio")
@@ -276,10 +204,8 @@ def repay_virtual_funds_view(request):
         amount = int(float(request.POST.get("amount")))
         try:
             user_wallet = Web3.to_checksum_address(request.user.wallet_address.lower())
-            tx_hash = repay_virtual_funds(user_wallet, amount)
-            # Wait for the transaction to be mined
-            Web3.eth.wait_for_transaction_receipt(tx_hash)
-            messages.success(request, f"Repaid ${amount}. TX: {tx_hash[:10]}...")
+            tx = enqueue('repay_virtual_funds', user_wallet, amount, wallet=user_wallet)
+            messages.success(request, f"Repayment of ${amount} queued (#{tx.id}).")
         except Exception as e:
             messages.error(request, f"Repayment failed: {e}")
     return redirect("portfolio")
@@ -294,93 +220,36 @@ def transaction_history_view(request):
     user_wallet = Web3.to_checksum_address(user_wallet.lower())
     try:
         transactions = get_transaction_history(user_wallet)
-        # --- Fetch buy/sell events from logs ---
+        # --- Buy/sell events ---
         buy_events = []
         sell_events = []
-        DEPLOY_BLOCK = 8819605  # <-- Set this to your contract's actual deploy block
         # Fetch live prices for coins
-        import requests
         coingecko_url = "https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&order=market_cap_desc&per_page=250&page=1&sparkline=False"
         try:
-            response = requests.get(coingecko_url, headers={'Accept': 'application/json'})
+            response = upstream.get(coingecko_url, headers={'Accept': 'application/json'})
             market_data = response.json() if response.status_code == 200 else []
             price_map = {coin['symbol'].upper(): float(coin['current_price']) for coin in market_data if 'symbol' in coin and 'current_price' in coin}
         except Exception as e:
             price_map = {}
 
-        # CoinBought: user is indexed, so we can filter
-        try:
-            latest_block = web3.eth.block_number
-            chunk_size = 500
-            buy_logs_all = []
-            for start in range(DEPLOY_BLOCK, latest_block + 1, chunk_size):
-                end = min(start + chunk_size - 1, latest_block)
-                try:
-                    chunk_events = contract.events.CoinBought().get_logs(from_block=start, to_block=end, argument_filters={'user': user_wallet})
-                    buy_logs_all.extend(chunk_events)
-                except Exception as e:
-                    pass
-            for event in buy_logs_all:
-                block = event['blockNumber']
-                timestamp = int(web3.eth.get_block(block)['timestamp'])
-                symbol = event['args']['symbol'].upper()
-                amount = event['args']['quantity']
-                usd_value = None
-                if 'totalCost' in event['args']:
-                    usd_value = float(event['args']['totalCost']) / 100
-                elif 'pricePerToken' in event['args']:
-                    usd_value = float(amount) * (float(event['args']['pricePerToken']) / 100)
-                else:
-                    usd_value = float(amount)  # fallback
-                buy_events.append({
-                    'type': 'buy',
-                    'symbol': symbol,
-                    'amount': amount,
-                    'timestamp': timestamp,
-                    'usd_value': usd_value,
-                    'tx_hash': event['transactionHash'].hex(),
-                })
-        except Exception as e:
-            pass
-
-        # CoinSold: user is NOT indexed, so we CANNOT filter in the query
-        # Paginate to avoid provider limits
-        try:
-            latest_block = web3.eth.block_number
-            chunk_size = 500
-            sell_logs_all = []
-            for start in range(DEPLOY_BLOCK, latest_block + 1, chunk_size):
-                end = min(start + chunk_size - 1, latest_block)
-                try:
-                    chunk_events = contract.events.CoinSold().get_logs(from_block=start, to_block=end)
-                    sell_logs_all.extend(chunk_events)
-                except Exception as e:
-                    pass
-            # Filter in Python
-            for event in sell_logs_all:
-                if event['args'].get('user', '').lower() != user_wallet.lower():
-                    continue
-                block = event['blockNumber']
-                timestamp = int(web3.eth.get_block(block)['timestamp'])
-                symbol = event['args']['symbol'].upper()
-                amount = event['args']['quantity']
-                usd_value = None
-                if 'totalCost' in event['args']:
-                    usd_value = float(event['args']['totalCost']) / 100
-                elif 'pricePerToken' in event['args']:
-                    usd_value = float(amount) * (float(event['args']['pricePerToken']) / 100)
-                else:
-                    usd_value = float(amount)  # fallback
-                sell_events.append({
-                    'type': 'sell',
-                    'symbol': symbol,
-                    'amount': amount,
-                    'timestamp': timestamp,
-                    'usd_value': usd_value,
-                    'tx_hash': event['transactionHash'].hex(),
-                })
-        except Exception as e:
-            pass
+        # Buy/sell events come from the local event index
+        for trade in get_user_trades(user_wallet):
+            if trade.total_cost is not None:
+                usd_value = float(trade.total_cost) / 100
+            else:
+                usd_value = float(trade.quantity)  # fallback
+            event = {
+                'type': trade.kind,
+                'symbol': trade.symbol,
+                'amount': int(trade.quantity),
+                'timestamp': trade.timestamp,
+                'usd_value': usd_value,
+                'tx_hash': trade.tx_hash,
+            }
+            if trade.kind == TradeEvent.BUY:
+                buy_events.append(event)
+            else:
+                sell_events.append(event)
 
         # --- Convert contract history to dicts ---
 
@@ -474,7 +343,7 @@ def transaction_history_view(request):
         return render(request, "transaction_history.html", {})
     
 # ===== Approve / Reject Borrow Requests =====
-@login_required
+@user_passes_test(is_admin_address)
 def approve_request_view(request, user_wallet):
     try:
         user_wallet = Web3.to_checksum_address(user_wallet)
@@ -484,7 +353,7 @@ def approve_request_view(request, user_wallet):
         messages.error(request, f"Approve failed: {e}")
     return redirect('admin_panel')
 
-@login_required
+@user_passes_test(is_admin_address)
 def reject_request_view(request, user_wallet):
     try:
         user_wallet = Web3.to_checksum_address(user_wallet)